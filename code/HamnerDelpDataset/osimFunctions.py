@@ -13,6 +13,23 @@
 
 
 import opensim as osim
+import numpy as np
+import os
+import re
+import mmap
+import time
+import shutil
+import json
+import pickle
+import hashlib
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+#Compiled pattern for the body mass adjustment lines in the RRA log
+#e.g. 'pelvis: orig mass = 11.777, new mass = 11.063'
+#This works on bytes so the log can be scanned without decoding it to lines
+massAdjustmentPattern = re.compile(rb'(\S+?):?[ \t]+orig mass = (\S+),[ \t]*new mass = (\S+)')
 
 # %% Function to add set of torque actuators to model
 
@@ -67,6 +84,633 @@ def addTorqueActuators(osimModel = None,
     #Return model
     return osimModel
 
+# %% Functions to run RRA tools from set-up files
+
+def runRRATool(setupFileName = None, logFileName = None, rraTool = None):
+    
+    """
+    
+    Convenience function for running an RRA tool from a set-up file while logging
+    the outputs to a file. This is kept at the module level so it can be used by
+    worker processes.
+    
+    Input:    setupFileName - RRA tool set-up file to run
+              logFileName - file to write the OpenSim log to while the tool runs
+              rraTool - optional RRA tool object to run directly instead of loading the set-up file
+              
+    Output:   rraRunTime - time taken to run the tool (seconds)
+                  
+    """
+    
+    #Check inputs
+    if (setupFileName is None and rraTool is None) or logFileName is None:
+        raise ValueError('A set-up filename or tool and a log filename are required')
+    
+    #Add in opensim logger for the tool
+    #The logger is global to the process so this is set for each tool
+    osim.Logger.removeFileSink()
+    osim.Logger.addFileSink(logFileName)
+    
+    #Load the rra tool if one isn't provided
+    #For some reason rra works better when the tool is reloaded
+    if rraTool is None:
+        rraTool = osim.RRATool(setupFileName)
+    
+    #Run the tool and time it
+    startRunTime = time.time()
+    rraTool.run()
+    rraRunTime = round(time.time() - startRunTime, 2)
+    
+    #Stop the logger
+    osim.Logger.removeFileSink()
+    
+    #Return the run time
+    return rraRunTime
+
+def runRRATools(setupFileNames = None, logFileNames = None, nWorkers = 1):
+    
+    """
+    
+    Convenience function for running a series of independent RRA tools (e.g.
+    separate gait cycles), either one after the other or across worker processes.
+    
+    Input:    setupFileNames - list of RRA tool set-up files to run
+              logFileNames - list of log files that match the set-up files
+              nWorkers - number of worker processes to run the tools in (defaults to 1, i.e. no workers)
+              
+    Output:   rraRunTimes - list of run times (seconds) in the same order as the set-up files
+                  
+    """
+    
+    #Check inputs
+    if setupFileNames is None or logFileNames is None:
+        raise ValueError('Set-up and log filenames are required')
+    if len(setupFileNames) != len(logFileNames):
+        raise ValueError('A log filename is required for each set-up file')
+    
+    #Use absolute paths so the workers aren't dependent on the working directory
+    setupFileNames = [os.path.abspath(setupFileName) for setupFileName in setupFileNames]
+    logFileNames = [os.path.abspath(logFileName) for logFileName in logFileNames]
+    
+    #Run the tools
+    if nWorkers > 1:
+        with ProcessPoolExecutor(max_workers = nWorkers) as executor:
+            rraRunTimes = list(executor.map(runRRATool, setupFileNames, logFileNames))
+    else:
+        rraRunTimes = [runRRATool(setupFileName, logFileName) for setupFileName, logFileName in zip(setupFileNames, logFileNames)]
+    
+    #Return the run times
+    return rraRunTimes
+
+# %% Function to read mass adjustments from an RRA log
+
+def readMassAdjustments(logFileName = None, bodyList = None):
+    
+    """
+    
+    Convenience function for reading the body mass adjustments recommended by
+    RRA from its log file. The log is memory-mapped and scanned in a single pass
+    so that large (verbose) logs aren't read in as individual lines.
+    
+    Input:    logFileName - log file written while the RRA tool was run
+              bodyList - list of body names to extract mass adjustments for
+              
+    Output:   massAdjustments - dict of body names with their (original mass, new mass)
+                  
+    """
+    
+    #Check inputs
+    if logFileName is None or bodyList is None:
+        raise ValueError('Log filename and body list are required')
+    
+    #Set the bodies to look for
+    bodyNames = set(bodyList)
+    
+    #Search through the log file for body adjustments
+    #An empty log can't be memory-mapped, but also has no adjustments
+    massAdjustments = {}
+    if os.path.getsize(logFileName) == 0:
+        return massAdjustments
+    with open(logFileName, 'rb') as fid, mmap.mmap(fid.fileno(), 0, access = mmap.ACCESS_READ) as logData:
+        for massMatch in massAdjustmentPattern.finditer(logData):
+            bodyName = massMatch.group(1).decode()
+            if bodyName in bodyNames:
+                #Extract out the original mass and new mass
+                massAdjustments[bodyName] = (float(massMatch.group(2)), float(massMatch.group(3)))
+    
+    #Return the mass adjustments
+    return massAdjustments
+
+# %% Function to get body names from a model
+
+def getBodyNames(osimModel = None):
+    
+    """
+    
+    Convenience function for getting the body names from a model. The body set
+    is retrieved once rather than for each body in the model.
+    
+    Input:    osimModel - opensim model object to get bodies from
+              
+    Output:   bodyNames - tuple of body names in body set order
+                  
+    """
+    
+    #Check inputs
+    if osimModel is None:
+        raise ValueError('OpenSim model is required')
+    
+    #Get the body set once
+    bodySet = osimModel.getBodySet()
+    
+    #Return the body names
+    return tuple(bodySet.get(ii).getName() for ii in range(bodySet.getSize()))
+
+# %% Function to set body masses directly in a model file
+
+def setBodyMasses(osimModelFileName = None, bodyMasses = None,
+                  outputFileName = None):
+    
+    """
+    
+    Convenience function for updating body masses in a model file. Only the
+    mass values change so this edits the mass elements of the model XML directly
+    rather than loading, finalising and re-printing the model through OpenSim.
+    
+    Input:    osimModelFileName - opensim model filename to edit
+              bodyMasses - dict of body names and their associated new mass
+              outputFileName - optional filename to output to (defaults to overwriting the input)
+              
+    Output:   massesChanged - whether any masses were changed and the model written
+                  
+    """
+    
+    #Check inputs
+    if osimModelFileName is None or bodyMasses is None:
+        raise ValueError('Model filename and body masses are required')
+    if outputFileName is None:
+        outputFileName = osimModelFileName
+    
+    #Leave the model file as is if there are no masses to change
+    if len(bodyMasses) == 0 and outputFileName == osimModelFileName:
+        return False
+    
+    #Parse the model file, keeping any comments in the file
+    modelTree = ET.parse(osimModelFileName, parser = ET.XMLParser(target = ET.TreeBuilder(insert_comments = True)))
+    
+    #Loop through the bodies in the body set and set the new mass
+    massesChanged = False
+    for bodyElement in modelTree.getroot().iterfind('./Model/BodySet/objects/Body'):
+        if bodyElement.get('name') in bodyMasses:
+            newMass = repr(float(bodyMasses[bodyElement.get('name')]))
+            if bodyElement.find('mass').text.strip() != newMass:
+                bodyElement.find('mass').text = newMass
+                massesChanged = True
+    
+    #Write the model back to file if anything changed (or a new file is needed)
+    if massesChanged or outputFileName != osimModelFileName:
+        modelTree.write(outputFileName, encoding = 'UTF-8', xml_declaration = True)
+    
+    #Return whether the masses were changed
+    return massesChanged
+
+# %% Function to get the time range of a storage file
+
+def getTimeRange(stoFileName = None):
+    
+    """
+    
+    Convenience function for getting the first and last time of a storage file.
+    The times are cached against the absolute path and modification time of the
+    file, so repeat calls only parse the file again if it has been rewritten.
+    
+    Input:    stoFileName - storage file to get the time range from
+              
+    Output:   (firstTime, lastTime) - first and last time in the storage file
+                  
+    """
+    
+    #Check inputs
+    if stoFileName is None:
+        raise ValueError('Filename for storage file is required')
+    
+    #Use the cached lookup on the absolute path and modification time
+    return _getTimeRange(os.path.abspath(stoFileName), os.path.getmtime(stoFileName))
+
+@lru_cache(maxsize = 128)
+def _getTimeRange(stoFileName, modifiedTime):
+    
+    #Read the storage file once and get both times
+    stoData = osim.Storage(stoFileName)
+    
+    #Return the time range
+    return (stoData.getFirstTime(), stoData.getLastTime())
+
+# %% Function to read a table file into numpy arrays
+
+def getTableData(tableFileName = None):
+    
+    """
+    
+    Convenience function for reading a time series table file into numpy arrays
+    in one pass, rather than extracting each column from the table separately.
+    
+    Input:    tableFileName - time series table file (e.g. .sto or .mot) to read
+              
+    Output:   tableTime - array of time values
+              columnInd - dictionary of column labels with their index in the data array
+              tableData - array of data values (rows x columns)
+                  
+    """
+    
+    #Check inputs
+    if tableFileName is None:
+        raise ValueError('Filename for table is required')
+    
+    #Read the table in
+    table = osim.TimeSeriesTable(tableFileName)
+    
+    #Extract the time, column labels and data matrix
+    tableTime = np.array(table.getIndependentColumn())
+    columnInd = {label: ii for ii, label in enumerate(table.getColumnLabels())}
+    tableData = table.getMatrix().to_numpy()
+    
+    #Return the data
+    return tableTime, columnInd, tableData
+
+# %% Function to resample time series data to a set number of points
+
+def resampleData(time = None, data = None, nPoints = 101):
+    
+    """
+    
+    Convenience function for linearly interpolating each column of a time series
+    array to a set number of evenly spaced points between its first and last time
+    (e.g. 0-100% of a gait cycle).
+    
+    Input:    time - array of increasing time values for the data (repeated times only use their first row)
+              data - time x variable array of data to resample
+              nPoints - number of points to resample to (defaults to 101)
+              
+    Output:   resampledData - nPoints x variable array of the resampled data
+                  
+    """
+    
+    #Check inputs
+    if time is None or data is None:
+        raise ValueError('Time and data arrays are required')
+    
+    #Drop any repeated time stamps (e.g. duplicate rows in OpenSim storage files)
+    #so that there are no zero width time intervals to interpolate within
+    time, uniqueInds = np.unique(np.asarray(time), return_index = True)
+    data = np.asarray(data)[uniqueInds]
+    
+    #Create the evenly spaced time points to resample to
+    newTime = np.linspace(time[0], time[-1], nPoints)
+    
+    #Find the original time interval each new time point sits in, and its relative
+    #position within that interval. These are the same for every variable so are
+    #only calculated once.
+    lowerInds = np.clip(np.searchsorted(time, newTime, side = 'right') - 1, 0, len(time) - 2)
+    weights = ((newTime - time[lowerInds]) / (time[lowerInds+1] - time[lowerInds]))[:,np.newaxis]
+    
+    #Interpolate all variables to the new time points at once
+    return data[lowerInds] * (1 - weights) + data[lowerInds+1] * weights
+
+# %% Function to apply RRA mass adjustments to the adjusted model
+
+def applyMassAdjustments(logFileName = None, bodyList = None, osimModelFileName = None):
+    
+    """
+    
+    Convenience function for reading the mass adjustments recommended by RRA from
+    its log and applying them to the adjusted model file it outputs.
+    
+    Input:    logFileName - log file written while the RRA tool ran
+              bodyList - list of body names to extract mass adjustments for
+              osimModelFileName - adjusted model file output by the RRA tool
+              
+    Output:   massAdjustments - dictionary of body names with their original and new mass
+                  
+    """
+    
+    #Check inputs
+    if logFileName is None or bodyList is None or osimModelFileName is None:
+        raise ValueError('Log filename, body list and model filename are required')
+    
+    #Read the original and new mass of each body from the log file
+    massAdjustments = readMassAdjustments(logFileName, bodyList)
+    
+    #Adjust mass in the newly created model
+    #Only the mass values change so these are edited directly in the model file
+    #Bodies that RRA didn't change the mass of are left as is
+    setBodyMasses(osimModelFileName = osimModelFileName,
+                  bodyMasses = {body: newMass for body, (origMass, newMass) in massAdjustments.items() if newMass != origMass})
+    
+    #Return the mass adjustments
+    return massAdjustments
+
+# %% Function to run inverse dynamics on RRA outputs
+
+def runRRAInverseDynamics(idToolTemplate = None, osimModelFileName = None,
+                          coordinatesFileName = None, externalLoadsFileName = None,
+                          resultsDir = None, outputName = None, setupFileName = None):
+    
+    """
+    
+    Convenience function for calculating the final residuals and joint torques from
+    the adjusted model and kinematics output by RRA using inverse dynamics. The
+    body forces file is renamed to match the generalised forces output.
+    
+    Input:    idToolTemplate - inverse dynamics tool to copy the settings from (e.g. body forces outputs)
+              osimModelFileName - adjusted model file output by RRA
+              coordinatesFileName - kinematics file output by RRA
+              externalLoadsFileName - external loads file to apply
+              resultsDir - directory to write the results to
+              outputName - prefix for the output files (i.e. outputName_id.sto and outputName_bodyForces.sto)
+              setupFileName - filename to print the tool set-up to
+              
+    Output:   None
+                  
+    """
+    
+    #Check inputs
+    if idToolTemplate is None:
+        raise ValueError('An inverse dynamics tool template is required')
+    if osimModelFileName is None or coordinatesFileName is None or externalLoadsFileName is None:
+        raise ValueError('Model, coordinates and external loads filenames are required')
+    if resultsDir is None or outputName is None or setupFileName is None:
+        raise ValueError('Results directory, output name and set-up filename are required')
+    
+    #Create the tool
+    #Copy this from the template as we can't edit the body forces part
+    idTool = osim.InverseDynamicsTool.safeDownCast(idToolTemplate.clone())
+    
+    #Set the results directory, model and files
+    idTool.setResultsDir(f'{resultsDir}/')
+    idTool.setModelFileName(osimModelFileName)
+    idTool.setExternalLoadsFileName(externalLoadsFileName)
+    idTool.setCoordinatesFileName(coordinatesFileName)
+    
+    #Set the time range from the kinematics
+    startTime, endTime = getTimeRange(coordinatesFileName)
+    idTool.setStartTime(startTime)
+    idTool.setEndTime(endTime)
+    
+    #Set the output forces file
+    idTool.setOutputGenForceFileName(f'{outputName}_id.sto')
+    
+    #Print to file and run tool
+    idTool.printToXML(setupFileName)
+    idTool.run()
+    
+    #Rename the body forces file
+    os.replace(os.path.join(resultsDir,'body_forces_at_joints.sto'),
+               os.path.join(resultsDir,f'{outputName}_bodyForces.sto'))
+
+# %% Functions to save and load run time data
+
+def saveRunTimeData(runTimeData = None, fileName = None):
+    
+    """
+    
+    Convenience function for saving a run time data dictionary. The dictionary is
+    pickled as before, with a JSON version saved alongside it that is quicker to
+    read back in and not tied to the Python version.
+    
+    Input:    runTimeData - nested dictionary of run time data to save
+              fileName - pickle filename to save to (the JSON version replaces the extension)
+              
+    Output:   None
+                  
+    """
+    
+    #Check inputs
+    if runTimeData is None or fileName is None:
+        raise ValueError('Run time data and a filename are required')
+    
+    #Save the pickle version
+    with open(fileName, 'wb') as writeFile:
+        pickle.dump(runTimeData, writeFile, protocol = pickle.HIGHEST_PROTOCOL)
+        
+    #Save the JSON version
+    with open(os.path.splitext(fileName)[0]+'.json', 'w') as writeFile:
+        json.dump(runTimeData, writeFile)
+        
+def loadRunTimeData(fileName = None):
+    
+    """
+    
+    Convenience function for loading a run time data dictionary. The JSON version
+    is read if it is available and at least as new as the pickle version, otherwise
+    the pickle version is used.
+    
+    Input:    fileName - pickle filename the data was saved to
+              
+    Output:   runTimeData - nested dictionary of run time data
+                  
+    """
+    
+    #Check inputs
+    if fileName is None:
+        raise ValueError('Filename for run time data is required')
+    
+    #Load the JSON version if present and up to date, otherwise fall back to the pickle
+    #This avoids a stale JSON version being used if the pickle has been rewritten
+    jsonFileName = os.path.splitext(fileName)[0]+'.json'
+    if os.path.exists(jsonFileName) and (not os.path.exists(fileName) or os.path.getmtime(jsonFileName) >= os.path.getmtime(fileName)):
+        with open(jsonFileName, 'r') as openFile:
+            runTimeData = json.load(openFile)
+    else:
+        with open(fileName, 'rb') as openFile:
+            runTimeData = pickle.load(openFile)
+            
+    #Return the data
+    return runTimeData
+
+# %% Function to hash a set of input files
+
+def hashFiles(fileNames = None, extraText = ''):
+    
+    """
+    
+    Convenience function for creating a short hash of the contents of a set of
+    files (and any extra settings text). This can be used to check whether a
+    processed output is still valid for its inputs.
+    
+    Input:    fileNames - list of files to include in the hash
+              extraText - optional text (e.g. settings) to include in the hash
+              
+    Output:   fileHash - hexadecimal string of the hash
+                  
+    """
+    
+    #Check inputs
+    if fileNames is None:
+        raise ValueError('A list of filenames is required')
+    
+    #Hash the contents of each file along with the extra text
+    hasher = hashlib.blake2b(digest_size = 8)
+    for fileName in fileNames:
+        with open(fileName, 'rb') as openFile:
+            hasher.update(openFile.read())
+    hasher.update(extraText.encode())
+    
+    #Return the hash
+    return hasher.hexdigest()
+
+# %% Function to link or copy a file into a working directory
+
+def linkOrCopyFile(srcFileName = None, dstFileName = None):
+    
+    """
+    
+    Convenience function for providing a local version of a file in a working
+    directory. A hard link is used where possible so the data isn't duplicated,
+    with the file copied across when links aren't supported (e.g. across drives).
+    
+    Input:    srcFileName - original file to link to or copy
+              dstFileName - filename for the local version of the file
+              
+    Output:   None
+                  
+    """
+    
+    #Check inputs
+    if srcFileName is None or dstFileName is None:
+        raise ValueError('Source and destination filenames are required')
+    
+    #Remove any existing version of the file as links can't overwrite
+    if os.path.exists(dstFileName):
+        os.remove(dstFileName)
+    
+    #Link the file, or copy it across if this fails
+    try:
+        os.link(srcFileName, dstFileName)
+    except (OSError, AttributeError):
+        shutil.copyfile(srcFileName, dstFileName)
+
+# %% Function to create the RRA actuator force set
+
+def createRRAForceSet(osimModel = None,
+                      forceSetName = None,
+                      optForces = None,
+                      controlLimits = None,
+                      residualActuators = None):
+    
+    """
+    
+    Convenience function for creating the set of actuators used in RRA. The
+    residual actuators are created as point or torque actuators on the pelvis
+    based on their specification, while all other coordinates get a coordinate
+    actuator.
+    
+    Input:    osimModel - OpenSim model object the actuators are for
+              forceSetName - name to give the force set
+              optForces - dict of coordinates and their associated optimal forces to add
+              controlLimits - dict of coordinates and their associated max/min control limits to add
+              residualActuators - dict of residual coordinates and their (type, name, body, direction) where type is 'point' or 'torque'
+              
+    Output:   rraForceSet - force set with the RRA actuators
+                  
+    """
+    
+    #Check inputs
+    if osimModel is None or optForces is None or controlLimits is None or residualActuators is None:
+        raise ValueError('Model, optimal forces, control limits and residual actuators are required!')
+    
+    #Create and set name
+    rraForceSet = osim.ForceSet()
+    if forceSetName is not None:
+        rraForceSet.setName(forceSetName)
+    
+    #Loop through coordinates and append to force set
+    for coordinate in optForces.keys():
+        
+        #Get the actuator specification for the coordinate
+        #Anything that isn't a residual gets a coordinate actuator
+        actuatorType, actuatorName, actuatorBody, actuatorDirection = residualActuators.get(coordinate, ('coordinate', coordinate, None, None))
+        
+        #Create the actuator of the specified type
+        if actuatorType == 'point':
+            #Create the point actuator on the body, acting globally at its mass center
+            actu = osim.PointActuator()
+            actu.set_body(actuatorBody)
+            actu.set_direction(osim.Vec3(*actuatorDirection))
+            actu.set_point_is_global(True)
+            actu.set_point(osimModel.getBodySet().get(actuatorBody).get_mass_center())
+        elif actuatorType == 'torque':
+            #Create the torque actuator on the body relative to the ground, acting globally
+            actu = osim.TorqueActuator()
+            actu.set_bodyA(actuatorBody)
+            actu.set_bodyB('ground')
+            actu.set_axis(osim.Vec3(*actuatorDirection))
+            actu.set_torque_is_global(True)
+        else:
+            #Create the coordinate actuator
+            actu = osim.CoordinateActuator()
+            actu.set_coordinate(coordinate)
+        
+        #Set name
+        actu.setName(actuatorName)
+        #Set min and max control
+        actu.set_min_control(controlLimits[coordinate]*-1)
+        actu.set_max_control(controlLimits[coordinate])
+        #Set optimal force
+        actu.set_optimal_force(optForces[coordinate])
+        #Clone and append to force set
+        rraForceSet.cloneAndAppend(actu)
+    
+    #Return force set
+    return rraForceSet
+
+# %% Function to create the RRA task set
+
+def createRRATaskSet(taskSetName = None, taskWeights = None, kp = 100, kv = 20):
+    
+    """
+    
+    Convenience function for creating the set of coordinate tracking tasks used
+    in RRA. The settings common to all tasks are set once on a template task that
+    is then cloned for each coordinate.
+    
+    Input:    taskSetName - name to give the task set
+              taskWeights - dictionary of coordinate names and their tracking weights
+              kp - position gain for the tasks (defaults to 100)
+              kv - velocity gain for the tasks (defaults to 20)
+              
+    Output:   rraTaskSet - CMC_TaskSet object containing the tasks
+                  
+    """
+    
+    #Check inputs
+    if taskSetName is None or taskWeights is None:
+        raise ValueError('A task set name and dictionary of task weights are required')
+    
+    #Create and set name
+    rraTaskSet = osim.CMC_TaskSet()
+    rraTaskSet.setName(taskSetName)
+    
+    #Create the template task with the common settings
+    cmcTask = osim.CMC_Joint()
+    cmcTask.setActive(True, False, False)
+    cmcTask.setKP(kp)
+    cmcTask.setKV(kv)
+    
+    #Loop through coordinates and append to task set
+    for task, taskWeight in taskWeights.items():
+        
+        #Set the name, weight and coordinate for the task
+        cmcTask.setName(task)
+        cmcTask.setWeight(taskWeight)
+        cmcTask.setCoordinateName(task)
+        
+        #Clone and append to task set
+        rraTaskSet.cloneAndAppend(cmcTask)
+        
+    #Return the task set
+    return rraTaskSet
+
 # %% Function to convert IK coordinates to states
 
 def kinematicsToStates(kinematicsFileName = None, osimModelFileName = None,
@@ -41,11 +41,8 @@ import pickle
 import numpy as np
 import time
 import re
-import shutil
-from scipy.interpolate import interp1d
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import warnings
 warnings.simplefilter(action = 'ignore', category = FutureWarning)
 
@@ -57,14 +54,23 @@ The options in this code block can be modified to re-run
 
 """
 
+#Check whether this script is being imported in a worker process
+#The worker processes (for RRA cycles, subject simulations or compiling subjects)
+#can re-import this script when they start. When this happens all of the process,
+#compile and analysis flags below are switched off so nothing is re-run from within
+#those workers, and the data and plotting packages aren't imported. The subject
+#simulation and compiling workers import the packages they need when they are started.
+isWorker = __name__ != '__main__'
+
 #Add OpenSim geometry path
 #Can be helpful with running into any issues around geometry path
 #Set this to OpenSim install directory
 #### NOTE: change geometry path to OpenSim install directory
 geomDir = os.path.join('C:', os.sep, 'OpenSim 4.3', 'Geometry')
 osim.ModelVisualizer.addDirToGeometrySearchPaths(geomDir)
-print(f'***** OpenSim Geometry installation directory set at {geomDir} *****')
-print('***** Please change the geomDir variable in runSimulations.py if incorrect *****')
+if not isWorker:
+    print(f'***** OpenSim Geometry installation directory set at {geomDir} *****')
+    print('***** Please change the geomDir variable in runSimulations.py if incorrect *****')
 
 ##### SETTINGS FOR RUNNING THE DESIRED ANALYSES #####
 
@@ -77,11 +83,31 @@ runRRA3 = False
 runMoco = False
 runAddBiomech = False
 
+#Settings for running the RRA gait cycles in parallel
+#The gait cycles are independent of one another so the RRA tools for each cycle
+#can be run across separate worker processes. Set this to 1 to run the cycles
+#one after the other in the current process.
+nCycleWorkers = 3
+
+#Setting for reloading the RRA tools from their set-up files before running
+#For some reason RRA works better when the tool is reloaded, so this is the default.
+#If set to False, the tool for each cycle is run directly after its set-up file
+#is written (avoiding re-reading the file), and the cycles are run one at a time.
+reloadRRATool = True
+
+#Settings for running the subjects simulations in parallel
+#Each subject's simulations are run in their own directories, so the subjects can
+#be run across separate worker processes. Worker processes can't start their own
+#workers, so when this is above 1 the RRA cycles for each subject are run one after
+#the other. Moco also already makes use of multiple threads, so this is set to 1 by
+#default to run the subjects one after the other.
+nSimulationWorkers = 1
+
 #Print out some info/warnings for certain things
-if runMoco:
+if runMoco and not isWorker:
     print('***** You have selected to re-run the Moco analyses. *****')
     print('***** These analyses take some time, so prepare to be here for a while... *****')
-if runAddBiomech:
+if runAddBiomech and not isWorker:
     print('***** Note that the AddBiomechanics processing code only does not run these analyses. *****')
     print('***** Instead, the data is set-up in the subjects AddBiomechanics folder. *****')
     print('***** To re-run these analyses, you can re-upload the data files to the AddBiomechanics server. *****')
@@ -105,6 +131,23 @@ readAndCheckKinetics = True
 readAndCheckResiduals = True
 readAndCheckGroundReactions = True #AddBiomechanics only
 
+#Resolution for the check figures created for each subject when compiling the data
+#These are mostly thin individual cycle lines so a lower resolution than the group
+#figures is used to speed up rendering. This can be increased for higher quality images.
+checkFigureDpi = 150
+
+#Setting for whether to re-compile data that has already been saved to file
+#When set to False, any of the above steps where the subject's final output file
+#already exists will be skipped. This is useful when only some subjects or steps
+#need to be compiled again (e.g. after deleting their outputs).
+overwriteCompiledData = True
+
+#Setting for compiling the subjects in parallel
+#Each subject's data is read and saved separately, so the subjects can be compiled
+#across separate worker processes. Set this to 1 to compile the subjects one after
+#the other in the current process.
+nSubjectWorkers = 4
+
 ##### SETTINGS FOR ANALYSING THE SIMULATION DATA #####
 
 #When set to True, the script will take the collated data from each of the simulation
@@ -113,26 +156,80 @@ readAndCheckGroundReactions = True #AddBiomechanics only
 #be done again if the simulation results are re-run or changed.
 analyseData = False
 
+#Make sure none of the processes or analyses are re-run from within worker processes
+if isWorker:
+    runRRA = runRRA3 = runMoco = runAddBiomech = False
+    compileData = analyseData = False
+
 # %% Settings and global variables
 
-#Set matplotlib parameters
-from matplotlib import rcParams
-# rcParams['font.family'] = 'sans-serif'
-rcParams['font.sans-serif'] = 'Arial'
-rcParams['font.weight'] = 'bold'
-rcParams['axes.labelsize'] = 12
-rcParams['axes.titlesize'] = 16
-rcParams['axes.linewidth'] = 1.5
-rcParams['axes.labelweight'] = 'bold'
-rcParams['legend.fontsize'] = 10
-rcParams['xtick.major.width'] = 1.5
-rcParams['ytick.major.width'] = 1.5
-rcParams['legend.framealpha'] = 0.0
-rcParams['savefig.dpi'] = 300
-rcParams['savefig.format'] = 'pdf'
+def importPackages(dataPackages = False, plotPackages = False, savePlotsOnly = True):
+    
+    """
+    
+    Imports the data and plotting packages for the selected processes as globals.
+    This is kept as a function so that it can also be used to set-up worker processes,
+    as these packages aren't imported when the script is imported in a worker.
+    
+    Input:    dataPackages - whether to import pandas (RRA mass adjustments and compiling data)
+              plotPackages - whether to import and set-up matplotlib (compiling and analysing data)
+              savePlotsOnly - whether figures are only saved to file (uses a non-interactive backend)
+    
+    Output:   None - the packages are added to the scripts globals
+    
+    """
+    
+    global pd, plt, LineCollection
+    
+    #Import pandas
+    if dataPackages:
+        import pandas as pd
+    
+    #Import and set-up matplotlib
+    if plotPackages:
+        import matplotlib
+        #Use a non-interactive backend when figures are saved straight to file and closed
+        if savePlotsOnly:
+            matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        from matplotlib.collections import LineCollection
+        
+        #Set matplotlib parameters
+        from matplotlib import rcParams
+        # rcParams['font.family'] = 'sans-serif'
+        rcParams['font.sans-serif'] = 'Arial'
+        rcParams['font.weight'] = 'bold'
+        rcParams['axes.labelsize'] = 12
+        rcParams['axes.titlesize'] = 16
+        rcParams['axes.linewidth'] = 1.5
+        rcParams['axes.labelweight'] = 'bold'
+        rcParams['legend.fontsize'] = 10
+        rcParams['xtick.major.width'] = 1.5
+        rcParams['ytick.major.width'] = 1.5
+        rcParams['legend.framealpha'] = 0.0
+        rcParams['savefig.dpi'] = 300
+        rcParams['savefig.format'] = 'pdf'
+
+#Import the data and plotting packages only when the selected processes need them
+#Pandas is used to store RRA mass adjustments and read in data when compiling
+#Figures are only shown when analysing the data, otherwise they are saved straight to file
+importPackages(dataPackages = runRRA or compileData or analyseData,
+               plotPackages = compileData or analyseData,
+               savePlotsOnly = not analyseData)
+if analyseData:
+    import seaborn as sns
 
 #Get home path
-homeDir = os.getcwd()
+#This is taken from the location of this script rather than the working directory,
+#as worker processes can be started while the tools are working in subject folders
+homeDir = os.path.dirname(os.path.abspath(__file__))
+
+#Set absolute paths to the data, tools and group results directories
+#These are used so the subject folders and group outputs can be found regardless
+#of the directory the script is run from or the tools are currently working in
+dataDir = os.path.abspath(os.path.join(homeDir,'..','..','data','HamnerDelp2013'))
+toolsDir = os.path.abspath(os.path.join(homeDir,'..','..','tools'))
+resultsDir = os.path.abspath(os.path.join(homeDir,'..','..','results','HamnerDelpDataset'))
 
 #Set subject list
 subList = ['subject01',
@@ -163,61 +260,63 @@ cycleList = ['cycle1',
              'cycle2',
              'cycle3']
     
-#Create a dictionary of the coordinate tasks originally used in Hamner & Delp
-rraTasks = {'pelvis_tx': 2.5e1, 'pelvis_ty': 1.0e2, 'pelvis_tz': 2.5e1,
-            'pelvis_tilt': 7.5e2, 'pelvis_list': 2.5e2, 'pelvis_rotation': 5.0e1,
-            'hip_flexion_r': 7.5e1, 'hip_adduction_r': 5.0e1, 'hip_rotation_r': 1.0e1,
-            'knee_angle_r': 1.0e1, 'ankle_angle_r': 1.0e1,
-            'hip_flexion_l': 7.5e1, 'hip_adduction_l': 5.0e1, 'hip_rotation_l': 1.0e1,
-            'knee_angle_l': 1.0e1, 'ankle_angle_l': 1.0e1,
-            'lumbar_extension': 7.5e1, 'lumbar_bending': 5.0e1, 'lumbar_rotation': 2.5e1,
-            'arm_flex_r': 1.0e0, 'arm_add_r': 1.0e0, 'arm_rot_r': 1.0e0,
-            'elbow_flex_r': 1.0e0, 'pro_sup_r': 1.0e0,
-            'arm_flex_l': 1.0e0, 'arm_add_l': 1.0e0, 'arm_rot_l': 1.0e0,
-            'elbow_flex_l': 1.0e0, 'pro_sup_l': 1.0e0
-            }
+#Create a table of the coordinate settings originally used in Hamner & Delp
+#Each coordinate has one row containing, in order, the RRA task weight, the optimal
+#force for the actuator, the actuator control limit and the kinematic boundary
+#limit (+/- to max and min). The boundary limits are in metres for the pelvis
+#translations and in degrees for the rotational coordinates.
+coordinateSettings = {
+                      'pelvis_tx'       : (2.5e1, 1, 10000, 0.2),
+                      'pelvis_ty'       : (1.0e2, 1, 10000, 0.1),
+                      'pelvis_tz'       : (2.5e1, 1, 10000, 0.2),
+                      'pelvis_tilt'     : (7.5e2, 1, 10000, 10),
+                      'pelvis_list'     : (2.5e2, 1, 10000, 10),
+                      'pelvis_rotation' : (5.0e1, 1, 10000, 10),
+                      'hip_flexion_r'   : (7.5e1, 1000, 1, 10),
+                      'hip_adduction_r' : (5.0e1, 1000, 1, 5),
+                      'hip_rotation_r'  : (1.0e1, 1000, 1, 5),
+                      'knee_angle_r'    : (1.0e1, 1000, 1, 15),
+                      'ankle_angle_r'   : (1.0e1, 1000, 1, 10),
+                      'hip_flexion_l'   : (7.5e1, 1000, 1, 10),
+                      'hip_adduction_l' : (5.0e1, 1000, 1, 5),
+                      'hip_rotation_l'  : (1.0e1, 1000, 1, 5),
+                      'knee_angle_l'    : (1.0e1, 1000, 1, 15),
+                      'ankle_angle_l'   : (1.0e1, 1000, 1, 10),
+                      'lumbar_extension': (7.5e1, 1000, 1, 10),
+                      'lumbar_bending'  : (5.0e1, 1000, 1, 5),
+                      'lumbar_rotation' : (2.5e1, 1000, 1, 5),
+                      'arm_flex_r'      : (1.0e0, 500, 1, 5),
+                      'arm_add_r'       : (1.0e0, 500, 1, 5),
+                      'arm_rot_r'       : (1.0e0, 500, 1, 5),
+                      'elbow_flex_r'    : (1.0e0, 500, 1, 10),
+                      'pro_sup_r'       : (1.0e0, 500, 1, 5),
+                      'arm_flex_l'      : (1.0e0, 500, 1, 5),
+                      'arm_add_l'       : (1.0e0, 500, 1, 5),
+                      'arm_rot_l'       : (1.0e0, 500, 1, 5),
+                      'elbow_flex_l'    : (1.0e0, 500, 1, 10),
+                      'pro_sup_l'       : (1.0e0, 500, 1, 5)
+                      }
 
-#Create a dictionary of the optimal forces for actuators used in Hamner & Delp
-rraActuators = {'pelvis_tx': 1, 'pelvis_ty': 1, 'pelvis_tz': 1,
-                'pelvis_tilt': 1, 'pelvis_list': 1, 'pelvis_rotation': 1,
-                'hip_flexion_r': 1000, 'hip_adduction_r': 1000, 'hip_rotation_r': 1000,
-                'knee_angle_r': 1000, 'ankle_angle_r': 1000,
-                'hip_flexion_l': 1000, 'hip_adduction_l': 1000, 'hip_rotation_l': 1000,
-                'knee_angle_l': 1000, 'ankle_angle_l': 1000,
-                'lumbar_extension': 1000, 'lumbar_bending': 1000, 'lumbar_rotation': 1000,
-                'arm_flex_r': 500, 'arm_add_r': 500, 'arm_rot_r': 500,
-                'elbow_flex_r': 500, 'pro_sup_r': 500,
-                'arm_flex_l': 500, 'arm_add_l': 500, 'arm_rot_l': 500,
-                'elbow_flex_l': 500, 'pro_sup_l': 500
-                }
+#Extract the individual coordinate setting dictionaries from the table
+rraTasks = {coord: settings[0] for coord, settings in coordinateSettings.items()}
+rraActuators = {coord: settings[1] for coord, settings in coordinateSettings.items()}
+rraLimits = {coord: settings[2] for coord, settings in coordinateSettings.items()}
+kinematicLimits = {coord: settings[3] for coord, settings in coordinateSettings.items()}
 
-#Create a dictionary for actuator limits used in Hamner & Delp
-rraLimits = {'pelvis_tx': 10000, 'pelvis_ty': 10000, 'pelvis_tz': 10000,
-             'pelvis_tilt': 10000, 'pelvis_list': 10000, 'pelvis_rotation': 10000,
-             'hip_flexion_r': 1, 'hip_adduction_r': 1, 'hip_rotation_r': 1,
-             'knee_angle_r': 1, 'ankle_angle_r': 1,
-             'hip_flexion_l': 1, 'hip_adduction_l': 1, 'hip_rotation_l': 1,
-             'knee_angle_l': 1, 'ankle_angle_l': 1,
-             'lumbar_extension': 1, 'lumbar_bending': 1, 'lumbar_rotation': 1,
-             'arm_flex_r': 1, 'arm_add_r': 1, 'arm_rot_r': 1,
-             'elbow_flex_r': 1, 'pro_sup_r': 1,
-             'arm_flex_l': 1, 'arm_add_l': 1, 'arm_rot_l': 1,
-             'elbow_flex_l': 1, 'pro_sup_l': 1
-             }
+#Convert the rotational kinematic boundary limits to radians together
+rotationalCoords = [coord for coord in kinematicLimits.keys() if coord not in ['pelvis_tx','pelvis_ty','pelvis_tz']]
+kinematicLimits.update(zip(rotationalCoords, np.deg2rad([kinematicLimits[coord] for coord in rotationalCoords]).tolist()))
 
-#Create a dictionary for kinematic boundary limits (+/- to max and min)
-kinematicLimits = {'pelvis_tx': 0.2, 'pelvis_ty': 0.1, 'pelvis_tz': 0.2,
-                   'pelvis_tilt': np.deg2rad(10), 'pelvis_list': np.deg2rad(10), 'pelvis_rotation': np.deg2rad(10),
-                   'hip_flexion_r': np.deg2rad(10), 'hip_adduction_r': np.deg2rad(5), 'hip_rotation_r': np.deg2rad(5),
-                   'knee_angle_r': np.deg2rad(15), 'ankle_angle_r': np.deg2rad(10),
-                   'hip_flexion_l': np.deg2rad(10), 'hip_adduction_l': np.deg2rad(5), 'hip_rotation_l': np.deg2rad(5),
-                   'knee_angle_l': np.deg2rad(15), 'ankle_angle_l': np.deg2rad(10),
-                   'lumbar_extension': np.deg2rad(10), 'lumbar_bending': np.deg2rad(5), 'lumbar_rotation': np.deg2rad(5),
-                   'arm_flex_r': np.deg2rad(5), 'arm_add_r': np.deg2rad(5), 'arm_rot_r': np.deg2rad(5),
-                   'elbow_flex_r': np.deg2rad(10), 'pro_sup_r': np.deg2rad(5),
-                   'arm_flex_l': np.deg2rad(5), 'arm_add_l': np.deg2rad(5), 'arm_rot_l': np.deg2rad(5),
-                   'elbow_flex_l': np.deg2rad(10), 'pro_sup_l': np.deg2rad(5)
-                   }
+#Create a dictionary of the residual actuators used in RRA
+#Each residual coordinate has the actuator type, name, body and direction/axis
+#All other coordinates in the settings table are given a coordinate actuator
+rraResidualActuators = {'pelvis_tx': ('point', 'FX', 'pelvis', (1,0,0)),
+                        'pelvis_ty': ('point', 'FY', 'pelvis', (0,1,0)),
+                        'pelvis_tz': ('point', 'FZ', 'pelvis', (0,0,1)),
+                        'pelvis_list': ('torque', 'MX', 'pelvis', (1,0,0)),
+                        'pelvis_rotation': ('torque', 'MY', 'pelvis', (0,1,0)),
+                        'pelvis_tilt': ('torque', 'MZ', 'pelvis', (0,0,1))
+                        }
 
 #Create a list of markers to set as fixed in the generic model
 fixedMarkers = ['RACR', 'LACR', 'C7', 'CLAV', 'RSJC', 'RLEL', 'RMEL',
@@ -352,6 +451,9 @@ residualAx = {'FX': [0,0], 'FY': [0,1], 'FZ': [0,2], 'F': [0,3],
               'MX': [1,0], 'MY': [1,1], 'MZ': [1,2], 'M': [1,3]
                }
 
+#Set the normalised gait cycle points (0-100%) used for plotting
+gaitCyclePoints = np.linspace(0,100,101)
+
 #Set colours for plots
 ikCol = '#000000' #IK = black
 rraCol = '#e569ce' #RRA = purple
@@ -365,6 +467,16 @@ colDict = {'ik': '#000000', 'rra': '#e569ce', 'rra3': '#ff6876', 'moco': '#4885e
 #Set markers for plot in dictionary format for certain approaches
 markerDict = {'rra': 'o', 'rra3': 'h', 'moco': 's', 'addBiomech': 'd'}
 
+#Set line styles for plotting individual cycle and mean curves for each approach
+#These are unpacked into the collection and plot calls so they only need to be created once
+#Individual cycles share a style other than colour, and are rasterized as thin faded lines
+cycleCollectionStyle = {'linestyles': '-', 'linewidths': 0.5, 'alpha': 0.4, 'zorder': 2, 'rasterized': True}
+meanLineStyles = {'ik': {'ls': '-', 'lw': 1, 'c': ikCol, 'alpha': 1.0, 'zorder': 3},
+                  'rra': {'ls': '-', 'lw': 1, 'c': rraCol, 'marker': markerDict['rra'], 'markevery': 5, 'markersize': 3, 'alpha': 1.0, 'zorder': 3},
+                  'rra3': {'ls': ':', 'lw': 1, 'c': rra3Col, 'marker': markerDict['rra3'], 'markevery': 5, 'markersize': 3, 'alpha': 1.0, 'zorder': 3},
+                  'moco': {'ls': '--', 'lw': 1, 'c': mocoCol, 'marker': markerDict['moco'], 'markevery': 5, 'markersize': 3, 'alpha': 1.0, 'zorder': 3},
+                  'addBiomech': {'ls': '--', 'lw': 1, 'c': addBiomechCol, 'marker': markerDict['addBiomech'], 'markevery': 5, 'markersize': 3, 'alpha': 1.0, 'zorder': 3}}
+
 #Set HEX as RGB colours (https://www.rapidtables.com/convert/color/hex-to-rgb.html)
 #These are only used as osim Vec3 objects so they can be set that way here
 ikColRGB = osim.Vec3(0,0,0) #IK = black
@@ -375,7 +487,24 @@ addBiomechColRGB = osim.Vec3(1,0.6509803921568628,0) #AddBiomechanics = gold
 
 # %% Loop through subject list
 
-for subject in subList:
+def runSubjectSimulations(subject, runRRA, runRRA3, runMoco, runAddBiomech, nCycleWorkers):
+    
+    """
+    
+    Runs the selected simulation processes for a subject. This is kept as a function
+    so that subjects can be run across worker processes. The process flags are passed
+    in as these are switched off when the script is imported in a worker process.
+    
+    Input:    subject - subject ID to run simulations for
+              runRRA - whether to run the standard RRA process
+              runRRA3 - whether to run the iterative RRA process
+              runMoco - whether to run the Moco tracking process
+              runAddBiomech - whether to set-up the AddBiomechanics data
+              nCycleWorkers - number of worker processes to run the RRA gait cycles in
+    
+    Output:   None - the simulation results are saved to the subjects process folders
+    
+    """
     
     # %% Set-up for individual subject
     
@@ -391,45 +520,35 @@ for subject in subList:
     if runMoco:
         mocoRunTimeData = {run: {cyc: {'mocoRunTime': [], 'nIters': [], 'solved': []} for cyc in cycleList} for run in runList}
     
+    #Set the subjects data directory
+    #Shared model, experimental and IK inputs are referred to from here with absolute
+    #paths so the tools aren't reliant on where they sit relative to these
+    subjectDir = os.path.join(dataDir,subject)
+    
     #Load in the subjects gait timing data
-    with open(os.path.join('..','..','data','HamnerDelp2013',subject,'expData','gaitTimes.pkl'), 'rb') as openFile:
+    with open(os.path.join(subjectDir,'expData','gaitTimes.pkl'), 'rb') as openFile:
         gaitTimings = pickle.load(openFile)
         
-    #Create an RRA directory in the subjects folder
-    if runRRA:
-        os.makedirs(os.path.join('..','..','data','HamnerDelp2013',subject,'rra'),
-                    exist_ok = True)        
-        #Create run trial specific directory as well
-        #Note this is currently just run5
-        os.makedirs(os.path.join('..','..','data','HamnerDelp2013',subject,'rra',runLabel),
-                    exist_ok = True)         
-        
-    #Create an RRA3 directory in the subjects folder
-    if runRRA3:
-        os.makedirs(os.path.join('..','..','data','HamnerDelp2013',subject,'rra3'),
-                    exist_ok = True)            
-        #Create run trial specific directory as well
-        #Note this is currently just run5
-        os.makedirs(os.path.join('..','..','data','HamnerDelp2013',subject,'rra3',runLabel),
-                    exist_ok = True)  
-        
-    #Create a Moco directory in the subjects folder
-    if runMoco:
-        os.makedirs(os.path.join('..','..','data','HamnerDelp2013',subject,'moco'),
-                    exist_ok = True)        
-        #Create run trial specific directory as well
-        #Note this is currently just run5
-        os.makedirs(os.path.join('..','..','data','HamnerDelp2013',subject,'moco',runLabel),
-                    exist_ok = True) 
-            
-    #Create an AddBiomechanics directory in the subjects folder
-    if runAddBiomech:
-        os.makedirs(os.path.join('..','..','data','HamnerDelp2013',subject,'addBiomechanics'),
-                    exist_ok = True)        
-        #Create run trial specific directory as well
-        #Note this is currently just run5
-        os.makedirs(os.path.join('..','..','data','HamnerDelp2013',subject,'addBiomechanics',runLabel),
-                    exist_ok = True)
+    #Load the blank inverse dynamics set-up once as a template for the RRA processes
+    #Generate this from the blank set-up file as we can't edit the body forces part
+    #A copy of this is taken for each cycle rather than re-reading the file
+    if runRRA or runRRA3:
+        idToolTemplate = osim.InverseDynamicsTool(os.path.join(toolsDir,'blank_id_setup.xml'))
+        
+    #Load the subject model once to refer to body parameters in the RRA processes
+    #The body names are taken from the loaded model rather than reading the file again
+    if runRRA or runRRA3:
+        osimModel = osim.Model(os.path.join(subjectDir,'model',f'{subject}_adjusted_scaled.osim'))
+        bodyList = helper.getBodyNames(osimModel)
+        
+    #Create the directories for the selected processes in the subjects folder
+    #The run trial specific directory is created along with the process directory
+    #Note this is currently just run5
+    for processDir, runProcess in zip(['rra','rra3','moco','addBiomechanics'],
+                                      [runRRA, runRRA3, runMoco, runAddBiomech]):
+        if runProcess:
+            os.makedirs(os.path.join(subjectDir,processDir,runLabel),
+                        exist_ok = True)
         
     # %% Check for running RRA process
     
@@ -438,133 +557,32 @@ for subject in subList:
         # %% Set-up for RRA
         
         #Change to rra directory for ease of use with tools
-        os.chdir(os.path.join('..','..','data','HamnerDelp2013',subject,'rra',runLabel))
+        os.chdir(os.path.join(subjectDir,'rra',runLabel))
         
         #Add in opensim logger
         osim.Logger.removeFileSink()
         osim.Logger.addFileSink('rraLog.log')
         
-        #Load the subject model to refer to body parameters
-        osimModel = osim.Model(os.path.join('..','..','model',f'{subject}_adjusted_scaled.osim'))
-    
-        #Create dictionary to store mass adjustments
-        bodyList = [osimModel.updBodySet().get(ii).getName() for ii in range(osimModel.updBodySet().getSize())]
-        massAdjustmentData = {run: {cyc: {body: {'origMass': [], 'newMass': [], 'massChange': []} for body in bodyList} for cyc in cycleList} for run in runList}
+        #Create list to store mass adjustments
+        #Each row has the run, cycle and body along with the mass values, and these
+        #are converted to a dataframe once all cycles are done
+        massAdjustmentRows = []
         
         #Create the RRA actuators file
+        rraForceSet = helper.createRRAForceSet(osimModel = osimModel,
+                                               forceSetName = f'{subject}_{runLabel}_RRA_Actuators',
+                                               optForces = rraActuators,
+                                               controlLimits = rraLimits,
+                                               residualActuators = rraResidualActuators)
         
-        #Create and set name
-        rraForceSet = osim.ForceSet()
-        rraForceSet.setName(f'{subject}_{runLabel}_RRA_Actuators')
-        
-        #Loop through coordinates and append to force set
-        for actuator in rraActuators.keys():
-            
-            #Create the actuator. First we must check if point, torque or coordinate
-            #actuators are required depending on the coordinate
-            
-            #Check for point actuator
-            if actuator in ['pelvis_tx', 'pelvis_ty', 'pelvis_tz']:            
-                #Create the point actuator
-                pointActuator = osim.PointActuator()            
-                #Set the name to the residual coordinate
-                pointActuator.setName(f'F{actuator[-1].capitalize()}')            
-                #Set the max and min controls to those provided
-                pointActuator.set_min_control(rraLimits[actuator]*-1)
-                pointActuator.set_max_control(rraLimits[actuator])
-                #Set the force body as the pelvis
-                pointActuator.set_body('pelvis')
-                #Set the direction
-                pointActuator.set_direction(osim.Vec3(
-                    (np.array([actuator[-1] == ii for ii in ['x','y','z']], dtype = int)[0],
-                     np.array([actuator[-1] == ii for ii in ['x','y','z']], dtype = int)[1],
-                     np.array([actuator[-1] == ii for ii in ['x','y','z']], dtype = int)[2])
-                    ))            
-                #Set force to be global
-                pointActuator.set_point_is_global(True)
-                #Set the point from the model
-                pointActuator.set_point(osimModel.updBodySet().get('pelvis').get_mass_center())
-                #Set optimal force
-                pointActuator.set_optimal_force(rraActuators[actuator])
-                #Clone and append to force set
-                rraForceSet.cloneAndAppend(pointActuator)
-                
-            #Check for torque actuator
-            elif actuator in ['pelvis_list', 'pelvis_rotation', 'pelvis_tilt']:
-                #Create a torque actuator
-                torqueActuator = osim.TorqueActuator()
-                #Set the name to the residual coordinate            
-                torqueActuator.setName(f'M{[x for i, x in enumerate(["X","Y","Z"]) if [actuator == ii for ii in ["pelvis_list", "pelvis_rotation", "pelvis_tilt"]][i]][0]}')
-                #Set the max and min controls to those provided
-                torqueActuator.set_min_control(rraLimits[actuator]*-1)
-                torqueActuator.set_max_control(rraLimits[actuator])
-                #Set the torque to act on the pelvis relative to the ground
-                torqueActuator.set_bodyA('pelvis')
-                torqueActuator.set_bodyB('ground')
-                #Set the axis
-                torqueActuator.set_axis(osim.Vec3(
-                    (np.array([actuator == ii for ii in ['pelvis_list', 'pelvis_rotation', 'pelvis_tilt']], dtype = int)[0],
-                     np.array([actuator == ii for ii in ['pelvis_list', 'pelvis_rotation', 'pelvis_tilt']], dtype = int)[1],
-                     np.array([actuator == ii for ii in ['pelvis_list', 'pelvis_rotation', 'pelvis_tilt']], dtype = int)[2])
-                    ))
-                #Set torque to be global
-                torqueActuator.set_torque_is_global(True)
-                #Set optimal force
-                torqueActuator.set_optimal_force(rraActuators[actuator])
-                #Clone and append to force set
-                rraForceSet.cloneAndAppend(torqueActuator)
-                
-            #Remaining should be coordinate actuators
-            else:
-                #Create a coordinate actuator
-                coordActuator = osim.CoordinateActuator()
-                #Set name to coordinate
-                coordActuator.setName(actuator)
-                #Set coordinate
-                coordActuator.set_coordinate(actuator)
-                #Set min and max control to those provided
-                coordActuator.set_min_control(rraLimits[actuator]*-1)
-                coordActuator.set_max_control(rraLimits[actuator])
-                #Set optimal force
-                coordActuator.set_optimal_force(rraActuators[actuator])
-                #Clone and append to force set
-                rraForceSet.cloneAndAppend(coordActuator)
-                
         #Print the force set to file
         rraForceSet.printToXML(f'{subject}_{runLabel}_RRA_Actuators.xml')
         
         #Create the RRA tasks file
-        
-        #Create and set name
-        rraTaskSet = osim.CMC_TaskSet()
-        rraTaskSet.setName(f'{subject}_{runLabel}_RRA_Tasks')
-        
-        #Loop through coordinates and append to force set
-        for task in rraTasks.keys():
-            
-            #Create the task
-            cmcTask = osim.CMC_Joint()
-            
-            #Set the name to the coordinate
-            cmcTask.setName(task)
-            
-            #Set task weight
-            cmcTask.setWeight(rraTasks[task])
-            
-            #Set active parameters
-            cmcTask.setActive(True, False, False)
-            
-            #Set kp and kv
-            cmcTask.setKP(100)
-            cmcTask.setKV(20)
-            
-            #Set coordinate
-            cmcTask.setCoordinateName(task)
-            
-            #Clone and append to task set
-            rraTaskSet.cloneAndAppend(cmcTask)
+        rraTaskSet = helper.createRRATaskSet(taskSetName = f'{subject}_{runLabel}_RRA_Tasks',
+                                             taskWeights = rraTasks)
                 
-        #Print the force set to file
+        #Print the task set to file
         rraTaskSet.printToXML(f'{subject}_{runLabel}_RRA_Tasks.xml')
     
         # %% Run the standard RRA
@@ -575,7 +593,7 @@ for subject in subList:
         #Set the generic elements in the tool
         
         #Model file
-        rraTool.setModelFilename(os.path.join('..','..','model',f'{subject}_adjusted_scaled.osim'))
+        rraTool.setModelFilename(os.path.join(subjectDir,'model',f'{subject}_adjusted_scaled.osim'))
         
         #Append the force set files
         forceSetFiles = osim.ArrayStr()
@@ -584,10 +602,10 @@ for subject in subList:
         rraTool.setReplaceForceSet(True)
         
         #External loads file
-        rraTool.setExternalLoadsFileName(os.path.join('..','..','expData',f'{runName}_grf.xml'))
+        rraTool.setExternalLoadsFileName(os.path.join(subjectDir,'expData',f'{runName}_grf.xml'))
 
         #Kinematics file
-        rraTool.setDesiredKinematicsFileName(os.path.join('..','..','ik',f'{runName}.mot'))
+        rraTool.setDesiredKinematicsFileName(os.path.join(subjectDir,'ik',f'{runName}.mot'))
         
         #Cutoff frequency for kinematics
         rraTool.setLowpassCutoffFrequency(15.0)
@@ -598,16 +616,15 @@ for subject in subList:
         #Output precision
         rraTool.setOutputPrecision(20)
         
+        #Create a list to store run times in if running tools directly
+        rraRunTimes = []
+        
         #Loop through gait cycles
         for cycle in cycleList:
             
             #Create directory for cycle
             os.makedirs(cycle, exist_ok = True)
             
-            #Add in opensim logger for cycle
-            osim.Logger.removeFileSink()
-            osim.Logger.addFileSink(os.path.join(cycle,f'{runLabel}_{cycle}_rraLog.log'))
-            
             #Add in cycle specific details
             
             #Tool name
@@ -630,100 +647,62 @@ for subject in subList:
             #Print to file
             rraTool.printToXML(f'{subject}_{runLabel}_{cycle}_setupRRA.xml')
             
-            #Load and run rra tool
-            #For some reason rra works better when the tool is reloaded
-            rraToolRun = osim.RRATool(f'{subject}_{runLabel}_{cycle}_setupRRA.xml')
+            #Run the tool directly if it isn't being reloaded
+            if not reloadRRATool:
+                rraRunTimes.append(helper.runRRATool(logFileName = os.path.join(cycle,f'{runLabel}_{cycle}_rraLog.log'),
+                                                     rraTool = rraTool))
             
-            #Set-up start timer
-            startRunTime = time.time()
-            
-            #Run tool        
-            rraToolRun.run()
-            
-            #End timer and record
-            rraRunTime = round(time.time() - startRunTime, 2)
+        #Run the rra tool for each cycle from the set-up files
+        #The cycles are independent so these can be run across worker processes
+        #Note that the tool is reloaded from the set-up file as rra works better this way
+        if reloadRRATool:
+            rraRunTimes = helper.runRRATools(setupFileNames = [f'{subject}_{runLabel}_{cycle}_setupRRA.xml' for cycle in cycleList],
+                                             logFileNames = [os.path.join(cycle,f'{runLabel}_{cycle}_rraLog.log') for cycle in cycleList],
+                                             nWorkers = nCycleWorkers)
+        
+        #Loop through gait cycles to process the rra outputs
+        for cycle, rraRunTime in zip(cycleList, rraRunTimes):
             
             #Record run-time to dictionary
             rraRunTimeData[runLabel][cycle]['rraRunTime'] = rraRunTime
             
             #Mass adjustments
-            #Stop the logger
-            osim.Logger.removeFileSink()
-            #Read in the log file
-            fid = open(os.path.join(cycle,f'{runLabel}_{cycle}_rraLog.log'), 'r')
-            fileText = fid.readlines()
-            fid.close()
-            #Loop through the bodies
-            for body in bodyList:
-                #Search through log file lines for current body adjustment
-                for li in fileText:
-                    if body in li and 'orig mass' in li and 'new mass' in li:
-                        #Extract out the original mass and new mass
-                        stringToGetOrig = re.search('orig mass = (.*),', li)
-                        stringToGetNew = re.search('new mass = (.*)\n', li)
-                        #Get the values and append to dictionary
-                        massAdjustmentData[runLabel][cycle][body]['origMass'] = float(stringToGetOrig.group(1))
-                        massAdjustmentData[runLabel][cycle][body]['newMass'] = float(stringToGetNew.group(1))
-                        massAdjustmentData[runLabel][cycle][body]['massChange'] = float(stringToGetNew.group(1)) - float(stringToGetOrig.group(1))
-            
-            #Adjust mass in the newly created model
-            #Load the model
-            rraAdjustedModel = osim.Model(os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_rraAdjusted.osim'))
-            #Loop through the bodies and set the mass from the dictionary
-            for body in bodyList:
-                #Get the new mass
-                newMass = massAdjustmentData[runLabel][cycle][body]['newMass']
-                #Update in the model
-                rraAdjustedModel.updBodySet().get(body).setMass(newMass)
-            #Finalise the model connections
-            rraAdjustedModel.finalizeConnections()
-            #Re-save the model
-            rraAdjustedModel.printToXML(os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_rraAdjusted.osim'))
+            #Read the original and new mass of each body from the log file and apply
+            #these to the adjusted model
+            massAdjustments = helper.applyMassAdjustments(logFileName = os.path.join(cycle,f'{runLabel}_{cycle}_rraLog.log'),
+                                                          bodyList = bodyList,
+                                                          osimModelFileName = os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_rraAdjusted.osim'))
+            #Check that an adjustment was found for every body in the log
+            missingBodies = [body for body in bodyList if body not in massAdjustments]
+            if len(missingBodies) > 0:
+                warnings.warn(f'No mass adjustment found in RRA log for {subject} {runLabel} {cycle} bodies: {", ".join(missingBodies)}')
+            #Store the values for the dataframe
+            for body, (origMass, newMass) in massAdjustments.items():
+                massAdjustmentRows.append((runLabel, cycle, body, origMass, newMass, newMass - origMass))
             
             #Calculate the final residuals and joint torques with new kinematics and
             #model using inverse dynamics
-            
-            #Create the tool
-            #Generate this from the blank set-up file as we can't edit the body forces part
-            idTool = osim.InverseDynamicsTool(os.path.join('..','..','..','..','..','tools','blank_id_setup.xml'))
-            
-            #Set the results directory        
-            idTool.setResultsDir(f'{cycle}/')
-            
-            #Set model file
-            idTool.setModelFileName(os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_rraAdjusted.osim'))
-            
-            #Set the external loads file
-            idTool.setExternalLoadsFileName(os.path.join('..','..','expData',f'{runName}_grf.xml'))
-            
-            #Set the kinematics file from RRA
-            idTool.setCoordinatesFileName(os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_Kinematics_q.sto'))
-            
-            #Set the time range
-            idTool.setStartTime(osim.Storage(os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_Kinematics_q.sto')).getFirstTime())
-            idTool.setEndTime(osim.Storage(os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_Kinematics_q.sto')).getLastTime())
-            
-            #Set the output forces file
-            idTool.setOutputGenForceFileName(f'{subject}_{runLabel}_{cycle}_id.sto')
-                    
-            #Print to file
-            idTool.printToXML(f'{subject}_{runLabel}_{cycle}_setupID.xml')
-            
-            #Run tool
-            idTool.run()
-            
-            #Rename the body forces file
-            os.replace(os.path.join(cycle,'body_forces_at_joints.sto'),
-                       os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_bodyForces.sto'))
+            helper.runRRAInverseDynamics(idToolTemplate = idToolTemplate,
+                                         osimModelFileName = os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_rraAdjusted.osim'),
+                                         coordinatesFileName = os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_Kinematics_q.sto'),
+                                         externalLoadsFileName = os.path.join(subjectDir,'expData',f'{runName}_grf.xml'),
+                                         resultsDir = cycle,
+                                         outputName = f'{subject}_{runLabel}_{cycle}',
+                                         setupFileName = f'{subject}_{runLabel}_{cycle}_setupID.xml')
             
             #Print confirmation
             print(f'RRA completed for {subject} {runLabel} {cycle}...')
             
+        #Create the mass adjustments dataframe
+        #Indexed by run, cycle and body with a column for each mass value
+        #Only bodies with an adjustment in the RRA log are included
+        massAdjustmentData = pd.DataFrame(massAdjustmentRows,
+                                          columns = ['run','cycle','body','origMass','newMass','massChange']).set_index(['run','cycle','body'])
+        
         #Save run time and mass adjustment data dictionaries
-        with open(f'{subject}_rraRunTimeData.pkl', 'wb') as writeFile:
-            pickle.dump(rraRunTimeData, writeFile)
+        helper.saveRunTimeData(rraRunTimeData, f'{subject}_rraRunTimeData.pkl')
         with open(f'{subject}_massAdjustmentData.pkl', 'wb') as writeFile:
-            pickle.dump(massAdjustmentData, writeFile)
+            pickle.dump(massAdjustmentData, writeFile, protocol = pickle.HIGHEST_PROTOCOL)
     
         #Navigate back to home directory for next subject
         os.chdir(homeDir)
@@ -735,7 +714,7 @@ for subject in subList:
         # %% Set-up for RRA3
         
         #Change to rra directory for ease of use with tools
-        os.chdir(os.path.join('..','..','data','HamnerDelp2013',subject,'rra3',runLabel))
+        os.chdir(os.path.join(subjectDir,'rra3',runLabel))
         
         #Perform the generic processes relevant to all steps
         
@@ -743,130 +722,33 @@ for subject in subList:
         osim.Logger.removeFileSink()
         osim.Logger.addFileSink('rra3Log.log')
         
-        #Load the subject model to refer to body parameters
-        osimModel = osim.Model(os.path.join('..','..','model',f'{subject}_adjusted_scaled.osim'))
-        
-        #Create dictionary to store mass adjustments
-        #Slightly different to earlier version where 3 iterations are the upper dict level
-        bodyList = [osimModel.updBodySet().get(ii).getName() for ii in range(osimModel.updBodySet().getSize())]
-        massAdjustmentData3 = {}
-        for rraIter in range(1,4):
-            massAdjustmentData3[f'rra{rraIter}'] = {run: {cyc: {body: {'origMass': [], 'newMass': [], 'massChange': []} for body in bodyList} for cyc in cycleList} for run in runList}
+        #Create arrays to store mass adjustments
+        #Slightly different to earlier version where the 3 iterations are the first axis
+        #Each mass array is indexed by iteration, run, cycle and body with the labels
+        #for each axis stored alongside them. Bodies without an adjustment in the RRA
+        #log are left as NaN.
+        bodyInd = {body: ii for ii, body in enumerate(bodyList)}
+        massAdjustmentData3 = {'iterations': [f'rra{rraIter}' for rraIter in range(1,4)],
+                               'runs': runList, 'cycles': cycleList, 'bodies': list(bodyList),
+                               'origMass': np.full((3, len(runList), len(cycleList), len(bodyList)), np.nan),
+                               'newMass': np.full((3, len(runList), len(cycleList), len(bodyList)), np.nan),
+                               'massChange': np.full((3, len(runList), len(cycleList), len(bodyList)), np.nan)}
         
         #Create the RRA actuators file
+        rraForceSet = helper.createRRAForceSet(osimModel = osimModel,
+                                               forceSetName = f'{subject}_{runLabel}_RRA_Actuators',
+                                               optForces = rraActuators,
+                                               controlLimits = rraLimits,
+                                               residualActuators = rraResidualActuators)
         
-        #Create and set name
-        rraForceSet = osim.ForceSet()
-        rraForceSet.setName(f'{subject}_{runLabel}_RRA_Actuators')
-        
-        #Loop through coordinates and append to force set
-        for actuator in rraActuators.keys():
-            
-            #Create the actuator. First we must check if point, torque or coordinate
-            #actuators are required depending on the coordinate
-            
-            #Check for point actuator
-            if actuator in ['pelvis_tx', 'pelvis_ty', 'pelvis_tz']:            
-                #Create the point actuator
-                pointActuator = osim.PointActuator()            
-                #Set the name to the residual coordinate
-                pointActuator.setName(f'F{actuator[-1].capitalize()}')            
-                #Set the max and min controls to those provided
-                pointActuator.set_min_control(rraLimits[actuator]*-1)
-                pointActuator.set_max_control(rraLimits[actuator])
-                #Set the force body as the pelvis
-                pointActuator.set_body('pelvis')
-                #Set the direction
-                pointActuator.set_direction(osim.Vec3(
-                    (np.array([actuator[-1] == ii for ii in ['x','y','z']], dtype = int)[0],
-                     np.array([actuator[-1] == ii for ii in ['x','y','z']], dtype = int)[1],
-                     np.array([actuator[-1] == ii for ii in ['x','y','z']], dtype = int)[2])
-                    ))            
-                #Set force to be global
-                pointActuator.set_point_is_global(True)
-                #Set the point from the model
-                pointActuator.set_point(osimModel.updBodySet().get('pelvis').get_mass_center())
-                #Set optimal force
-                pointActuator.set_optimal_force(rraActuators[actuator])
-                #Clone and append to force set
-                rraForceSet.cloneAndAppend(pointActuator)
-                
-            #Check for torque actuator
-            elif actuator in ['pelvis_list', 'pelvis_rotation', 'pelvis_tilt']:
-                #Create a torque actuator
-                torqueActuator = osim.TorqueActuator()
-                #Set the name to the residual coordinate            
-                torqueActuator.setName(f'M{[x for i, x in enumerate(["X","Y","Z"]) if [actuator == ii for ii in ["pelvis_list", "pelvis_rotation", "pelvis_tilt"]][i]][0]}')
-                #Set the max and min controls to those provided
-                torqueActuator.set_min_control(rraLimits[actuator]*-1)
-                torqueActuator.set_max_control(rraLimits[actuator])
-                #Set the torque to act on the pelvis relative to the ground
-                torqueActuator.set_bodyA('pelvis')
-                torqueActuator.set_bodyB('ground')
-                #Set the axis
-                torqueActuator.set_axis(osim.Vec3(
-                    (np.array([actuator == ii for ii in ['pelvis_list', 'pelvis_rotation', 'pelvis_tilt']], dtype = int)[0],
-                     np.array([actuator == ii for ii in ['pelvis_list', 'pelvis_rotation', 'pelvis_tilt']], dtype = int)[1],
-                     np.array([actuator == ii for ii in ['pelvis_list', 'pelvis_rotation', 'pelvis_tilt']], dtype = int)[2])
-                    ))
-                #Set torque to be global
-                torqueActuator.set_torque_is_global(True)
-                #Set optimal force
-                torqueActuator.set_optimal_force(rraActuators[actuator])
-                #Clone and append to force set
-                rraForceSet.cloneAndAppend(torqueActuator)
-                
-            #Remaining should be coordinate actuators
-            else:
-                #Create a coordinate actuator
-                coordActuator = osim.CoordinateActuator()
-                #Set name to coordinate
-                coordActuator.setName(actuator)
-                #Set coordinate
-                coordActuator.set_coordinate(actuator)
-                #Set min and max control to those provided
-                coordActuator.set_min_control(rraLimits[actuator]*-1)
-                coordActuator.set_max_control(rraLimits[actuator])
-                #Set optimal force
-                coordActuator.set_optimal_force(rraActuators[actuator])
-                #Clone and append to force set
-                rraForceSet.cloneAndAppend(coordActuator)
-                
         #Print the force set to file
         rraForceSet.printToXML(f'{subject}_{runLabel}_RRA_Actuators.xml')
         
         #Create the RRA tasks file
-        
-        #Create and set name
-        rraTaskSet = osim.CMC_TaskSet()
-        rraTaskSet.setName(f'{subject}_{runLabel}_RRA_Tasks')
-        
-        #Loop through coordinates and append to force set
-        for task in rraTasks.keys():
-            
-            #Create the task
-            cmcTask = osim.CMC_Joint()
-            
-            #Set the name to the coordinate
-            cmcTask.setName(task)
-            
-            #Set task weight
-            cmcTask.setWeight(rraTasks[task])
-            
-            #Set active parameters
-            cmcTask.setActive(True, False, False)
-            
-            #Set kp and kv
-            cmcTask.setKP(100)
-            cmcTask.setKV(20)
-            
-            #Set coordinate
-            cmcTask.setCoordinateName(task)
-            
-            #Clone and append to task set
-            rraTaskSet.cloneAndAppend(cmcTask)
+        rraTaskSet = helper.createRRATaskSet(taskSetName = f'{subject}_{runLabel}_RRA_Tasks',
+                                             taskWeights = rraTasks)
                 
-        #Print the force set to file
+        #Print the task set to file
         rraTaskSet.printToXML(f'{subject}_{runLabel}_RRA_Tasks.xml')
         
         # %% Loop through 3 iterations of RRA
@@ -877,12 +759,9 @@ for subject in subList:
             os.makedirs(f'rra{rraIter}', exist_ok = True)
             
             #Shift to iteration directory
+            #Note that the tool outputs for each iteration are logged in the cycle logs
             os.chdir(f'rra{rraIter}')
             
-            #Add in opensim logger for current iteration
-            osim.Logger.removeFileSink()
-            osim.Logger.addFileSink(f'rra3Log_{rraIter}.log')
-            
             #Create a generic RRA tool to manipulate for the 3 cycles
             rraTool = osim.RRATool()
             
@@ -890,12 +769,12 @@ for subject in subList:
             
             #Append the force set files
             forceSetFiles = osim.ArrayStr()
-            forceSetFiles.append(os.path.join('..',f'{subject}_{runLabel}_RRA_Actuators.xml'))
+            forceSetFiles.append(os.path.join(subjectDir,'rra3',runLabel,f'{subject}_{runLabel}_RRA_Actuators.xml'))
             rraTool.setForceSetFiles(forceSetFiles)
             rraTool.setReplaceForceSet(True)
             
             #External loads file
-            rraTool.setExternalLoadsFileName(os.path.join('..','..','..','expData',f'{runName}_grf.xml'))
+            rraTool.setExternalLoadsFileName(os.path.join(subjectDir,'expData',f'{runName}_grf.xml'))
             
             # #Kinematics file
             # #This remains consistent across all iterations
@@ -905,29 +784,28 @@ for subject in subList:
             # rraTool.setLowpassCutoffFrequency(15.0)
             
             #Task set file
-            rraTool.setTaskSetFileName(os.path.join('..',f'{subject}_{runLabel}_RRA_Tasks.xml'))
+            rraTool.setTaskSetFileName(os.path.join(subjectDir,'rra3',runLabel,f'{subject}_{runLabel}_RRA_Tasks.xml'))
             
             #Output precision
             rraTool.setOutputPrecision(20)
             
+            #Create a list to store run times in if running tools directly
+            rraRunTimes = []
+            
             #Loop through gait cycles
             for cycle in cycleList:
                 
                 #Create directory for cycle
                 os.makedirs(cycle, exist_ok = True)
                 
-                #Add in opensim logger for cycle
-                osim.Logger.removeFileSink()
-                osim.Logger.addFileSink(os.path.join(cycle,f'{runLabel}_{cycle}_rra3Log_{rraIter}.log'))
-                
                 #Add in cycle and iteration specific details
                 if rraIter == 1:
                 
                     #Use the originally scaled model
-                    rraTool.setModelFilename(os.path.join('..','..','..','model',f'{subject}_adjusted_scaled.osim'))
+                    rraTool.setModelFilename(os.path.join(subjectDir,'model',f'{subject}_adjusted_scaled.osim'))
                     
                     #Use the original IK file and filter
-                    rraTool.setDesiredKinematicsFileName(os.path.join('..','..','..','ik',f'{runName}.mot'))
+                    rraTool.setDesiredKinematicsFileName(os.path.join(subjectDir,'ik',f'{runName}.mot'))
                     rraTool.setLowpassCutoffFrequency(15.0)
                     
                     #Set the timings using the gait timings data
@@ -938,15 +816,17 @@ for subject in subList:
                 else:
                     
                     #Use the adjusted RRA model from previous iteration
-                    rraTool.setModelFilename(os.path.join('..',f'rra{rraIter-1}',cycle,f'{subject}_{runLabel}_{cycle}_rraAdjusted_iter{rraIter-1}.osim'))
+                    rraTool.setModelFilename(os.path.join(subjectDir,'rra3',runLabel,f'rra{rraIter-1}',cycle,f'{subject}_{runLabel}_{cycle}_rraAdjusted_iter{rraIter-1}.osim'))
                     
                     #Use the adjusted RRA kinematics and don't filter
-                    rraTool.setDesiredKinematicsFileName(os.path.join('..',f'rra{rraIter-1}',cycle,f'{subject}_{runLabel}_{cycle}_iter{rraIter-1}_Kinematics_q.sto'))
+                    rraTool.setDesiredKinematicsFileName(os.path.join(subjectDir,'rra3',runLabel,f'rra{rraIter-1}',cycle,f'{subject}_{runLabel}_{cycle}_iter{rraIter-1}_Kinematics_q.sto'))
                     rraTool.setLowpassCutoffFrequency(-1)
                     
                     #Set the timings using the previous iteration kinematic data
-                    rraTool.setInitialTime(osim.Storage(os.path.join('..',f'rra{rraIter-1}',cycle,f'{subject}_{runLabel}_{cycle}_iter{rraIter-1}_Kinematics_q.sto')).getFirstTime())
-                    rraTool.setFinalTime(osim.Storage(os.path.join('..',f'rra{rraIter-1}',cycle,f'{subject}_{runLabel}_{cycle}_iter{rraIter-1}_Kinematics_q.sto')).getLastTime())
+                    #These were already read for the ID step of the previous iteration
+                    initialTime, finalTime = helper.getTimeRange(os.path.join(subjectDir,'rra3',runLabel,f'rra{rraIter-1}',cycle,f'{subject}_{runLabel}_{cycle}_iter{rraIter-1}_Kinematics_q.sto'))
+                    rraTool.setInitialTime(initialTime)
+                    rraTool.setFinalTime(finalTime)
                 
                 #Tool name
                 rraTool.setName(f'{subject}_{runLabel}_{cycle}_iter{rraIter}')
@@ -964,92 +844,52 @@ for subject in subList:
                 #Print to file
                 rraTool.printToXML(f'{subject}_{runLabel}_{cycle}_setupRRA_iter{rraIter}.xml')
                 
-                #Load and run rra tool
-                #For some reason rra works better when the tool is reloaded
-                rraToolRun = osim.RRATool(f'{subject}_{runLabel}_{cycle}_setupRRA_iter{rraIter}.xml')
-                
-                #Set-up start timer
-                startRunTime = time.time()
+                #Run the tool directly if it isn't being reloaded
+                if not reloadRRATool:
+                    rraRunTimes.append(helper.runRRATool(logFileName = os.path.join(cycle,f'{runLabel}_{cycle}_rra3Log_{rraIter}.log'),
+                                                         rraTool = rraTool))
                 
-                #Run tool        
-                rraToolRun.run()
-                
-                #End timer and record
-                rraRunTime = round(time.time() - startRunTime, 2)
+            #Run the rra tool for each cycle from the set-up files
+            #The cycles are independent within an iteration so these can be run across worker processes
+            #Note that the tool is reloaded from the set-up file as rra works better this way
+            if reloadRRATool:
+                rraRunTimes = helper.runRRATools(setupFileNames = [f'{subject}_{runLabel}_{cycle}_setupRRA_iter{rraIter}.xml' for cycle in cycleList],
+                                                 logFileNames = [os.path.join(cycle,f'{runLabel}_{cycle}_rra3Log_{rraIter}.log') for cycle in cycleList],
+                                                 nWorkers = nCycleWorkers)
+            
+            #Loop through gait cycles to process the rra outputs
+            for cycle, rraRunTime in zip(cycleList, rraRunTimes):
                 
                 #Record run-time to dictionary
                 #Append to list as we're going to get 3 times for iterations here
                 rra3RunTimeData[runLabel][cycle]['rra3RunTime'].append(rraRunTime)
                 
                 #Mass adjustments
-                #Stop the logger
-                osim.Logger.removeFileSink()
-                #Read in the log file
-                fid = open(os.path.join(cycle,f'{runLabel}_{cycle}_rra3Log_{rraIter}.log'), 'r')
-                fileText = fid.readlines()
-                fid.close()
-                #Loop through the bodies
-                for body in bodyList:
-                    #Search through log file lines for current body adjustment
-                    for li in fileText:
-                        if body in li and 'orig mass' in li and 'new mass' in li:
-                            #Extract out the original mass and new mass
-                            stringToGetOrig = re.search('orig mass = (.*),', li)
-                            stringToGetNew = re.search('new mass = (.*)\n', li)
-                            #Get the values and append to dictionary
-                            massAdjustmentData3[f'rra{rraIter}'][runLabel][cycle][body]['origMass'] = float(stringToGetOrig.group(1))
-                            massAdjustmentData3[f'rra{rraIter}'][runLabel][cycle][body]['newMass'] = float(stringToGetNew.group(1))
-                            massAdjustmentData3[f'rra{rraIter}'][runLabel][cycle][body]['massChange'] = float(stringToGetNew.group(1)) - float(stringToGetOrig.group(1))
-                
-                #Adjust mass in the newly created model
-                #Load the model
-                rraAdjustedModel = osim.Model(os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_rraAdjusted_iter{rraIter}.osim'))
-                #Loop through the bodies and set the mass from the dictionary
-                for body in bodyList:
-                    #Get the new mass
-                    newMass = massAdjustmentData3[f'rra{rraIter}'][runLabel][cycle][body]['newMass']
-                    #Update in the model
-                    rraAdjustedModel.updBodySet().get(body).setMass(newMass)
-                #Finalise the model connections
-                rraAdjustedModel.finalizeConnections()
-                #Re-save the model
-                rraAdjustedModel.printToXML(os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_rraAdjusted_iter{rraIter}.osim'))
+                #Read the original and new mass of each body from the log file and apply
+                #these to the adjusted model
+                massAdjustments = helper.applyMassAdjustments(logFileName = os.path.join(cycle,f'{runLabel}_{cycle}_rra3Log_{rraIter}.log'),
+                                                              bodyList = bodyList,
+                                                              osimModelFileName = os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_rraAdjusted_iter{rraIter}.osim'))
+                #Check that an adjustment was found for every body in the log
+                missingBodies = [body for body in bodyList if body not in massAdjustments]
+                if len(missingBodies) > 0:
+                    warnings.warn(f'No mass adjustment found in RRA log for {subject} {runLabel} {cycle} iteration {rraIter} bodies: {", ".join(missingBodies)}')
+                #Store the values in the arrays for the current iteration, run and cycle
+                massInd = (rraIter-1, runList.index(runLabel), cycleList.index(cycle))
+                for body, (origMass, newMass) in massAdjustments.items():
+                    massAdjustmentData3['origMass'][massInd + (bodyInd[body],)] = origMass
+                    massAdjustmentData3['newMass'][massInd + (bodyInd[body],)] = newMass
+                    massAdjustmentData3['massChange'][massInd + (bodyInd[body],)] = newMass - origMass
                 
                 #Calculate the final residuals and joint torques with new kinematics and
                 #model using inverse dynamics
-                
-                #Create the tool
-                #Generate this from the blank set-up file as we can't edit the body forces part
-                idTool = osim.InverseDynamicsTool(os.path.join('..','..','..','..','..','..','tools','blank_id_setup.xml'))
-                
-                #Set the results directory        
-                idTool.setResultsDir(f'{cycle}/')
-                
-                #Set model file
-                idTool.setModelFileName(os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_rraAdjusted_iter{rraIter}.osim'))
-                
-                #Set the external loads file
-                idTool.setExternalLoadsFileName(os.path.join('..','..','..','expData',f'{runName}_grf.xml'))
-                
-                #Set the kinematics file from RRA
-                idTool.setCoordinatesFileName(os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_iter{rraIter}_Kinematics_q.sto'))
-                
-                #Set the time range
-                idTool.setStartTime(osim.Storage(os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_iter{rraIter}_Kinematics_q.sto')).getFirstTime())
-                idTool.setEndTime(osim.Storage(os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_iter{rraIter}_Kinematics_q.sto')).getLastTime())
-                
-                #Set the output forces file
-                idTool.setOutputGenForceFileName(f'{subject}_{runLabel}_{cycle}_iter{rraIter}_id.sto')
-                        
-                #Print to file
-                idTool.printToXML(f'{subject}_{runLabel}_{cycle}_setupID_iter{rraIter}.xml')
-                
-                #Run tool
-                idTool.run()
-                
-                #Rename the body forces file
-                os.replace(os.path.join(cycle,'body_forces_at_joints.sto'),
-                           os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_iter{rraIter}_bodyForces.sto'))
+                helper.runRRAInverseDynamics(idToolTemplate = idToolTemplate,
+                                             osimModelFileName = os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_rraAdjusted_iter{rraIter}.osim'),
+                                             coordinatesFileName = os.path.join(cycle,f'{subject}_{runLabel}_{cycle}_iter{rraIter}_Kinematics_q.sto'),
+                                             externalLoadsFileName = os.path.join(subjectDir,'expData',f'{runName}_grf.xml'),
+                                             resultsDir = cycle,
+                                             outputName = f'{subject}_{runLabel}_{cycle}_iter{rraIter}',
+                                             setupFileName = f'{subject}_{runLabel}_{cycle}_setupID_iter{rraIter}.xml')
                 
                 #Print confirmation
                 print(f'RRA completed for {subject} {runLabel} {cycle} iteration {rraIter}...')
@@ -1058,10 +898,9 @@ for subject in subList:
             os.chdir('..')
                         
         #Save run time and mass adjustment data dictionaries
-        with open(f'{subject}_rra3RunTimeData.pkl', 'wb') as writeFile:
-            pickle.dump(rra3RunTimeData, writeFile)
+        helper.saveRunTimeData(rra3RunTimeData, f'{subject}_rra3RunTimeData.pkl')
         with open(f'{subject}_massAdjustmentData3.pkl', 'wb') as writeFile:
-            pickle.dump(massAdjustmentData3, writeFile)
+            pickle.dump(massAdjustmentData3, writeFile, protocol = pickle.HIGHEST_PROTOCOL)
         
         #Navigate back to home directory for next subject
         os.chdir(homeDir)
@@ -1073,22 +912,22 @@ for subject in subList:
         # %% Set-up for Moco approach
             
         #Change to Moco directory for ease of use with tools
-        os.chdir(os.path.join('..','..','data','HamnerDelp2013',subject,'moco',runLabel))
+        os.chdir(os.path.join(subjectDir,'moco',runLabel))
 
         #Add in opensim logger
         osim.Logger.removeFileSink()
         osim.Logger.addFileSink('mocoLog.log')
     
-        #Copy external load files across as there are issues with using these out of
-        #directory with Moco tools
-        shutil.copyfile(os.path.join('..','..','expData',f'{runName}_grf.xml'),
-                        f'{runName}_grf.xml')
-        shutil.copyfile(os.path.join('..','..','expData',f'{runName}_grf.mot'),
-                        f'{runName}_grf.mot')
+        #Link (or copy) external load files across as there are issues with using these
+        #out of directory with Moco tools
+        helper.linkOrCopyFile(os.path.join(subjectDir,'expData',f'{runName}_grf.xml'),
+                              f'{runName}_grf.xml')
+        helper.linkOrCopyFile(os.path.join(subjectDir,'expData',f'{runName}_grf.mot'),
+                              f'{runName}_grf.mot')
         
         #Convert kinematics to states version for use with Moco
-        helper.kinematicsToStates(kinematicsFileName = os.path.join('..','..','ik',f'{runName}.mot'),
-                           osimModelFileName = os.path.join('..','..','model',f'{subject}_adjusted_scaled.osim'),
+        helper.kinematicsToStates(kinematicsFileName = os.path.join(subjectDir,'ik',f'{runName}.mot'),
+                           osimModelFileName = os.path.join(subjectDir,'model',f'{subject}_adjusted_scaled.osim'),
                            outputFileName = f'{runName}_coordinates.sto',
                            inDegrees = True, outDegrees = False,
                            filtFreq = 15.0)
@@ -1099,22 +938,54 @@ for subject in subList:
         mocoTrack = osim.MocoTrack()
         mocoTrack.setName('mocoResidualReduction')
         
-        # Construct a ModelProcessor and set it on the tool.
-        modelProcessor = osim.ModelProcessor(os.path.join('..','..','model',f'{subject}_adjusted_scaled.osim'))
-        modelProcessor.append(osim.ModOpAddExternalLoads(f'{runName}_grf.xml'))
-        modelProcessor.append(osim.ModOpRemoveMuscles())
+        #Check for a previously processed model with the same inputs
+        #The processed model only depends on the scaled model, external loads,
+        #actuator settings and processing steps so these are hashed to name the cached file
+        #Change the processing version if any of the steps below are edited (including
+        #helper.addTorqueActuators) so that previously processed models aren't reused
+        mocoModelProcessing = 'addExternalLoads-removeMuscles-addTorqueActuators-v1'
+        mocoModelHash = helper.hashFiles(fileNames = [os.path.join(subjectDir,'model',f'{subject}_adjusted_scaled.osim'),
+                                                      f'{runName}_grf.xml'],
+                                         extraText = repr((mocoModelProcessing, rraActuators, rraLimits)))
+        mocoModelFileName = f'{subject}_{runLabel}_mocoModel_{mocoModelHash}.osim'
         
-        #Process model to edit
-        mocoModel = modelProcessor.process()
+        if os.path.exists(mocoModelFileName):
+            
+            #Load the cached model
+            mocoModel = osim.Model(mocoModelFileName)
+            mocoModel.finalizeConnections()
+            
+        else:
         
-        #Add in torque actuators that replicate the RRA actuators
-        mocoModel = helper.addTorqueActuators(osimModel = mocoModel,
-                                              optForces = rraActuators,
-                                              controlLimits = rraLimits)
+            # Construct a ModelProcessor and set it on the tool.
+            modelProcessor = osim.ModelProcessor(os.path.join(subjectDir,'model',f'{subject}_adjusted_scaled.osim'))
+            modelProcessor.append(osim.ModOpAddExternalLoads(f'{runName}_grf.xml'))
+            modelProcessor.append(osim.ModOpRemoveMuscles())
+            
+            #Process model to edit
+            mocoModel = modelProcessor.process()
+            
+            #Add in torque actuators that replicate the RRA actuators
+            mocoModel = helper.addTorqueActuators(osimModel = mocoModel,
+                                                  optForces = rraActuators,
+                                                  controlLimits = rraLimits)
+            
+            #Save the processed model for re-runs
+            mocoModel.printToXML(mocoModelFileName)
+            
+            #Remove any models processed from previous inputs as these are superseded
+            for cachedFileName in os.listdir():
+                if cachedFileName.startswith(f'{subject}_{runLabel}_mocoModel_') and cachedFileName.endswith('.osim') and cachedFileName != mocoModelFileName:
+                    os.remove(cachedFileName)
         
         #Set model in tracking tool
         mocoTrack.setModel(osim.ModelProcessor(mocoModel))
         
+        #Get the coordinate names and absolute paths from the model once
+        #These are used for the kinematic bounds and tracking weights below
+        coordSet = mocoModel.updCoordinateSet()
+        coordPaths = {coordSet.get(coordInd).getName(): coordSet.get(coordInd).getAbsolutePathString() for coordInd in range(coordSet.getSize())}
+        
         #Construct a table processor to append to the tracking tool for kinematics
         #The kinematics can't be filtered here with the operator as it messes with
         #time stamps in a funky way. This however has already been done in the 
@@ -1126,18 +997,19 @@ for subject in subList:
         #Create this based on maximum and minimum values in the kinematic data
         #plus/minus some generic values
         
-        #Load the kinematics file as a table
-        ikTable = osim.TimeSeriesTable(f'{runName}_coordinates.sto')
+        #Load the kinematics file as a single time x column array
+        ikTime, ikCols, ikTableData = helper.getTableData(f'{runName}_coordinates.sto')
+        
+        #Select the coordinate data into a single time x coordinate array
+        #This allows the min and max of all coordinates to be taken at once
+        boundCoords = list(kinematicLimits.keys())
+        coordData = ikTableData[:,[ikCols[coordPaths[coord]+'/value'] for coord in boundCoords]]
+        boundPads = np.array([kinematicLimits[coord] for coord in boundCoords])
+        lowerBounds = coordData.min(axis = 0) - boundPads
+        upperBounds = coordData.max(axis = 0) + boundPads
         
         #Create the bounds dictionary
-        kinematicBounds = {}
-        #Loop through the coordinates
-        for coord in kinematicLimits.keys():
-            #Get the coordinate path
-            coordPath = mocoModel.updCoordinateSet().get(coord).getAbsolutePathString()+'/value'
-            #Set bounds in dictionary
-            kinematicBounds[coord] = [ikTable.getDependentColumn(coordPath).to_numpy().min() - kinematicLimits[coord],
-                                      ikTable.getDependentColumn(coordPath).to_numpy().max() + kinematicLimits[coord]]
+        kinematicBounds = {coord: [lowerBounds[coordInd], upperBounds[coordInd]] for coordInd, coord in enumerate(boundCoords)}
     
         #Set the global states tracking weight in the tracking problem
         mocoTrack.set_states_global_tracking_weight(1)
@@ -1165,14 +1037,10 @@ for subject in subList:
         speedsTrackingScale = 0.01
         
         #Loop through coordinates to apply weights
-        for coordInd in range(mocoModel.updCoordinateSet().getSize()):
-            
-            #Get name and absolute path to coordinate
-            coordName = mocoModel.updCoordinateSet().get(coordInd).getName()
-            coordPath = mocoModel.updCoordinateSet().get(coordInd).getAbsolutePathString()
+        for coordName, coordPath in coordPaths.items():
         
             #If a task weight is provided, add it in
-            if coordName in list(rraTasks.keys()):
+            if coordName in rraTasks:
                 #Append state into weight set
                 #Track the coordinate value
                 stateWeights.cloneAndAppend(osim.MocoWeight(f'{coordPath}/value',
@@ -1183,6 +1051,12 @@ for subject in subList:
                 
         #Add state weights to the tracking tool
         mocoTrack.set_states_weight_set(stateWeights)
+        
+        #Pair the kinematic bounds with their state paths for setting in each cycle
+        #These don't change across cycles, however the study needs to be initialised
+        #for each cycle as the tracked states guess depends on the cycle timings
+        kinematicStateBounds = [(f'{coordPaths[coordName]}/value', [coordBounds[0], coordBounds[1]])
+                                for coordName, coordBounds in kinematicBounds.items()]
     
         #Loop through gait cycles
         for cycle in cycleList:
@@ -1214,17 +1088,8 @@ for subject in subList:
                                   gaitTimings[runLabel][cycle]['finalTime'])
             
             #Set kinematic bounds using the dictionary values and experimental data
-            for coordInd in range(mocoModel.updCoordinateSet().getSize()):
-                #First check if coordinate is in kinematic bounds dictionary
-                if mocoModel.updCoordinateSet().get(coordInd).getName() in list(kinematicBounds.keys()):                
-                    #Get coordinate name and path
-                    coordName = mocoModel.updCoordinateSet().get(coordInd).getName()
-                    coordPath = mocoModel.updCoordinateSet().get(coordInd).getAbsolutePathString()+'/value'
-                    #Set bounds in problem
-                    problem.setStateInfo(coordPath,
-                                         #Bounds set to model ranges
-                                         [kinematicBounds[coordName][0], kinematicBounds[coordName][1]]
-                                         )
+            for statePath, stateBounds in kinematicStateBounds:
+                problem.setStateInfo(statePath, stateBounds)
             
             #Get the solver
             solver = osim.MocoCasADiSolver.safeDownCast(study.updSolver())
@@ -1284,8 +1149,7 @@ for subject in subList:
             osim.Logger.removeFileSink()
             
         #Save run time and mass adjustment data dictionaries
-        with open(f'{subject}_mocoRunTimeData.pkl', 'wb') as writeFile:
-            pickle.dump(mocoRunTimeData, writeFile)
+        helper.saveRunTimeData(mocoRunTimeData, f'{subject}_mocoRunTimeData.pkl')
             
         #Navigate back to home directory for next subject
         os.chdir(homeDir)
@@ -1306,14 +1170,14 @@ for subject in subList:
         # %% Set-up for AddBiomechanics approach
         
         #Change to rra directory for ease of use with tools
-        os.chdir(os.path.join('..','..','data','HamnerDelp2013',subject,'addBiomechanics',runLabel))
+        os.chdir(os.path.join(subjectDir,'addBiomechanics',runLabel))
         
         #Add in opensim logger
         osim.Logger.removeFileSink()
         osim.Logger.addFileSink('addBiomechanicsLog.log')
         
         #Read in the generic model to save and feed into AddBiomechanics
-        genModel = osim.Model(os.path.join('..','..','model','genericModel.osim'))
+        genModel = osim.Model(os.path.join(subjectDir,'model','genericModel.osim'))
         
         #Set the appropriate markers to fixed in the model
         for markerInd in range(genModel.updMarkerSet().getSize()):
@@ -1332,11 +1196,11 @@ for subject in subList:
         #Print model to file
         genModel.printToXML('genericModel.osim')
         
-        #Copy overall TRC and MOT files across to directory
-        shutil.copyfile(os.path.join('..','..','expData',f'{runName}.trc'),
-                        f'{runName}.trc')
-        shutil.copyfile(os.path.join('..','..','expData',f'{runName}_grf.mot'),
-                        f'{runName}_grf.mot')
+        #Link (or copy) overall TRC and MOT files across to directory
+        helper.linkOrCopyFile(os.path.join(subjectDir,'expData',f'{runName}.trc'),
+                              f'{runName}.trc')
+        helper.linkOrCopyFile(os.path.join(subjectDir,'expData',f'{runName}_grf.mot'),
+                              f'{runName}_grf.mot')
             
         #Print confirmation
         print(f'Data extracted for {subject} {runLabel} for AddBiomechanics processing...')
@@ -1347,1304 +1211,994 @@ for subject in subList:
     #Navigate back to home directory for next subject
     os.chdir(homeDir)
 
+#Check for running any of the simulation processes
+if runRRA or runRRA3 or runMoco or runAddBiomech:
+    
+    #The subjects are independent of one another so they can be run across
+    #worker processes, otherwise they are run one after the other
+    #The RRA cycles are run one after the other within the subject workers as
+    #these can't start their own worker processes
+    if nSimulationWorkers > 1:
+        with ProcessPoolExecutor(max_workers = nSimulationWorkers,
+                                 initializer = partial(importPackages, dataPackages = runRRA)) as executor:
+            list(executor.map(partial(runSubjectSimulations, runRRA = runRRA, runRRA3 = runRRA3,
+                                      runMoco = runMoco, runAddBiomech = runAddBiomech,
+                                      nCycleWorkers = 1),
+                              subList))
+    else:
+        for subject in subList:
+            runSubjectSimulations(subject, runRRA, runRRA3, runMoco, runAddBiomech, nCycleWorkers)
+
 # %% Compile data from simulations
 
-#Check for whether to compile data
-if compileData:
-    
-    # %% Loop through subject list
+#Set a place to store the compile figures so that they can be reused across subjects
+#compiled in the same process rather than recreated for each one
+#These are stored as figure and axes pairs by figure name
+compileFigures = {}
 
-    for subject in subList:
-        
-        #Load in the subjects gait timing data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'expData','gaitTimes.pkl'), 'rb') as openFile:
-            gaitTimings = pickle.load(openFile)
-            
-        #Calculate residual force and moment recommendations based on original experimental data
-        #Force residual recommendations are 5% of maximum external force
-        #Moment residual recommendations are 1% of COM height * maximum external force
-        
-        #Read in external GRF and get peak force residual recommendation
-        expGRF = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'expData',f'{runName}_grf.mot'))
-        peakVGRF = np.array((expGRF.getDependentColumn('R_ground_force_vy').to_numpy().max(),
-                             expGRF.getDependentColumn('L_ground_force_vy').to_numpy().max())).max()
-        forceResidualRec = peakVGRF * 0.05
-        
-        #Extract centre of mass from static output
-        #Load in scaled model
-        scaledModel = osim.Model(os.path.join('..','..','data','HamnerDelp2013',subject,'model',f'{subject}_adjusted_scaled.osim'))
-        modelState = scaledModel.initSystem()
-        #Read in static motion output
-        staticMotion = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'model',f'{subject}_static_output.mot'))
-        #Set model to joint coordinates from static output
-        for coord in kinematicAx.keys():
-            #Get absolute path to joint coordinate value in static output
-            jointPath = scaledModel.updCoordinateSet().get(coord).getAbsolutePathString()+'/value'
-            #Get value from static output
-            staticCoordVal = staticMotion.getDependentColumn(jointPath).to_numpy()[0]
-            #Set value in model
-            scaledModel.updCoordinateSet().get(coord).setValue(modelState, staticCoordVal)
-        #Realise model to position
-        scaledModel.realizePosition(modelState)
-        #Get model centre of mass
-        modelCOM = float(scaledModel.getOutput('com_position').getValueAsString(modelState).split(',')[1])
-        #Calculate moment residual recommendation
-        momentResidualRec = peakVGRF * modelCOM * 0.01
-        
-        # %% Read in and compare kinematics
-        
-        #Check whether to evaluate kinematics
-        if readAndCheckKinematics:
-        
-            #Create dictionaries to store data from the various tools
-            
-            #Individual cycle data
-            ikKinematics = {run: {cyc: {var: np.zeros(101) for var in kinematicVars} for cyc in cycleList} for run in runList}
-            rraKinematics = {run: {cyc: {var: np.zeros(101) for var in kinematicVars} for cyc in cycleList} for run in runList}
-            rra3Kinematics = {run: {cyc: {var: np.zeros(101) for var in kinematicVars} for cyc in cycleList} for run in runList}
-            mocoKinematics = {run: {cyc: {var: np.zeros(101) for var in kinematicVars} for cyc in cycleList} for run in runList}
-            addBiomechKinematics = {run: {cyc: {var: np.zeros(101) for var in kinematicVars} for cyc in cycleList} for run in runList}
-            
-            #Mean data
-            ikMeanKinematics = {run: {var: np.zeros(101) for var in kinematicVars} for run in runList}
-            rraMeanKinematics = {run: {var: np.zeros(101) for var in kinematicVars} for run in runList}
-            rra3MeanKinematics = {run: {var: np.zeros(101) for var in kinematicVars} for run in runList}
-            mocoMeanKinematics = {run: {var: np.zeros(101) for var in kinematicVars} for run in runList}
-            addBiomechMeanKinematics = {run: {var: np.zeros(101) for var in kinematicVars} for run in runList}
-            
-            #Load in original IK kinematics
-            ikData = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'ik',f'{runName}.mot'))
-            ikTime = np.array(ikData.getIndependentColumn())
-            
-            #Loop through cycles, load and normalise gait cycle to 101 points
-            for cycle in cycleList:
-                
-                #Load RRA kinematics
-                rraData = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'rra',runLabel,cycle,f'{subject}_{runLabel}_{cycle}_Kinematics_q.sto'))
-                rraTime = np.array(rraData.getIndependentColumn())
-                
-                #Load RRA3 kinematics
-                rra3Data = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'rra3',runLabel,'rra3',cycle,f'{subject}_{runLabel}_{cycle}_iter3_Kinematics_q.sto'))
-                rra3Time = np.array(rra3Data.getIndependentColumn())
-                
-                #Load Moco kinematics
-                mocoData = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'moco',runLabel,cycle,f'{subject}_{runLabel}_{cycle}_mocoKinematics.sto'))
-                mocoTime = np.array(mocoData.getIndependentColumn())
-                
-                #Load AddBiomechanics kinematics
-                #Slightly different as able to load these from .csv file
-                addBiomechData = pd.read_csv(os.path.join('..','..','data','HamnerDelp2013',subject,'addBiomechanics',runLabel,'ID',f'{runName}_full.csv'))
-                addBiomechTime = addBiomechData['time'].to_numpy()
-                
-                #Associate start and stop indices to IK data for this cycle
-                
-                #Get times
-                initialTime = rraTime[0]
-                finalTime = rraTime[-1]
-                
-                #Get IK indices
-                initialInd = np.argmax(ikTime > initialTime)
-                finalInd = np.argmax(ikTime > finalTime) - 1
-                
-                #Get AddBiomechanics indices
-                addBiomechStart = np.argmax(addBiomechTime > initialTime)
-                addBiomechStop = np.argmax(addBiomechTime > finalTime) - 1
-                
-                #Loop through kinematic variables to extract
-                for var in kinematicVars:
-                    
-                    #Extract kinematic variable data
-                    #RRA
-                    rraKinematicVar = rraData.getDependentColumn(var).to_numpy()
-                    #RRA3
-                    rra3KinematicVar = rra3Data.getDependentColumn(var).to_numpy()
-                    #Moco
-                    if var in ['pelvis_tx', 'pelvis_ty', 'pelvis_tz']:
-                        mocoKinematicVar = mocoData.getDependentColumn(var).to_numpy()
-                    else:
-                        mocoKinematicVar = np.rad2deg(mocoData.getDependentColumn(var).to_numpy()) #still in radians for joint angles
-                    #AddBiomechanics
-                    if var in ['pelvis_tx', 'pelvis_ty', 'pelvis_tz']:
-                        addBiomechKinematicVar = addBiomechData[f'pos_{var}'].to_numpy()[addBiomechStart:addBiomechStop]
-                    else:
-                        addBiomechKinematicVar = np.rad2deg(addBiomechData[f'pos_{var}'].to_numpy())[addBiomechStart:addBiomechStop] #still in radians for joint angles
-                    
-                    #Get the time cycle for AddBiomechanics data
-                    addBiomechTimeCycle = addBiomechTime[addBiomechStart:addBiomechStop]
-                    
-                    #Extract inverse kinematics over time period
-                    ikKinematicVar = ikData.getDependentColumn(var).to_numpy()[initialInd:finalInd]
-                    ikTimeCycle = ikTime[initialInd:finalInd]
-                    
-                    #Interpolate to 101 points
-                    
-                    #Create interpolation function
-                    rraInterpFunc = interp1d(rraTime, rraKinematicVar)
-                    rra3InterpFunc = interp1d(rra3Time, rra3KinematicVar)
-                    mocoInterpFunc = interp1d(mocoTime, mocoKinematicVar)
-                    addBiomechInterpFunc = interp1d(addBiomechTimeCycle, addBiomechKinematicVar)
-                    ikInterpFunc = interp1d(ikTimeCycle, ikKinematicVar)
-                    
-                    #Interpolate data and store in relevant dictionary
-                    rraKinematics[runLabel][cycle][var] = rraInterpFunc(np.linspace(rraTime[0], rraTime[-1], 101))
-                    rra3Kinematics[runLabel][cycle][var] = rra3InterpFunc(np.linspace(rra3Time[0], rra3Time[-1], 101))
-                    mocoKinematics[runLabel][cycle][var] = mocoInterpFunc(np.linspace(mocoTime[0], mocoTime[-1], 101))
-                    addBiomechKinematics[runLabel][cycle][var] = addBiomechInterpFunc(np.linspace(addBiomechTimeCycle[0], addBiomechTimeCycle[-1], 101))
-                    ikKinematics[runLabel][cycle][var] = ikInterpFunc(np.linspace(ikTimeCycle[0], ikTimeCycle[-1], 101))
-            
-            #Create a plot of the kinematics
+def compileSubjectData(subject):
     
-            #Create the figure
-            fig, ax = plt.subplots(nrows = 11, ncols = 3, figsize = (8,16))
-            
-            #Adjust subplots
-            plt.subplots_adjust(left = 0.075, right = 0.95, bottom = 0.05, top = 0.95,
-                                hspace = 0.4, wspace = 0.5)
-            
-            #Loop through variables and plot data
-            for var in kinematicVars:
-                
-                #Set the appropriate axis
-                plt.sca(ax[kinematicAx[var][0],kinematicAx[var][1]])
-                        
-                #Loop through cycles to plot individual curves
-                for cycle in cycleList:
-                    
-                    #Plot RRA data
-                    plt.plot(np.linspace(0,100,101), rraKinematics[runLabel][cycle][var],
-                             linestyle = '-', lw = 0.5, c = rraCol, alpha = 0.4, zorder = 2)
-                    
-                    #Plot RRA3 data
-                    plt.plot(np.linspace(0,100,101), rra3Kinematics[runLabel][cycle][var],
-                             ls = '-', lw = 0.5, c = rra3Col, alpha = 0.4, zorder = 2)
-                    
-                    #Plot Moco data
-                    plt.plot(np.linspace(0,100,101), mocoKinematics[runLabel][cycle][var],
-                             ls = '-', lw = 0.5, c = mocoCol, alpha = 0.4, zorder = 2)
-                    
-                    #Plot AddBiomechanics data
-                    plt.plot(np.linspace(0,100,101), addBiomechKinematics[runLabel][cycle][var],
-                             ls = '-', lw = 0.5, c = addBiomechCol, alpha = 0.4, zorder = 2)
-                    
-                    #Plot IK data
-                    plt.plot(np.linspace(0,100,101), ikKinematics[runLabel][cycle][var],
-                             ls = '-', lw = 0.5, c = ikCol, alpha = 0.4, zorder = 2)
-                    
-                #Plot mean curves
-                
-                #Calculate mean for current kinematic variable
-                
-                #RRA data
-                rraMeanKinematics[runLabel][var] = np.mean(np.vstack((rraKinematics[runLabel]['cycle1'][var],
-                                                                      rraKinematics[runLabel]['cycle2'][var],
-                                                                      rraKinematics[runLabel]['cycle3'][var])),
-                                                           axis = 0)
-                
-                #RRA3 data
-                rra3MeanKinematics[runLabel][var] = np.mean(np.vstack((rra3Kinematics[runLabel]['cycle1'][var],
-                                                                       rra3Kinematics[runLabel]['cycle2'][var],
-                                                                       rra3Kinematics[runLabel]['cycle3'][var])),
-                                                            axis = 0)
-                
-                #Moco data
-                mocoMeanKinematics[runLabel][var] = np.mean(np.vstack((mocoKinematics[runLabel]['cycle1'][var],
-                                                                       mocoKinematics[runLabel]['cycle2'][var],
-                                                                       mocoKinematics[runLabel]['cycle3'][var])),
-                                                            axis = 0)
-                
-                #AddBiomechanics data
-                addBiomechMeanKinematics[runLabel][var] = np.mean(np.vstack((addBiomechKinematics[runLabel]['cycle1'][var],
-                                                                             addBiomechKinematics[runLabel]['cycle2'][var],
-                                                                             addBiomechKinematics[runLabel]['cycle3'][var])),
-                                                                  axis = 0)
-                
-                #IK data
-                ikMeanKinematics[runLabel][var] = np.mean(np.vstack((ikKinematics[runLabel]['cycle1'][var],
-                                                                     ikKinematics[runLabel]['cycle2'][var],
-                                                                     ikKinematics[runLabel]['cycle3'][var])),
-                                                          axis = 0)
-                
-                #Plot means
-                
-                #Plot RRA mean
-                plt.plot(np.linspace(0,100,101), rraMeanKinematics[runLabel][var],
-                         ls = '-', lw = 1, c = rraCol,
-                         marker = markerDict['rra'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
-                
-                #Plot RRA3 mean
-                plt.plot(np.linspace(0,100,101), rra3MeanKinematics[runLabel][var],
-                         ls = ':', lw = 1, c = rra3Col,
-                         marker = markerDict['rra3'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
-                
-                #Plot Moco mean
-                plt.plot(np.linspace(0,100,101), mocoMeanKinematics[runLabel][var],
-                         ls = '--', lw = 1, c = mocoCol,
-                         marker = markerDict['moco'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
-                
-                #Plot AddBiomechanics mean
-                plt.plot(np.linspace(0,100,101), addBiomechMeanKinematics[runLabel][var],
-                         ls = '--', lw = 1, c = addBiomechCol,
-                         marker = markerDict['addBiomech'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
-                
-                #Plot Ik mean
-                plt.plot(np.linspace(0,100,101), ikMeanKinematics[runLabel][var],
-                         ls = '-', lw = 1, c = ikCol, alpha = 1.0, zorder = 3)
+    """
     
-                #Clean up axis properties
-                
-                #Set x-limits
-                plt.gca().set_xlim([0,100])
-                
-                #Add labels
-                
-                #X-axis (if bottom row)
-                if kinematicAx[var][0] == 10:
-                    plt.gca().set_xlabel('0-100% Gait Cycle', fontsize = 8, fontweight = 'bold')
-                    
-                #Y-axis (dependent on kinematic variable)
-                if var in ['pelvis_tx', 'pevis_ty', 'pelvis_tz']:
-                    plt.gca().set_ylabel('Position (m)', fontsize = 8, fontweight = 'bold')
-                else:
-                    plt.gca().set_ylabel('Joint Angle (\u00b0)', fontsize = 8, fontweight = 'bold')
+    Reads in the simulation outputs for a subject, creates the figures to check
+    them and saves the compiled data to file. This is kept as a function so that
+    subjects can be compiled across worker processes.
+    
+    Input:    subject - subject ID to compile data for
+    
+    Output:   None - the compiled data and figures are saved to the subjects results folder
+    
+    """
+    
+    #Set the subjects data directory and the results directories within it
+    subjectDir = os.path.join(dataDir,subject)
+    outputsDir = os.path.join(subjectDir,'results','outputs')
+    figuresDir = os.path.join(subjectDir,'results','figures')
+    
+    #Check which of the selected steps need to be compiled
+    #A step is skipped if not overwriting and its npz output file already exists
+    compileKinematics = readAndCheckKinematics and (overwriteCompiledData or not os.path.exists(os.path.join(outputsDir,f'{subject}_kinematics.npz')))
+    compileKinetics = readAndCheckKinetics and (overwriteCompiledData or not os.path.exists(os.path.join(outputsDir,f'{subject}_kinetics.npz')))
+    compileResiduals = readAndCheckResiduals and (overwriteCompiledData or not os.path.exists(os.path.join(outputsDir,f'{subject}_residuals.npz')))
+    compileGroundReactions = readAndCheckGroundReactions and (overwriteCompiledData or not os.path.exists(os.path.join(outputsDir,f'{subject}_grfs.npz')))
+    
+    #Exit early if there is nothing left to compile for the subject
+    if not (compileKinematics or compileKinetics or compileResiduals or compileGroundReactions):
+        print(f'Compiled data already exists for {subject}. Skipping...')
+        return
+    
+    #Make sure the results directories exist before anything is saved to them
+    os.makedirs(outputsDir, exist_ok = True)
+    os.makedirs(figuresDir, exist_ok = True)
+    
+    #Get the index of the current run for storing data in arrays
+    runInd = runList.index(runLabel)
+    
+    #Load in the subjects gait timing data
+    with open(os.path.join(subjectDir,'expData','gaitTimes.pkl'), 'rb') as openFile:
+        gaitTimings = pickle.load(openFile)
         
-                #Set title
-                plt.gca().set_title(var.replace('_',' ').title(), pad = 3, fontsize = 10, fontweight = 'bold')
-                    
-                #Add zero-dash line if necessary
-                if plt.gca().get_ylim()[0] < 0 < plt.gca().get_ylim()[-1]:
-                    plt.gca().axhline(y = 0, color = 'dimgrey', linewidth = 0.5, ls = ':', zorder = 1)
-                        
-                #Turn off top-right spines
-                plt.gca().spines['top'].set_visible(False)
-                plt.gca().spines['right'].set_visible(False)
-                
-                #Set axis ticks in
-                plt.gca().tick_params('both', direction = 'in', length = 3)
-                
-                #Set x-ticks at 0, 50 and 100
-                plt.gca().set_xticks([0,50,100])
-                #Remove labels if not on bottom row
-                if kinematicAx[var][1] != 10:
-                    plt.gca().set_xticklabels([])
-                    
-            #Turn off un-used axes
-            ax[3,2].axis('off')
-            ax[5,2].axis('off')
-            ax[8,2].axis('off')
-            ax[10,2].axis('off')
-            
-            #Add figure title
-            fig.suptitle(f'{subject} Kinematics Comparison (IK = Black, RRA = Purple, RRA3 = Pink, Moco = Blue, AddBiomechanics = Gold)',
-                         fontsize = 10, fontweight = 'bold', y = 0.99)
-    
-            #Save figure
-            fig.savefig(os.path.join('..','..','data','HamnerDelp2013',subject,'results','figures',f'{subject}_{runLabel}_kinematicsComparison.png'),
-                        format = 'png', dpi = 300)
-            
-            #Close figure
-            plt.close('all')
-            
-            #Save kinematic data dictionaries
-            #IK data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_ikKinematics.pkl'), 'wb') as writeFile:
-                pickle.dump(ikKinematics, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_ikMeanKinematics.pkl'), 'wb') as writeFile:
-                pickle.dump(ikMeanKinematics, writeFile)
-            #RRA data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rraKinematics.pkl'), 'wb') as writeFile:
-                pickle.dump(rraKinematics, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rraMeanKinematics.pkl'), 'wb') as writeFile:
-                pickle.dump(rraMeanKinematics, writeFile)
-            #RRA3 data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rra3Kinematics.pkl'), 'wb') as writeFile:
-                pickle.dump(rra3Kinematics, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rra3MeanKinematics.pkl'), 'wb') as writeFile:
-                pickle.dump(rra3MeanKinematics, writeFile)
-            #Moco data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_mocoKinematics.pkl'), 'wb') as writeFile:
-                pickle.dump(mocoKinematics, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_mocoMeanKinematics.pkl'), 'wb') as writeFile:
-                pickle.dump(mocoMeanKinematics, writeFile)
-            #AddBiomechanics data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechKinematics.pkl'), 'wb') as writeFile:
-                pickle.dump(addBiomechKinematics, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechMeanKinematics.pkl'), 'wb') as writeFile:
-                pickle.dump(addBiomechMeanKinematics, writeFile)
-            
-            #Calculate RMSD of all tools vs. one another
-            toolList = ['IK', 'RRA', 'RRA3', 'Moco', 'AddBiomechanics']
-            
-            #Create dictionaries for RMSE data (inc. spot for mean data)
-            ikKinematicsRMSE = {tool: {run: {cyc: {var: np.zeros(1) for var in kinematicVars} for cyc in cycleList+['mean']} for run in runList} for tool in toolList}
-            rraKinematicsRMSE = {tool: {run: {cyc: {var: np.zeros(1) for var in kinematicVars} for cyc in cycleList+['mean']} for run in runList} for tool in toolList}
-            rra3KinematicsRMSE = {tool: {run: {cyc: {var: np.zeros(1) for var in kinematicVars} for cyc in cycleList+['mean']} for run in runList} for tool in toolList}
-            mocoKinematicsRMSE = {tool: {run: {cyc: {var: np.zeros(1) for var in kinematicVars} for cyc in cycleList+['mean']} for run in runList} for tool in toolList}
-            addBiomechKinematicsRMSE = {tool: {run: {cyc: {var: np.zeros(1) for var in kinematicVars} for cyc in cycleList+['mean']} for run in runList} for tool in toolList}
-            
-            #Loop through variables
-            for var in kinematicVars:    
-                
-                #Loop through cycles
-                for cycle in cycleList:                    
-                    
-                    #IK vs. all other tools
-                    ikKinematicsRMSE['IK'][runLabel][cycle][var] = np.sqrt(np.mean((ikKinematics[runLabel]['cycle1'][var] - ikKinematics[runLabel]['cycle1'][var])**2))
-                    ikKinematicsRMSE['RRA'][runLabel][cycle][var] = np.sqrt(np.mean((ikKinematics[runLabel]['cycle1'][var] - rraKinematics[runLabel]['cycle1'][var])**2))
-                    ikKinematicsRMSE['RRA3'][runLabel][cycle][var] = np.sqrt(np.mean((ikKinematics[runLabel]['cycle1'][var] - rra3Kinematics[runLabel]['cycle1'][var])**2))
-                    ikKinematicsRMSE['Moco'][runLabel][cycle][var] = np.sqrt(np.mean((ikKinematics[runLabel]['cycle1'][var] - mocoKinematics[runLabel]['cycle1'][var])**2))
-                    ikKinematicsRMSE['AddBiomechanics'][runLabel][cycle][var] = np.sqrt(np.mean((ikKinematics[runLabel]['cycle1'][var] - addBiomechKinematics[runLabel]['cycle1'][var])**2))
-                    
-                    #RRA vs. all other tools
-                    rraKinematicsRMSE['IK'][runLabel][cycle][var] = np.sqrt(np.mean((rraKinematics[runLabel]['cycle1'][var] - ikKinematics[runLabel]['cycle1'][var])**2))
-                    rraKinematicsRMSE['RRA'][runLabel][cycle][var] = np.sqrt(np.mean((rraKinematics[runLabel]['cycle1'][var] - rraKinematics[runLabel]['cycle1'][var])**2))
-                    rraKinematicsRMSE['RRA3'][runLabel][cycle][var] = np.sqrt(np.mean((rraKinematics[runLabel]['cycle1'][var] - rra3Kinematics[runLabel]['cycle1'][var])**2))
-                    rraKinematicsRMSE['Moco'][runLabel][cycle][var] = np.sqrt(np.mean((rraKinematics[runLabel]['cycle1'][var] - mocoKinematics[runLabel]['cycle1'][var])**2))
-                    rraKinematicsRMSE['AddBiomechanics'][runLabel][cycle][var] = np.sqrt(np.mean((rraKinematics[runLabel]['cycle1'][var] - addBiomechKinematics[runLabel]['cycle1'][var])**2))
-                    
-                    #RRA3 vs. all other tools
-                    rra3KinematicsRMSE['IK'][runLabel][cycle][var] = np.sqrt(np.mean((rra3Kinematics[runLabel]['cycle1'][var] - ikKinematics[runLabel]['cycle1'][var])**2))
-                    rra3KinematicsRMSE['RRA'][runLabel][cycle][var] = np.sqrt(np.mean((rra3Kinematics[runLabel]['cycle1'][var] - rraKinematics[runLabel]['cycle1'][var])**2))
-                    rra3KinematicsRMSE['RRA3'][runLabel][cycle][var] = np.sqrt(np.mean((rra3Kinematics[runLabel]['cycle1'][var] - rra3Kinematics[runLabel]['cycle1'][var])**2))
-                    rra3KinematicsRMSE['Moco'][runLabel][cycle][var] = np.sqrt(np.mean((rra3Kinematics[runLabel]['cycle1'][var] - mocoKinematics[runLabel]['cycle1'][var])**2))
-                    rra3KinematicsRMSE['AddBiomechanics'][runLabel][cycle][var] = np.sqrt(np.mean((rra3Kinematics[runLabel]['cycle1'][var] - addBiomechKinematics[runLabel]['cycle1'][var])**2))
-                    
-                    #Moco vs. all other tools
-                    mocoKinematicsRMSE['IK'][runLabel][cycle][var] = np.sqrt(np.mean((mocoKinematics[runLabel]['cycle1'][var] - ikKinematics[runLabel]['cycle1'][var])**2))
-                    mocoKinematicsRMSE['RRA'][runLabel][cycle][var] = np.sqrt(np.mean((mocoKinematics[runLabel]['cycle1'][var] - rraKinematics[runLabel]['cycle1'][var])**2))
-                    mocoKinematicsRMSE['RRA3'][runLabel][cycle][var] = np.sqrt(np.mean((mocoKinematics[runLabel]['cycle1'][var] - rra3Kinematics[runLabel]['cycle1'][var])**2))
-                    mocoKinematicsRMSE['Moco'][runLabel][cycle][var] = np.sqrt(np.mean((mocoKinematics[runLabel]['cycle1'][var] - mocoKinematics[runLabel]['cycle1'][var])**2))
-                    mocoKinematicsRMSE['AddBiomechanics'][runLabel][cycle][var] = np.sqrt(np.mean((mocoKinematics[runLabel]['cycle1'][var] - addBiomechKinematics[runLabel]['cycle1'][var])**2))
-                    
-                    #AddBiomechanics vs. all other tools
-                    addBiomechKinematicsRMSE['IK'][runLabel][cycle][var] = np.sqrt(np.mean((addBiomechKinematics[runLabel]['cycle1'][var] - ikKinematics[runLabel]['cycle1'][var])**2))
-                    addBiomechKinematicsRMSE['RRA'][runLabel][cycle][var] = np.sqrt(np.mean((addBiomechKinematics[runLabel]['cycle1'][var] - rraKinematics[runLabel]['cycle1'][var])**2))
-                    addBiomechKinematicsRMSE['RRA3'][runLabel][cycle][var] = np.sqrt(np.mean((addBiomechKinematics[runLabel]['cycle1'][var] - rra3Kinematics[runLabel]['cycle1'][var])**2))
-                    addBiomechKinematicsRMSE['Moco'][runLabel][cycle][var] = np.sqrt(np.mean((addBiomechKinematics[runLabel]['cycle1'][var] - mocoKinematics[runLabel]['cycle1'][var])**2))
-                    addBiomechKinematicsRMSE['AddBiomechanics'][runLabel][cycle][var] = np.sqrt(np.mean((addBiomechKinematics[runLabel]['cycle1'][var] - addBiomechKinematics[runLabel]['cycle1'][var])**2))
-                
-                #Calculate mean RMSE across all cycles
-                
-                #IK vs. all other tools
-                ikKinematicsRMSE['IK'][runLabel]['mean'][var] = np.mean([ikKinematicsRMSE['IK'][runLabel][cycle][var] for cycle in cycleList])
-                ikKinematicsRMSE['RRA'][runLabel]['mean'][var] = np.mean([ikKinematicsRMSE['RRA'][runLabel][cycle][var] for cycle in cycleList])
-                ikKinematicsRMSE['RRA3'][runLabel]['mean'][var] = np.mean([ikKinematicsRMSE['RRA3'][runLabel][cycle][var] for cycle in cycleList])
-                ikKinematicsRMSE['Moco'][runLabel]['mean'][var] = np.mean([ikKinematicsRMSE['Moco'][runLabel][cycle][var] for cycle in cycleList])
-                ikKinematicsRMSE['AddBiomechanics'][runLabel]['mean'][var] = np.mean([ikKinematicsRMSE['AddBiomechanics'][runLabel][cycle][var] for cycle in cycleList])
-                
-                #RRA vs. all other tools
-                rraKinematicsRMSE['IK'][runLabel]['mean'][var] = np.mean([rraKinematicsRMSE['IK'][runLabel][cycle][var] for cycle in cycleList])
-                rraKinematicsRMSE['RRA'][runLabel]['mean'][var] = np.mean([rraKinematicsRMSE['RRA'][runLabel][cycle][var] for cycle in cycleList])
-                rraKinematicsRMSE['RRA3'][runLabel]['mean'][var] = np.mean([rraKinematicsRMSE['RRA3'][runLabel][cycle][var] for cycle in cycleList])
-                rraKinematicsRMSE['Moco'][runLabel]['mean'][var] = np.mean([rraKinematicsRMSE['Moco'][runLabel][cycle][var] for cycle in cycleList])
-                rraKinematicsRMSE['AddBiomechanics'][runLabel]['mean'][var] = np.mean([rraKinematicsRMSE['AddBiomechanics'][runLabel][cycle][var] for cycle in cycleList])
-                
-                #RRA3 vs. all other tools
-                rra3KinematicsRMSE['IK'][runLabel]['mean'][var] = np.mean([rra3KinematicsRMSE['IK'][runLabel][cycle][var] for cycle in cycleList])
-                rra3KinematicsRMSE['RRA'][runLabel]['mean'][var] = np.mean([rra3KinematicsRMSE['RRA'][runLabel][cycle][var] for cycle in cycleList])
-                rra3KinematicsRMSE['RRA3'][runLabel]['mean'][var] = np.mean([rra3KinematicsRMSE['RRA3'][runLabel][cycle][var] for cycle in cycleList])
-                rra3KinematicsRMSE['Moco'][runLabel]['mean'][var] = np.mean([rra3KinematicsRMSE['Moco'][runLabel][cycle][var] for cycle in cycleList])
-                rra3KinematicsRMSE['AddBiomechanics'][runLabel]['mean'][var] = np.mean([rra3KinematicsRMSE['AddBiomechanics'][runLabel][cycle][var] for cycle in cycleList])
-                
-                #Moco vs. all other tools
-                mocoKinematicsRMSE['IK'][runLabel]['mean'][var] = np.mean([mocoKinematicsRMSE['IK'][runLabel][cycle][var] for cycle in cycleList])
-                mocoKinematicsRMSE['RRA'][runLabel]['mean'][var] = np.mean([mocoKinematicsRMSE['RRA'][runLabel][cycle][var] for cycle in cycleList])
-                mocoKinematicsRMSE['RRA3'][runLabel]['mean'][var] = np.mean([mocoKinematicsRMSE['RRA3'][runLabel][cycle][var] for cycle in cycleList])
-                mocoKinematicsRMSE['Moco'][runLabel]['mean'][var] = np.mean([mocoKinematicsRMSE['Moco'][runLabel][cycle][var] for cycle in cycleList])
-                mocoKinematicsRMSE['AddBiomechanics'][runLabel]['mean'][var] = np.mean([mocoKinematicsRMSE['AddBiomechanics'][runLabel][cycle][var] for cycle in cycleList])
-                
-                #AddBiomechanics vs. all other tools
-                addBiomechKinematicsRMSE['IK'][runLabel]['mean'][var] = np.mean([addBiomechKinematicsRMSE['IK'][runLabel][cycle][var] for cycle in cycleList])
-                addBiomechKinematicsRMSE['RRA'][runLabel]['mean'][var] = np.mean([addBiomechKinematicsRMSE['RRA'][runLabel][cycle][var] for cycle in cycleList])
-                addBiomechKinematicsRMSE['RRA3'][runLabel]['mean'][var] = np.mean([addBiomechKinematicsRMSE['RRA3'][runLabel][cycle][var] for cycle in cycleList])
-                addBiomechKinematicsRMSE['Moco'][runLabel]['mean'][var] = np.mean([addBiomechKinematicsRMSE['Moco'][runLabel][cycle][var] for cycle in cycleList])
-                addBiomechKinematicsRMSE['AddBiomechanics'][runLabel]['mean'][var] = np.mean([addBiomechKinematicsRMSE['AddBiomechanics'][runLabel][cycle][var] for cycle in cycleList])
-    
-            #Save kinematic RMSE data dictionaries
-            #IK
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_ikKinematicsRMSE.pkl'), 'wb') as writeFile:
-                pickle.dump(ikKinematicsRMSE, writeFile)
+    #Calculate residual force and moment recommendations based on original experimental data
+    #Force residual recommendations are 5% of maximum external force
+    #Moment residual recommendations are 1% of COM height * maximum external force
+    
+    #Read in external GRF and get peak force residual recommendation
+    expGRFTime, expGRFCols, expGRFData = helper.getTableData(os.path.join(subjectDir,'expData',f'{runName}_grf.mot'))
+    peakVGRF = expGRFData[:,[expGRFCols['R_ground_force_vy'], expGRFCols['L_ground_force_vy']]].max()
+    forceResidualRec = peakVGRF * 0.05
+    
+    #Extract centre of mass from static output
+    #Load in scaled model
+    scaledModel = osim.Model(os.path.join(subjectDir,'model',f'{subject}_adjusted_scaled.osim'))
+    modelState = scaledModel.initSystem()
+    #Read in static motion output
+    staticTime, staticCols, staticData = helper.getTableData(os.path.join(subjectDir,'model',f'{subject}_static_output.mot'))
+    #Set model to joint coordinates from static output
+    coordSet = scaledModel.updCoordinateSet()
+    for coord in kinematicAx.keys():
+        #Get the coordinate and absolute path to its value in static output
+        modelCoord = coordSet.get(coord)
+        jointPath = modelCoord.getAbsolutePathString()+'/value'
+        #Get value from static output
+        staticCoordVal = staticData[0,staticCols[jointPath]]
+        #Set value in model
+        modelCoord.setValue(modelState, staticCoordVal)
+    #Realise model to position
+    scaledModel.realizePosition(modelState)
+    #Get model centre of mass
+    modelCOM = float(scaledModel.getOutput('com_position').getValueAsString(modelState).split(',')[1])
+    #Calculate moment residual recommendation
+    momentResidualRec = peakVGRF * modelCOM * 0.01
+    
+    # %% Read in and compare kinematics
+    
+    #Check whether to evaluate kinematics
+    if compileKinematics:
+    
+        #Create arrays to store data from the various tools
+        #Each array is indexed by run, cycle, variable and time
+        #These are converted back to dictionaries by label when saving
+        ikKinematics = np.zeros((len(runList), len(cycleList), len(kinematicVars), 101))
+        rraKinematics = np.zeros((len(runList), len(cycleList), len(kinematicVars), 101))
+        rra3Kinematics = np.zeros((len(runList), len(cycleList), len(kinematicVars), 101))
+        mocoKinematics = np.zeros((len(runList), len(cycleList), len(kinematicVars), 101))
+        addBiomechKinematics = np.zeros((len(runList), len(cycleList), len(kinematicVars), 101))
+        
+        #Identify the joint angle variables (i.e. not pelvis translations)
+        #These need converting to degrees for some tools
+        #A scale factor for each variable is used so the conversion can be done in place
+        kinematicDegScale = np.array([1.0 if var in ['pelvis_tx', 'pelvis_ty', 'pelvis_tz'] else 180.0 / np.pi for var in kinematicVars])
+        
+        #Load in original IK kinematics
+        ikTime, ikCols, ikData = helper.getTableData(os.path.join(subjectDir,'ik',f'{runName}.mot'))
+        
+        #Load AddBiomechanics kinematics
+        #Slightly different as able to load these from .csv file
+        #This covers the whole trial so is only read once, and only the time and
+        #kinematic variable columns are read in
+        addBiomechData = pd.read_csv(os.path.join(subjectDir,'addBiomechanics',runLabel,'ID',f'{runName}_full.csv'),
+                                     usecols = ['time']+[f'pos_{var}' for var in kinematicVars])
+        addBiomechTime = addBiomechData['time'].to_numpy()
+        #Joint angles are still in radians
+        addBiomechTrialKinematics = addBiomechData[[f'pos_{var}' for var in kinematicVars]].to_numpy(copy = True)
+        addBiomechTrialKinematics *= kinematicDegScale
+        
+        #Loop through cycles, load and normalise gait cycle to 101 points
+        for cycleInd, cycle in enumerate(cycleList):
+            
+            #Load RRA kinematics
+            rraTime, rraCols, rraData = helper.getTableData(os.path.join(subjectDir,'rra',runLabel,cycle,f'{subject}_{runLabel}_{cycle}_Kinematics_q.sto'))
+            
+            #Load RRA3 kinematics
+            rra3Time, rra3Cols, rra3Data = helper.getTableData(os.path.join(subjectDir,'rra3',runLabel,'rra3',cycle,f'{subject}_{runLabel}_{cycle}_iter3_Kinematics_q.sto'))
+            
+            #Load Moco kinematics
+            mocoTime, mocoCols, mocoData = helper.getTableData(os.path.join(subjectDir,'moco',runLabel,cycle,f'{subject}_{runLabel}_{cycle}_mocoKinematics.sto'))
+            
+            #Associate start and stop indices to IK data for this cycle
+            
+            #Get times
+            initialTime = rraTime[0]
+            finalTime = rraTime[-1]
+            
+            #Get IK indices
+            #The time arrays are sorted so these can be found with a binary search
+            initialInd = np.searchsorted(ikTime, initialTime, side = 'right')
+            finalInd = np.searchsorted(ikTime, finalTime, side = 'right') - 1
+            
+            #Get AddBiomechanics indices
+            addBiomechStart = np.searchsorted(addBiomechTime, initialTime, side = 'right')
+            addBiomechStop = np.searchsorted(addBiomechTime, finalTime, side = 'right') - 1
+            
+            #Extract the kinematic variables from each tool as time x variable arrays
             #RRA
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rraKinematicsRMSE.pkl'), 'wb') as writeFile:
-                pickle.dump(rraKinematicsRMSE, writeFile)
+            rraKinematicData = rraData[:,[rraCols[var] for var in kinematicVars]]
             #RRA3
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rra3KinematicsRMSE.pkl'), 'wb') as writeFile:
-                pickle.dump(rra3KinematicsRMSE, writeFile)
-            #Moco data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_mocoKinematicsRMSE.pkl'), 'wb') as writeFile:
-                pickle.dump(mocoKinematicsRMSE, writeFile)
-            #AddBiomechanics data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechKinematicsRMSE.pkl'), 'wb') as writeFile:
-                pickle.dump(addBiomechKinematicsRMSE, writeFile)
-        
-        # %% Read in and compare kinetics
-        
-        #Check whether to evaluate kinetics
-        if readAndCheckKinetics:
-            
-            #Create dictionaries to store data from the various tools
-            
-            #Individual cycle data
-            ikKinetics = {run: {cyc: {var: np.zeros(101) for var in kineticVars} for cyc in cycleList} for run in runList}
-            rraKinetics = {run: {cyc: {var: np.zeros(101) for var in kineticVars} for cyc in cycleList} for run in runList}
-            rra3Kinetics = {run: {cyc: {var: np.zeros(101) for var in kineticVars} for cyc in cycleList} for run in runList}
-            mocoKinetics = {run: {cyc: {var: np.zeros(101) for var in kineticVars} for cyc in cycleList} for run in runList}
-            addBiomechKinetics = {run: {cyc: {var: np.zeros(101) for var in kineticVars} for cyc in cycleList} for run in runList}
-            
-            #Mean data
-            ikMeanKinetics = {run: {var: np.zeros(101) for var in kineticVars} for run in runList}
-            rraMeanKinetics = {run: {var: np.zeros(101) for var in kineticVars} for run in runList}
-            rra3MeanKinetics = {run: {var: np.zeros(101) for var in kineticVars} for run in runList}
-            mocoMeanKinetics = {run: {var: np.zeros(101) for var in kineticVars} for run in runList}
-            addBiomechMeanKinetics = {run: {var: np.zeros(101) for var in kineticVars} for run in runList}
-    
-            #Loop through cycles, load and normalise gait cycle to 101 points
-            for cycle in cycleList:
-                
-                #Load RRA kinetics
-                rraData = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'rra',runLabel,cycle,f'{subject}_{runLabel}_{cycle}_Actuation_force.sto'))
-                rraTime = np.array(rraData.getIndependentColumn())
-                
-                #Load RRA3 kinetics
-                rra3Data = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'rra3',runLabel,'rra3',cycle,f'{subject}_{runLabel}_{cycle}_iter3_Actuation_force.sto'))
-                rra3Time = np.array(rra3Data.getIndependentColumn())
-                
-                #Load Moco kinetics
-                mocoData = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'moco',runLabel,cycle,f'{subject}_{runLabel}_{cycle}_mocoSolution.sto'))
-                mocoTime = np.array(mocoData.getIndependentColumn())
-                
-                #Load AddBiomechanics kinetics
-                #Slightly different as able to load these from .csv file
-                addBiomechData = pd.read_csv(os.path.join('..','..','data','HamnerDelp2013',subject,'addBiomechanics',runLabel,'ID',f'{runName}_full.csv'))
-                addBiomechTime = addBiomechData['time'].to_numpy()
-                
-                #Associate start and stop indices to IK data for this cycle
-                
-                #Get times
-                initialTime = rraTime[0]
-                finalTime = rraTime[-1]
-                
-                #Get AddBiomechanics indices
-                addBiomechStart = np.argmax(addBiomechTime > initialTime)
-                addBiomechStop = np.argmax(addBiomechTime > finalTime) - 1
-                
-                #Loop through kinetic variables to extract
-                for var in kineticVars:
-                    
-                    #Extract kinetic variable data
-                    #RRA
-                    rraKineticVar = rraData.getDependentColumn(var).to_numpy()
-                    #RRA3
-                    rra3KineticVar = rra3Data.getDependentColumn(var).to_numpy()
-                    #Moco
-                    #Requires full path to forceset and multiply by optimal force
-                    mocoKineticVar = mocoData.getDependentColumn(f'/forceset/{var}_actuator').to_numpy() * rraActuators[var]
-                    #AddBiomechanics
-                    addBiomechKineticVar = addBiomechData[f'tau_{var}'].to_numpy()[addBiomechStart:addBiomechStop]
-                    
-                    #Get the time cycle for AddBiomechanics data
-                    addBiomechTimeCycle = addBiomechTime[addBiomechStart:addBiomechStop]
-    
-                    #Interpolate to 101 points
-                    
-                    #Create interpolation function
-                    rraInterpFunc = interp1d(rraTime, rraKineticVar)
-                    rra3InterpFunc = interp1d(rra3Time, rra3KineticVar)
-                    mocoInterpFunc = interp1d(mocoTime, mocoKineticVar)
-                    addBiomechInterpFunc = interp1d(addBiomechTimeCycle, addBiomechKineticVar)
-                    
-                    #Interpolate data and store in relevant dictionary
-                    rraKinetics[runLabel][cycle][var] = rraInterpFunc(np.linspace(rraTime[0], rraTime[-1], 101))
-                    rra3Kinetics[runLabel][cycle][var] = rra3InterpFunc(np.linspace(rra3Time[0], rra3Time[-1], 101))
-                    mocoKinetics[runLabel][cycle][var] = mocoInterpFunc(np.linspace(mocoTime[0], mocoTime[-1], 101))
-                    addBiomechKinetics[runLabel][cycle][var] = addBiomechInterpFunc(np.linspace(addBiomechTimeCycle[0], addBiomechTimeCycle[-1], 101))
-            
-            #Create a plot of the kinetics
-            
-            #Create the figure
-            fig, ax = plt.subplots(nrows = 9, ncols = 3, figsize = (8,12))
+            rra3KinematicData = rra3Data[:,[rra3Cols[var] for var in kinematicVars]]
+            #Moco
+            #Joint angles are still in radians
+            mocoKinematicData = mocoData[:,[mocoCols[var] for var in kinematicVars]]
+            mocoKinematicData *= kinematicDegScale
+            #AddBiomechanics
+            addBiomechKinematicData = addBiomechTrialKinematics[addBiomechStart:addBiomechStop]
+            
+            #Get the time cycle for AddBiomechanics data
+            addBiomechTimeCycle = addBiomechTime[addBiomechStart:addBiomechStop]
+            
+            #Extract inverse kinematics over time period
+            ikKinematicData = ikData[initialInd:finalInd,[ikCols[var] for var in kinematicVars]]
+            ikTimeCycle = ikTime[initialInd:finalInd]
+            
+            #Interpolate data to 101 points and store in relevant array
+            rraKinematics[runInd,cycleInd] = helper.resampleData(rraTime, rraKinematicData).T
+            rra3Kinematics[runInd,cycleInd] = helper.resampleData(rra3Time, rra3KinematicData).T
+            mocoKinematics[runInd,cycleInd] = helper.resampleData(mocoTime, mocoKinematicData).T
+            addBiomechKinematics[runInd,cycleInd] = helper.resampleData(addBiomechTimeCycle, addBiomechKinematicData).T
+            ikKinematics[runInd,cycleInd] = helper.resampleData(ikTimeCycle, ikKinematicData).T
+        
+        #Calculate mean across cycles for each run
+        #These are indexed by run, variable and time
+        ikMeanKinematics = ikKinematics.mean(axis = 1)
+        rraMeanKinematics = rraKinematics.mean(axis = 1)
+        rra3MeanKinematics = rra3Kinematics.mean(axis = 1)
+        mocoMeanKinematics = mocoKinematics.mean(axis = 1)
+        addBiomechMeanKinematics = addBiomechKinematics.mean(axis = 1)
+        
+        #Create a plot of the kinematics
+
+        #Create the figure if it hasn't already been created in this process
+        if 'kinematics' not in compileFigures:
+            compileFigures['kinematics'] = plt.subplots(nrows = 11, ncols = 3, figsize = (8,16))
             
             #Adjust subplots
-            plt.subplots_adjust(left = 0.075, right = 0.95, bottom = 0.05, top = 0.95,
-                                hspace = 0.4, wspace = 0.5)
+            compileFigures['kinematics'][0].subplots_adjust(left = 0.075, right = 0.95, bottom = 0.05, top = 0.95,
+                                                            hspace = 0.4, wspace = 0.5)
+        
+        #Get the figure and clear any axes from a previous subject
+        fig, ax = compileFigures['kinematics']
+        for axis in ax.flat:
+            axis.cla()
+        
+        #Loop through variables and plot data
+        for varInd, var in enumerate(kinematicVars):
             
-            #Loop through variables and plot data
-            for var in kineticVars:
-                
-                #Set the appropriate axis
-                plt.sca(ax[kineticAx[var][0],kineticAx[var][1]])
-                        
-                #Loop through cycles to plot individual curves
-                for cycle in cycleList:
-                    
-                    #Plot RRA data
-                    plt.plot(np.linspace(0,100,101), rraKinetics[runLabel][cycle][var],
-                             ls = '-', lw = 0.5, c = rraCol, alpha = 0.4, zorder = 2)
-                    
-                    #Plot RRA3 data
-                    plt.plot(np.linspace(0,100,101), rra3Kinetics[runLabel][cycle][var],
-                             ls = '-', lw = 0.5, c = rra3Col, alpha = 0.4, zorder = 2)
-                    
-                    #Plot Moco data
-                    plt.plot(np.linspace(0,100,101), mocoKinetics[runLabel][cycle][var],
-                             ls = '-', lw = 0.5, c = mocoCol, alpha = 0.4, zorder = 2)
-                    
-                    #Plot AddBiomechanics data
-                    plt.plot(np.linspace(0,100,101), addBiomechKinetics[runLabel][cycle][var],
-                             ls = '-', lw = 0.5, c = addBiomechCol, alpha = 0.4, zorder = 2)
-                    
-                #Plot mean curves
-                
-                #Calculate mean for current kinetic variable
-                
-                #RRA data
-                rraMeanKinetics[runLabel][var] = np.mean(np.vstack((rraKinetics[runLabel]['cycle1'][var],
-                                                                    rraKinetics[runLabel]['cycle2'][var],
-                                                                    rraKinetics[runLabel]['cycle3'][var])),
-                                                         axis = 0)
-                
-                #RRA3 data
-                rra3MeanKinetics[runLabel][var] = np.mean(np.vstack((rra3Kinetics[runLabel]['cycle1'][var],
-                                                                     rra3Kinetics[runLabel]['cycle2'][var],
-                                                                     rra3Kinetics[runLabel]['cycle3'][var])),
-                                                          axis = 0)
-                
-                #Moco data
-                mocoMeanKinetics[runLabel][var] = np.mean(np.vstack((mocoKinetics[runLabel]['cycle1'][var],
-                                                                     mocoKinetics[runLabel]['cycle2'][var],
-                                                                     mocoKinetics[runLabel]['cycle3'][var])),
-                                                          axis = 0)
-                
-                #AddBiomechanics data
-                addBiomechMeanKinetics[runLabel][var] = np.mean(np.vstack((addBiomechKinetics[runLabel]['cycle1'][var],
-                                                                           addBiomechKinetics[runLabel]['cycle2'][var],
-                                                                           addBiomechKinetics[runLabel]['cycle3'][var])),
-                                                                axis = 0)
-                
-                #Plot means
-                
-                #Plot RRA mean
-                plt.plot(np.linspace(0,100,101), rraMeanKinetics[runLabel][var],
-                         ls = '-', lw = 1, c = rraCol,
-                         marker = markerDict['rra'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
-                
-                #Plot RRA3 mean
-                plt.plot(np.linspace(0,100,101), rra3MeanKinetics[runLabel][var],
-                         ls = ':', lw = 1, c = rra3Col,
-                         marker = markerDict['rra3'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
+            #Get the appropriate axis
+            varAx = ax[kinematicAx[var][0],kinematicAx[var][1]]
+                    
+            #Plot individual cycle curves for all tools as a single collection
+            #The curves are ordered by tool (RRA, RRA3, Moco, AddBiomechanics, IK) then cycle
+            cycleCurves = np.concatenate([toolKinematics[runInd,:,varInd] for toolKinematics in [rraKinematics, rra3Kinematics, mocoKinematics, addBiomechKinematics, ikKinematics]])
+            varAx.add_collection(LineCollection(np.stack((np.broadcast_to(gaitCyclePoints, cycleCurves.shape), cycleCurves), axis = -1),
+                                                colors = np.repeat([rraCol, rra3Col, mocoCol, addBiomechCol, ikCol], len(cycleList)),
+                                                **cycleCollectionStyle))
+            
+            #Make sure the axis limits account for the collection
+            varAx.autoscale_view()
                 
-                #Plot Moco mean
-                plt.plot(np.linspace(0,100,101), mocoMeanKinetics[runLabel][var],
-                         ls = '--', lw = 1, c = mocoCol,
-                         marker = markerDict['moco'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
+            #Plot mean curves
+            
+            #Plot RRA mean
+            varAx.plot(gaitCyclePoints, rraMeanKinematics[runInd,varInd], **meanLineStyles['rra'])
+            
+            #Plot RRA3 mean
+            varAx.plot(gaitCyclePoints, rra3MeanKinematics[runInd,varInd], **meanLineStyles['rra3'])
+            
+            #Plot Moco mean
+            varAx.plot(gaitCyclePoints, mocoMeanKinematics[runInd,varInd], **meanLineStyles['moco'])
+            
+            #Plot AddBiomechanics mean
+            varAx.plot(gaitCyclePoints, addBiomechMeanKinematics[runInd,varInd], **meanLineStyles['addBiomech'])
+            
+            #Plot Ik mean
+            varAx.plot(gaitCyclePoints, ikMeanKinematics[runInd,varInd], **meanLineStyles['ik'])
+
+            #Clean up axis properties
+            
+            #Set x-limits
+            varAx.set_xlim([0,100])
+            
+            #Add labels
+            
+            #X-axis (if bottom row)
+            if kinematicAx[var][0] == 10:
+                varAx.set_xlabel('0-100% Gait Cycle', fontsize = 8, fontweight = 'bold')
                 
-                #Plot AddBiomechanics mean
-                plt.plot(np.linspace(0,100,101), addBiomechMeanKinetics[runLabel][var],
-                         ls = '--', lw = 1, c = addBiomechCol,
-                         marker = markerDict['addBiomech'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
+            #Y-axis (dependent on kinematic variable)
+            if var in ['pelvis_tx', 'pevis_ty', 'pelvis_tz']:
+                varAx.set_ylabel('Position (m)', fontsize = 8, fontweight = 'bold')
+            else:
+                varAx.set_ylabel('Joint Angle (\u00b0)', fontsize = 8, fontweight = 'bold')
     
-                #Clean up axis properties
+            #Set title
+            varAx.set_title(var.replace('_',' ').title(), pad = 3, fontsize = 10, fontweight = 'bold')
                 
-                #Set x-limits
-                plt.gca().set_xlim([0,100])
-                
-                #Add labels
-                
-                #X-axis (if bottom row)
-                if kineticAx[var][0] == 8:
-                    plt.gca().set_xlabel('0-100% Gait Cycle', fontsize = 8, fontweight = 'bold')
-                    
-                #Y-axis
-                plt.gca().set_ylabel('Joint Torque (Nm)', fontsize = 8, fontweight = 'bold')
-        
-                #Set title
-                plt.gca().set_title(var.replace('_',' ').title()+' Torque', pad = 3, fontsize = 10, fontweight = 'bold')
+            #Add zero-dash line if necessary
+            if varAx.get_ylim()[0] < 0 < varAx.get_ylim()[-1]:
+                varAx.axhline(y = 0, color = 'dimgrey', linewidth = 0.5, ls = ':', zorder = 1)
                     
-                #Add zero-dash line if necessary
-                if plt.gca().get_ylim()[0] < 0 < plt.gca().get_ylim()[-1]:
-                    plt.gca().axhline(y = 0, color = 'dimgrey', linewidth = 0.5, ls = ':', zorder = 1)
-                        
-                #Turn off top-right spines
-                plt.gca().spines['top'].set_visible(False)
-                plt.gca().spines['right'].set_visible(False)
-                
-                #Set axis ticks in
-                plt.gca().tick_params('both', direction = 'in', length = 3)
+            #Turn off top-right spines
+            varAx.spines['top'].set_visible(False)
+            varAx.spines['right'].set_visible(False)
+            
+            #Set axis ticks in
+            varAx.tick_params('both', direction = 'in', length = 3)
+            
+            #Set x-ticks at 0, 50 and 100
+            varAx.set_xticks([0,50,100])
+            #Remove labels if not on bottom row
+            if kinematicAx[var][1] != 10:
+                varAx.set_xticklabels([])
                 
-                #Set x-ticks at 0, 50 and 100
-                plt.gca().set_xticks([0,50,100])
-                #Remove labels if not on bottom row
-                if kinematicAx[var][1] != 8:
-                    plt.gca().set_xticklabels([])
-                    
-            #Turn off un-used axes
-            ax[1,2].axis('off')
-            ax[3,2].axis('off')
-            ax[6,2].axis('off')
-            ax[8,2].axis('off')
-            
-            #Add figure title
-            fig.suptitle(f'{subject} Kinetics Comparison (RRA = Purple, RRA3 = Pink, Moco = Blue, AddBiomechanics = Gold)',
-                         fontsize = 10, fontweight = 'bold', y = 0.99)
-    
-            #Save figure
-            fig.savefig(os.path.join('..','..','data','HamnerDelp2013',subject,'results','figures',f'{subject}_{runLabel}_kineticsComparison.png'),
-                        format = 'png', dpi = 300)
-            
-            #Close figure
-            plt.close('all')
-            
-            #Save kinetic data dictionaries
-            #RRA data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rraKinetics.pkl'), 'wb') as writeFile:
-                pickle.dump(rraKinetics, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rraMeanKinetics.pkl'), 'wb') as writeFile:
-                pickle.dump(rraMeanKinetics, writeFile)
-            #RRA3 data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rra3Kinetics.pkl'), 'wb') as writeFile:
-                pickle.dump(rra3Kinetics, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rra3MeanKinetics.pkl'), 'wb') as writeFile:
-                pickle.dump(rra3MeanKinetics, writeFile)
-            #Moco data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_mocoKinetics.pkl'), 'wb') as writeFile:
-                pickle.dump(mocoKinetics, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_mocoMeanKinetics.pkl'), 'wb') as writeFile:
-                pickle.dump(mocoMeanKinetics, writeFile)
-            #AddBiomechanics data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechKinetics.pkl'), 'wb') as writeFile:
-                pickle.dump(addBiomechKinetics, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechMeanKinetics.pkl'), 'wb') as writeFile:
-                pickle.dump(addBiomechMeanKinetics, writeFile)
+        #Turn off un-used axes
+        ax[3,2].axis('off')
+        ax[5,2].axis('off')
+        ax[8,2].axis('off')
+        ax[10,2].axis('off')
         
-        # %% Read in and compare residuals
-        
-        #Check whether to evaluate residuals
-        if readAndCheckResiduals:
+        #Add figure title
+        fig.suptitle(f'{subject} Kinematics Comparison (IK = Black, RRA = Purple, RRA3 = Pink, Moco = Blue, AddBiomechanics = Gold)',
+                     fontsize = 10, fontweight = 'bold', y = 0.99)
+
+        #Save figure
+        #This is a check figure of thin lines, so a lower resolution and the fastest
+        #compression level are used to speed up rendering and writing
+        fig.savefig(os.path.join(figuresDir,f'{subject}_{runLabel}_kinematicsComparison.png'),
+                    format = 'png', dpi = checkFigureDpi, pil_kwargs = {'compress_level': 1})
+        
+        #Calculate RMSD of all tools vs. one another
+        toolList = ['IK', 'RRA', 'RRA3', 'Moco', 'AddBiomechanics']
+        
+        #Stack the kinematics into a single tool x cycle x variable x time array
+        #The tools are stacked in the same order as the tool list
+        toolKinematics = np.stack([toolData[runInd] for toolData in [ikKinematics, rraKinematics, rra3Kinematics, mocoKinematics, addBiomechKinematics]])
+        
+        #Calculate RMSE of each tool vs. all other tools for each cycle and variable
+        #This gives a tool x tool x cycle x variable array
+        #RMSE is symmetric and zero for a tool vs. itself, so only the unique pairs of
+        #tools are calculated and then mirrored
+        kinematicsRMSE = np.zeros((len(toolList), len(toolList)) + toolKinematics.shape[1:3])
+        toolIndA, toolIndB = np.triu_indices(len(toolList), k = 1)
+        #The squared differences are summed over time with einsum to avoid creating
+        #another temporary array the size of the differences
+        kinematicsDiff = toolKinematics[toolIndA] - toolKinematics[toolIndB]
+        kinematicsRMSE[toolIndA,toolIndB] = np.sqrt(np.einsum('...i,...i->...', kinematicsDiff, kinematicsDiff) / kinematicsDiff.shape[-1])
+        kinematicsRMSE[toolIndB,toolIndA] = kinematicsRMSE[toolIndA,toolIndB]
+        
+        #Calculate mean RMSE across all cycles and add as an extra cycle
+        kinematicsRMSE = np.concatenate((kinematicsRMSE, kinematicsRMSE.mean(axis = 2, keepdims = True)), axis = 2)
+        
+        #Save the kinematic and RMSE arrays together in a single compressed numpy file
+        #The tool, run, cycle and variable labels for each axis are stored alongside these
+        #Note that the RMSE array is tool x tool x cycle (inc. mean) x variable for the current run
+        np.savez_compressed(os.path.join(outputsDir,f'{subject}_kinematics.npz'),
+                            tools = np.array(['ik', 'rra', 'rra3', 'moco', 'addBiomech']),
+                            runs = np.array(runList), cycles = np.array(cycleList),
+                            rmseCycles = np.array(cycleList+['mean']),
+                            variables = np.array(kinematicVars),
+                            kinematics = np.stack((ikKinematics, rraKinematics, rra3Kinematics, mocoKinematics, addBiomechKinematics)),
+                            meanKinematics = np.stack((ikMeanKinematics, rraMeanKinematics, rra3MeanKinematics, mocoMeanKinematics, addBiomechMeanKinematics)),
+                            kinematicsRMSE = kinematicsRMSE)
+    
+    # %% Read in and compare kinetics
+    
+    #Check whether to evaluate kinetics
+    if compileKinetics:
+        
+        #Create arrays to store data from the various tools
+        #Each array is indexed by run, cycle, variable and time
+        #These are converted back to dictionaries by label when saving
+        rraKinetics = np.zeros((len(runList), len(cycleList), len(kineticVars), 101))
+        rra3Kinetics = np.zeros((len(runList), len(cycleList), len(kineticVars), 101))
+        mocoKinetics = np.zeros((len(runList), len(cycleList), len(kineticVars), 101))
+        addBiomechKinetics = np.zeros((len(runList), len(cycleList), len(kineticVars), 101))
+        
+        #Load AddBiomechanics kinetics
+        #Slightly different as able to load these from .csv file
+        #These are read once for all cycles, only taking the time and kinetic variables
+        addBiomechData = pd.read_csv(os.path.join(subjectDir,'addBiomechanics',runLabel,'ID',f'{runName}_full.csv'),
+                                     usecols = ['time']+[f'tau_{var}' for var in kineticVars])
+        addBiomechTime = addBiomechData['time'].to_numpy()
+        addBiomechTrialKinetics = addBiomechData[[f'tau_{var}' for var in kineticVars]].to_numpy()
+        
+        #Set the Moco actuator labels and the optimal forces to scale them by
+        #These are the same for each cycle so only need to be created once
+        mocoKineticLabels = [f'/forceset/{var}_actuator' for var in kineticVars]
+        mocoKineticScale = np.array([rraActuators[var] for var in kineticVars])
+
+        #Loop through cycles, load and normalise gait cycle to 101 points
+        for cycleInd, cycle in enumerate(cycleList):
             
-            #Create dictionaries to store data from the various tools
+            #Load RRA kinetics
+            rraTime, rraCols, rraData = helper.getTableData(os.path.join(subjectDir,'rra',runLabel,cycle,f'{subject}_{runLabel}_{cycle}_Actuation_force.sto'))
             
-            #Individual cycle data
-            rraResiduals = {run: {cyc: {var: np.zeros(101) for var in residualVars} for cyc in cycleList} for run in runList}
-            rra3Residuals = {run: {cyc: {var: np.zeros(101) for var in residualVars} for cyc in cycleList} for run in runList}
-            mocoResiduals = {run: {cyc: {var: np.zeros(101) for var in residualVars} for cyc in cycleList} for run in runList}
-            addBiomechResiduals = {run: {cyc: {var: np.zeros(101) for var in residualVars} for cyc in cycleList} for run in runList}
+            #Load RRA3 kinetics
+            rra3Time, rra3Cols, rra3Data = helper.getTableData(os.path.join(subjectDir,'rra3',runLabel,'rra3',cycle,f'{subject}_{runLabel}_{cycle}_iter3_Actuation_force.sto'))
             
-            #Mean data
-            rraMeanResiduals = {run: {var: np.zeros(101) for var in residualVars} for run in runList}
-            rra3MeanResiduals = {run: {var: np.zeros(101) for var in residualVars} for run in runList}
-            mocoMeanResiduals = {run: {var: np.zeros(101) for var in residualVars} for run in runList}
-            addBiomechMeanResiduals = {run: {var: np.zeros(101) for var in residualVars} for run in runList}
+            #Load Moco kinetics
+            mocoTime, mocoCols, mocoData = helper.getTableData(os.path.join(subjectDir,'moco',runLabel,cycle,f'{subject}_{runLabel}_{cycle}_mocoSolution.sto'))
             
-            #Loop through cycles, load and normalise gait cycle to 101 points
-            for cycle in cycleList:
-                
-                #Load RRA body forces
-                rraData = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'rra',runLabel,cycle,f'{subject}_{runLabel}_{cycle}_bodyForces.sto'))
-                rraTime = np.array(rraData.getIndependentColumn())
-                
-                #Load RRA3 body forces
-                rra3Data = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'rra3',runLabel,'rra3',cycle,f'{subject}_{runLabel}_{cycle}_iter3_bodyForces.sto'))
-                rra3Time = np.array(rra3Data.getIndependentColumn())
-                
-                #Load Moco solution
-                mocoData = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'moco',runLabel,cycle,f'{subject}_{runLabel}_{cycle}_mocoSolution.sto'))
-                mocoTime = np.array(mocoData.getIndependentColumn())
-                
-                #Load AddBiomechanics solution
-                addBiomechData = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'addBiomechanics',runLabel,'ID',f'{runName}_id.sto'))
-                addBiomechTime = np.array(addBiomechData.getIndependentColumn())
-                
-                #Get AddBiomechanics start and stop indices for this cycle
-                
-                #Get times
-                initialTime = rraTime[0]
-                finalTime = rraTime[-1]
-                
-                #Get AddBiomechanics indices
-                addBiomechStart = np.argmax(addBiomechTime > initialTime)
-                addBiomechStop = np.argmax(addBiomechTime > finalTime) - 1
-                addBiomechTimeCycle = addBiomechTime[addBiomechStart:addBiomechStop]
-                
-                #Loop through residual variables to extract
-                for var in residualVars:
-                    
-                    #Check for individual or summative variable
-                    if var.endswith('X') or var.endswith('Y') or var.endswith('Z'):
-                    
-                        #Map residual variable to appropriate column label in respective data
-                        rraVar = rraResidualVars[residualVars.index(var)]
-                        rra3Var = rraResidualVars[residualVars.index(var)]
-                        mocoVar = mocoResidualVars[residualVars.index(var)]
-                        addBiomechVar = addBiomechResidualVars[residualVars.index(var)]
-                        
-                        #Extract residual data
-                        rraResidualVar = rraData.getDependentColumn(rraVar).to_numpy()
-                        rra3ResidualVar = rra3Data.getDependentColumn(rraVar).to_numpy()
-                        mocoResidualVar = mocoData.getDependentColumn(mocoVar).to_numpy() #no need to multiply by optForce as it was 1
-                        addBiomechResidualVar = addBiomechData.getDependentColumn(addBiomechVar).to_numpy()[addBiomechStart:addBiomechStop]
+            #Associate start and stop indices to IK data for this cycle
+            
+            #Get times
+            initialTime = rraTime[0]
+            finalTime = rraTime[-1]
+            
+            #Get AddBiomechanics indices
+            #The time arrays are sorted so these can be found with a binary search
+            addBiomechStart = np.searchsorted(addBiomechTime, initialTime, side = 'right')
+            addBiomechStop = np.searchsorted(addBiomechTime, finalTime, side = 'right') - 1
+            
+            #Extract the kinetic variables from each tool as time x variable arrays
+            #RRA
+            rraKineticData = rraData[:,[rraCols[var] for var in kineticVars]]
+            #RRA3
+            rra3KineticData = rra3Data[:,[rra3Cols[var] for var in kineticVars]]
+            #Moco
+            #Requires full path to forceset and multiply by optimal force
+            mocoKineticData = mocoData[:,[mocoCols[label] for label in mocoKineticLabels]]
+            mocoKineticData *= mocoKineticScale
+            #AddBiomechanics
+            addBiomechKineticData = addBiomechTrialKinetics[addBiomechStart:addBiomechStop]
+            
+            #Get the time cycle for AddBiomechanics data
+            addBiomechTimeCycle = addBiomechTime[addBiomechStart:addBiomechStop]
+
+            #Interpolate data to 101 points and store in relevant array
+            rraKinetics[runInd,cycleInd] = helper.resampleData(rraTime, rraKineticData).T
+            rra3Kinetics[runInd,cycleInd] = helper.resampleData(rra3Time, rra3KineticData).T
+            mocoKinetics[runInd,cycleInd] = helper.resampleData(mocoTime, mocoKineticData).T
+            addBiomechKinetics[runInd,cycleInd] = helper.resampleData(addBiomechTimeCycle, addBiomechKineticData).T
         
-                        # #Normalise data to model mass
-                        
-                        # #Load models
-                        # rraModel = osim.Model(f'..\\..\\data\\HamnerDelp2013\\{subject}\\rra\\{runLabel}\\{cycle}\\{subject}_{runLabel}_{cycle}_rraAdjusted.osim')
-                        # mocoModel = osim.Model(f'..\\..\\data\\HamnerDelp2013\\{subject}\\model\\{subject}_adjusted_scaled.osim')
-                        
-                        # #Get body mass
-                        # rraModelMass = np.sum([rraModel.updBodySet().get(ii).getMass() for ii in range(rraModel.updBodySet().getSize())])
-                        # mocoModelMass = np.sum([mocoModel.updBodySet().get(ii).getMass() for ii in range(mocoModel.updBodySet().getSize())])
-                        
-                        # #Normalise data
-                        # rraResidualVarNorm = rraResidualVar / rraModelMass
-                        # mocoResidualVarNorm = mocoResidualVar / mocoModelMass
-                        
-                        #Interpolate to 101 points
-                        
-                        #Create interpolation function
-                        rraInterpFunc = interp1d(rraTime, rraResidualVar)
-                        rra3InterpFunc = interp1d(rra3Time, rra3ResidualVar)
-                        mocoInterpFunc = interp1d(mocoTime, mocoResidualVar)
-                        addBiomechInterpFunc = interp1d(addBiomechTimeCycle, addBiomechResidualVar)
-                        
-                        #Interpolate data and store in relevant dictionary
-                        rraResiduals[runLabel][cycle][var] = rraInterpFunc(np.linspace(rraTime[0], rraTime[-1], 101))
-                        rra3Residuals[runLabel][cycle][var] = rra3InterpFunc(np.linspace(rra3Time[0], rra3Time[-1], 101))
-                        mocoResiduals[runLabel][cycle][var] = mocoInterpFunc(np.linspace(mocoTime[0], mocoTime[-1], 101))
-                        addBiomechResiduals[runLabel][cycle][var] = addBiomechInterpFunc(np.linspace(addBiomechTimeCycle[0], addBiomechTimeCycle[-1], 101))
-                        
-                    #Else create summative data for force or moment data
-                    else:
-                        
-                        #Find variables related to the current parameter
-                        if var == 'F':
-                            sumVars = ['FX', 'FY', 'FZ']
-                        elif var == 'M':
-                            sumVars = ['MX', 'MY', 'MZ']
-                            
-                        #Sum the relevant data to the dictionary
-                        rraResiduals[runLabel][cycle][var] = np.sum(np.vstack([np.abs(rraResiduals[runLabel][cycle][getVar]) for getVar in sumVars]), axis = 0)
-                        rra3Residuals[runLabel][cycle][var] = np.sum(np.vstack([np.abs(rra3Residuals[runLabel][cycle][getVar]) for getVar in sumVars]), axis = 0)
-                        mocoResiduals[runLabel][cycle][var] = np.sum(np.vstack([np.abs(mocoResiduals[runLabel][cycle][getVar]) for getVar in sumVars]), axis = 0)
-                        addBiomechResiduals[runLabel][cycle][var] = np.sum(np.vstack([np.abs(addBiomechResiduals[runLabel][cycle][getVar]) for getVar in sumVars]), axis = 0)
-            
-            #Create the figure
-            fig, ax = plt.subplots(nrows = 2, ncols = 4, figsize = (12, 4))
+        #Calculate mean across cycles for each tool
+        #These are indexed by run, variable and time
+        rraMeanKinetics = rraKinetics.mean(axis = 1)
+        rra3MeanKinetics = rra3Kinetics.mean(axis = 1)
+        mocoMeanKinetics = mocoKinetics.mean(axis = 1)
+        addBiomechMeanKinetics = addBiomechKinetics.mean(axis = 1)
+        
+        #Create a plot of the kinetics
+        
+        #Create the figure if it hasn't already been created in this process
+        if 'kinetics' not in compileFigures:
+            compileFigures['kinetics'] = plt.subplots(nrows = 9, ncols = 3, figsize = (8,12))
             
             #Adjust subplots
-            plt.subplots_adjust(left = 0.075, right = 0.95, bottom = 0.085, top = 0.875,
-                                hspace = 0.4, wspace = 0.35)
+            compileFigures['kinetics'][0].subplots_adjust(left = 0.075, right = 0.95, bottom = 0.05, top = 0.95,
+                                                          hspace = 0.4, wspace = 0.5)
+        
+        #Get the figure and clear any axes from a previous subject
+        fig, ax = compileFigures['kinetics']
+        for axis in ax.flat:
+            axis.cla()
+        
+        #Loop through variables and plot data
+        for varInd, var in enumerate(kineticVars):
             
-            #Loop through variables and plot data
-            for var in residualVars:
-                
-                #Set the appropriate axis
-                plt.sca(ax[residualAx[var][0],residualAx[var][1]])
-                        
-                #Loop through cycles to plot individual curves
-                for cycle in cycleList:
-                    
-                    #Plot RRA data
-                    plt.plot(np.linspace(0,100,101), rraResiduals[runLabel][cycle][var],
-                             ls = '-', lw = 0.5, c = rraCol, alpha = 0.4, zorder = 2)
+            #Get the appropriate axis
+            varAx = ax[kineticAx[var][0],kineticAx[var][1]]
                     
-                    #Plot RRA3 data
-                    plt.plot(np.linspace(0,100,101), rra3Residuals[runLabel][cycle][var],
-                             ls = '-', lw = 0.5, c = rra3Col, alpha = 0.4, zorder = 2)
-                    
-                    #Plot Moco data
-                    plt.plot(np.linspace(0,100,101), mocoResiduals[runLabel][cycle][var],
-                             ls = '-', lw = 0.5, c = mocoCol, alpha = 0.4, zorder = 2)
-                    
-                    #Plot AddBiomechanics data
-                    plt.plot(np.linspace(0,100,101), addBiomechResiduals[runLabel][cycle][var],
-                             ls = '-', lw = 0.5, c = addBiomechCol, alpha = 0.4, zorder = 2)
-                    
-                #Plot mean curves
-                
-                #Calculate mean for current residual variable
-                
-                #RRA data
-                rraMeanResiduals[runLabel][var] = np.mean(np.vstack((rraResiduals[runLabel]['cycle1'][var],
-                                                                     rraResiduals[runLabel]['cycle2'][var],
-                                                                     rraResiduals[runLabel]['cycle3'][var])),
-                                                          axis = 0)
-                
-                #RRA3 data
-                rra3MeanResiduals[runLabel][var] = np.mean(np.vstack((rra3Residuals[runLabel]['cycle1'][var],
-                                                                      rra3Residuals[runLabel]['cycle2'][var],
-                                                                      rra3Residuals[runLabel]['cycle3'][var])),
-                                                           axis = 0)
-                
-                #Moco data
-                mocoMeanResiduals[runLabel][var] = np.mean(np.vstack((mocoResiduals[runLabel]['cycle1'][var],
-                                                                      mocoResiduals[runLabel]['cycle2'][var],
-                                                                      mocoResiduals[runLabel]['cycle3'][var])),
-                                                           axis = 0)
-                
-                #AddBiomechanics data
-                addBiomechMeanResiduals[runLabel][var] = np.mean(np.vstack((addBiomechResiduals[runLabel]['cycle1'][var],
-                                                                            addBiomechResiduals[runLabel]['cycle2'][var],
-                                                                            addBiomechResiduals[runLabel]['cycle3'][var])),
-                                                                 axis = 0)
-                
-                #Plot means
-                
-                #Plot RRA mean
-                plt.plot(np.linspace(0,100,101), rraMeanResiduals[runLabel][var],
-                         ls = '-', lw = 1, c = rraCol,
-                         marker = markerDict['rra'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
-                
-                #Plot RRA3 mean
-                plt.plot(np.linspace(0,100,101), rra3MeanResiduals[runLabel][var],
-                         ls = ':', lw = 1, c = rra3Col,
-                         marker = markerDict['rra3'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
+            #Plot individual cycle curves for all tools as a single collection
+            #The curves are ordered by tool (RRA, RRA3, Moco, AddBiomechanics) then cycle
+            cycleCurves = np.concatenate([toolData[runInd,:,varInd] for toolData in [rraKinetics, rra3Kinetics, mocoKinetics, addBiomechKinetics]])
+            varAx.add_collection(LineCollection(np.stack((np.broadcast_to(gaitCyclePoints, cycleCurves.shape), cycleCurves), axis = -1),
+                                                colors = np.repeat([rraCol, rra3Col, mocoCol, addBiomechCol], len(cycleList)),
+                                                **cycleCollectionStyle))
+            
+            #Make sure the axis limits account for the collection
+            varAx.autoscale_view()
                 
-                #Plot Moco mean
-                plt.plot(np.linspace(0,100,101), mocoMeanResiduals[runLabel][var],
-                         ls = '--', lw = 1, c = mocoCol,
-                         marker = markerDict['moco'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
+            #Plot mean curves
+            
+            #Plot RRA mean
+            varAx.plot(gaitCyclePoints, rraMeanKinetics[runInd,varInd], **meanLineStyles['rra'])
+            
+            #Plot RRA3 mean
+            varAx.plot(gaitCyclePoints, rra3MeanKinetics[runInd,varInd], **meanLineStyles['rra3'])
+            
+            #Plot Moco mean
+            varAx.plot(gaitCyclePoints, mocoMeanKinetics[runInd,varInd], **meanLineStyles['moco'])
+            
+            #Plot AddBiomechanics mean
+            varAx.plot(gaitCyclePoints, addBiomechMeanKinetics[runInd,varInd], **meanLineStyles['addBiomech'])
+
+            #Clean up axis properties
+            
+            #Set x-limits
+            varAx.set_xlim([0,100])
+            
+            #Add labels
+            
+            #X-axis (if bottom row)
+            if kineticAx[var][0] == 8:
+                varAx.set_xlabel('0-100% Gait Cycle', fontsize = 8, fontweight = 'bold')
                 
-                #Plot AddBiomechanics mean
-                plt.plot(np.linspace(0,100,101), addBiomechMeanResiduals[runLabel][var],
-                         ls = '--', lw = 1, c = addBiomechCol,
-                         marker = markerDict['addBiomech'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
+            #Y-axis
+            varAx.set_ylabel('Joint Torque (Nm)', fontsize = 8, fontweight = 'bold')
     
-                #Clean up axis properties
+            #Set title
+            varAx.set_title(var.replace('_',' ').title()+' Torque', pad = 3, fontsize = 10, fontweight = 'bold')
                 
-                #Set x-limits
-                plt.gca().set_xlim([0,100])
-                
-                #Set y-limits to 10% either side of residuals recommendation 
-                #Expand if not there already
-                if var.startswith('F'):
-                    #Check if axis limits are inside residual limits
-                    if plt.gca().get_ylim()[1] < (forceResidualRec * 1.10):
-                        plt.gca().set_ylim(plt.gca().get_ylim()[0], forceResidualRec * 1.10)
-                    if plt.gca().get_ylim()[0] > (forceResidualRec * 1.10 * -1) and var != 'F':
-                        plt.gca().set_ylim(forceResidualRec * 1.10 * -1, plt.gca().get_ylim()[1])
-                elif var.startswith('M'):
-                    #Check if axis limits are inside residual limits
-                    if plt.gca().get_ylim()[1] < (momentResidualRec * 1.10):
-                        plt.gca().set_ylim(plt.gca().get_ylim()[0], momentResidualRec * 1.10)
-                    if plt.gca().get_ylim()[0] > (momentResidualRec * 1.10 * -1) and var != 'M':
-                        plt.gca().set_ylim(momentResidualRec * 1.10 * -1, plt.gca().get_ylim()[1])
-                
-                #Add dashed line at residual recommendation limits
-                if var.endswith('X') or var.endswith('Y') or var.endswith('Z'):
-                    if var.startswith('F'):
-                        plt.gca().axhline(y = forceResidualRec, color = 'black', linewidth = 1, ls = '--', zorder = 1)
-                        plt.gca().axhline(y = forceResidualRec * -1, color = 'black', linewidth = 1, ls = '--', zorder = 1)
-                    elif var.startswith('M'):
-                        plt.gca().axhline(y = momentResidualRec, color = 'black', linewidth = 1, ls = '--', zorder = 1)
-                        plt.gca().axhline(y = momentResidualRec * -1, color = 'black', linewidth = 1, ls = '--', zorder = 1)
-                
-                #Add labels
-                
-                #X-axis (if bottom row)
-                if var.startswith('M'):
-                    plt.gca().set_xlabel('0-100% Gait Cycle', fontsize = 8, fontweight = 'bold')
-                    
-                #Y-axis (dependent on kinematic variable)
-                if var.startswith('F'):
-                    plt.gca().set_ylabel('Residual Force (N)', fontsize = 8, fontweight = 'bold')
-                else:
-                    plt.gca().set_ylabel('Residual Moment (Nm)', fontsize = 8, fontweight = 'bold')
-        
-                #Set title
-                if var.endswith('X') or var.endswith('Y') or var.endswith('Z'):
-                    plt.gca().set_title(var, pad = 3, fontsize = 12, fontweight = 'bold')
-                else:
-                    plt.gca().set_title('Total '+var, pad = 3, fontsize = 12, fontweight = 'bold')
+            #Add zero-dash line if necessary
+            if varAx.get_ylim()[0] < 0 < varAx.get_ylim()[-1]:
+                varAx.axhline(y = 0, color = 'dimgrey', linewidth = 0.5, ls = ':', zorder = 1)
                     
-                #Add zero-dash line if necessary
-                if plt.gca().get_ylim()[0] < 0 < plt.gca().get_ylim()[-1]:
-                    plt.gca().axhline(y = 0, color = 'dimgrey', linewidth = 0.5, ls = ':', zorder = 1)
-                        
-                #Turn off top-right spines
-                plt.gca().spines['top'].set_visible(False)
-                plt.gca().spines['right'].set_visible(False)
-                
-                #Set axis ticks in
-                plt.gca().tick_params('both', direction = 'in', length = 3)
-                
-                #Set x-ticks at 0, 50 and 100
-                plt.gca().set_xticks([0,50,100])
-                #Remove labels if not on bottom row
-                if not var.startswith('M'):
-                    plt.gca().set_xticklabels([])
-            
-            #Add figure title
-            fig.suptitle(f'{subject} Residuals Comparison (RRA = Purple-Circles, RRA3 = Pink-Hexagons, Moco = Blue-Squares, AddBiomechanics = Gold-Diamonds)',
-                         fontsize = 10, fontweight = 'bold', y = 0.99)
-            
-            #Save figure
-            fig.savefig(os.path.join('..','..','data','HamnerDelp2013',subject,'results','figures',f'{subject}_{runLabel}_residualsComparison.png'),
-                        format = 'png', dpi = 300)
-            
-            #Close figure
-            plt.close('all')
-            
-            #Save residual data dictionaries
-            #RRA data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rraResiduals.pkl'), 'wb') as writeFile:
-                pickle.dump(rraResiduals, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rraMeanResiduals.pkl'), 'wb') as writeFile:
-                pickle.dump(rraMeanResiduals, writeFile)
-            #RRA3 data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rra3Residuals.pkl'), 'wb') as writeFile:
-                pickle.dump(rra3Residuals, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rra3MeanResiduals.pkl'), 'wb') as writeFile:
-                pickle.dump(rra3MeanResiduals, writeFile)
-            #Moco data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_mocoResiduals.pkl'), 'wb') as writeFile:
-                pickle.dump(mocoResiduals, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_mocoMeanResiduals.pkl'), 'wb') as writeFile:
-                pickle.dump(mocoMeanResiduals, writeFile)
-            #AddBiomechanics data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechResiduals.pkl'), 'wb') as writeFile:
-                pickle.dump(addBiomechResiduals, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechMeanResiduals.pkl'), 'wb') as writeFile:
-                pickle.dump(addBiomechMeanResiduals, writeFile)
+            #Turn off top-right spines
+            varAx.spines['top'].set_visible(False)
+            varAx.spines['right'].set_visible(False)
+            
+            #Set axis ticks in
+            varAx.tick_params('both', direction = 'in', length = 3)
+            
+            #Set x-ticks at 0, 50 and 100
+            varAx.set_xticks([0,50,100])
+            #Remove labels if not on bottom row
+            if kinematicAx[var][1] != 8:
+                varAx.set_xticklabels([])
                 
-        # %% Read in and compare ground reactions
+        #Turn off un-used axes
+        ax[1,2].axis('off')
+        ax[3,2].axis('off')
+        ax[6,2].axis('off')
+        ax[8,2].axis('off')
         
-        """
+        #Add figure title
+        fig.suptitle(f'{subject} Kinetics Comparison (RRA = Purple, RRA3 = Pink, Moco = Blue, AddBiomechanics = Gold)',
+                     fontsize = 10, fontweight = 'bold', y = 0.99)
+
+        #Save figure
+        fig.savefig(os.path.join(figuresDir,f'{subject}_{runLabel}_kineticsComparison.png'),
+                    format = 'png', dpi = checkFigureDpi, pil_kwargs = {'compress_level': 1})
+        
+        #Save the kinetic arrays together in a single compressed numpy file
+        #The tool, run, cycle and variable labels for each axis are stored alongside these
+        np.savez_compressed(os.path.join(outputsDir,f'{subject}_kinetics.npz'),
+                            tools = np.array(['rra', 'rra3', 'moco', 'addBiomech']),
+                            runs = np.array(runList), cycles = np.array(cycleList),
+                            variables = np.array(kineticVars),
+                            kinetics = np.stack((rraKinetics, rra3Kinetics, mocoKinetics, addBiomechKinetics)),
+                            meanKinetics = np.stack((rraMeanKinetics, rra3MeanKinetics, mocoMeanKinetics, addBiomechMeanKinetics)))
+    
+    # %% Read in and compare residuals
+    
+    #Check whether to evaluate residuals
+    if compileResiduals:
+        
+        #Create arrays to store data from the various tools
+        #Each array is indexed by run, cycle, variable and time
+        #These are converted back to dictionaries by label when saving
+        rraResiduals = np.zeros((len(runList), len(cycleList), len(residualVars), 101))
+        rra3Residuals = np.zeros((len(runList), len(cycleList), len(residualVars), 101))
+        mocoResiduals = np.zeros((len(runList), len(cycleList), len(residualVars), 101))
+        addBiomechResiduals = np.zeros((len(runList), len(cycleList), len(residualVars), 101))
+        
+        #Load AddBiomechanics solution
+        #This covers the whole trial so is read once for all cycles
+        addBiomechTime, addBiomechCols, addBiomechData = helper.getTableData(os.path.join(subjectDir,'addBiomechanics',runLabel,'ID',f'{runName}_id.sto'))
+        
+        #Loop through cycles, load and normalise gait cycle to 101 points
+        for cycleInd, cycle in enumerate(cycleList):
+            
+            #Load RRA body forces
+            rraTime, rraCols, rraData = helper.getTableData(os.path.join(subjectDir,'rra',runLabel,cycle,f'{subject}_{runLabel}_{cycle}_bodyForces.sto'))
+            
+            #Load RRA3 body forces
+            rra3Time, rra3Cols, rra3Data = helper.getTableData(os.path.join(subjectDir,'rra3',runLabel,'rra3',cycle,f'{subject}_{runLabel}_{cycle}_iter3_bodyForces.sto'))
+            
+            #Load Moco solution
+            mocoTime, mocoCols, mocoData = helper.getTableData(os.path.join(subjectDir,'moco',runLabel,cycle,f'{subject}_{runLabel}_{cycle}_mocoSolution.sto'))
+            
+            #Get AddBiomechanics start and stop indices for this cycle
+            
+            #Get times
+            initialTime = rraTime[0]
+            finalTime = rraTime[-1]
+            
+            #Get AddBiomechanics indices
+            #The time arrays are sorted so these can be found with a binary search
+            addBiomechStart = np.searchsorted(addBiomechTime, initialTime, side = 'right')
+            addBiomechStop = np.searchsorted(addBiomechTime, finalTime, side = 'right') - 1
+            addBiomechTimeCycle = addBiomechTime[addBiomechStart:addBiomechStop]
+            
+            #Extract the individual residual variables from each tool as time x variable arrays
+            #The columns are mapped in the same order as the individual residual variables
+            #RRA
+            rraResidualData = rraData[:,[rraCols[var] for var in rraResidualVars]]
+            #RRA3
+            rra3ResidualData = rra3Data[:,[rra3Cols[var] for var in rraResidualVars]]
+            #Moco
+            #No need to multiply by optForce as it was 1
+            mocoResidualData = mocoData[:,[mocoCols[var] for var in mocoResidualVars]]
+            #AddBiomechanics
+            addBiomechResidualData = addBiomechData[addBiomechStart:addBiomechStop,[addBiomechCols[var] for var in addBiomechResidualVars]]
+            
+            # #Normalise data to model mass
+            
+            # #Load models
+            # rraModel = osim.Model(f'..\\..\\data\\HamnerDelp2013\\{subject}\\rra\\{runLabel}\\{cycle}\\{subject}_{runLabel}_{cycle}_rraAdjusted.osim')
+            # mocoModel = osim.Model(f'..\\..\\data\\HamnerDelp2013\\{subject}\\model\\{subject}_adjusted_scaled.osim')
+            
+            # #Get body mass
+            # rraModelMass = np.sum([rraModel.updBodySet().get(ii).getMass() for ii in range(rraModel.updBodySet().getSize())])
+            # mocoModelMass = np.sum([mocoModel.updBodySet().get(ii).getMass() for ii in range(mocoModel.updBodySet().getSize())])
+            
+            # #Normalise data
+            # rraResidualDataNorm = rraResidualData / rraModelMass
+            # mocoResidualDataNorm = mocoResidualData / mocoModelMass
+            
+            #Interpolate data to 101 points and store in relevant array
+            #The individual residual variables come first in the variable list
+            rraResiduals[runInd,cycleInd,:len(rraResidualVars)] = helper.resampleData(rraTime, rraResidualData).T
+            rra3Residuals[runInd,cycleInd,:len(rraResidualVars)] = helper.resampleData(rra3Time, rra3ResidualData).T
+            mocoResiduals[runInd,cycleInd,:len(rraResidualVars)] = helper.resampleData(mocoTime, mocoResidualData).T
+            addBiomechResiduals[runInd,cycleInd,:len(rraResidualVars)] = helper.resampleData(addBiomechTimeCycle, addBiomechResidualData).T
+        
+        #Create summative data for force and moment data across all cycles at once
+        for var in ['F', 'M']:
+            
+            #Find variables related to the current parameter
+            sumInds = [residualVars.index(f'{var}{axis}') for axis in ['X', 'Y', 'Z']]
+                
+            #Sum the absolute values of the relevant data into the array for each tool
+            for toolResiduals in [rraResiduals, rra3Residuals, mocoResiduals, addBiomechResiduals]:
+                toolResiduals[runInd,:,residualVars.index(var)] = np.abs(toolResiduals[runInd][:,sumInds]).sum(axis = 1)
+        
+        #Calculate mean across cycles for each tool
+        #These are indexed by run, variable and time
+        rraMeanResiduals = rraResiduals.mean(axis = 1)
+        rra3MeanResiduals = rra3Residuals.mean(axis = 1)
+        mocoMeanResiduals = mocoResiduals.mean(axis = 1)
+        addBiomechMeanResiduals = addBiomechResiduals.mean(axis = 1)
+        
+        #Create the figure if it hasn't already been created in this process
+        if 'residuals' not in compileFigures:
+            compileFigures['residuals'] = plt.subplots(nrows = 2, ncols = 4, figsize = (12, 4))
+            
+            #Adjust subplots
+            compileFigures['residuals'][0].subplots_adjust(left = 0.075, right = 0.95, bottom = 0.085, top = 0.875,
+                                                           hspace = 0.4, wspace = 0.35)
         
-        Note that the AddBiomechanics tool is the only approach that alters ground
-        reaction forces, hence the experimental ground reaction forces and associated
-        data are only compare to this tool here.
+        #Get the figure and clear any axes from a previous subject
+        fig, ax = compileFigures['residuals']
+        for axis in ax.flat:
+            axis.cla()
         
-        """
+        #Identify the moment and individual axis residual variables once before plotting
+        #Moment residuals are on the bottom row, and the totals are the last column
+        isMomentVar = {var: var.startswith('M') for var in residualVars}
+        isAxisVar = {var: var.endswith(('X', 'Y', 'Z')) for var in residualVars}
         
-        #Check whether to evaluate ground reactions
-        if readAndCheckGroundReactions:
-            
-            #Load in experimental GRF files
-            grfData = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'addBiomechanics',runLabel,'ID',f'{runName}_grf_raw.mot'))
-            grfLoads = osim.ExternalLoads(os.path.join('..','..','data','HamnerDelp2013',subject,'addBiomechanics',runLabel,'ID',f'{runName}_external_forces_raw.xml'), True)
-            grfTime = np.array(grfData.getIndependentColumn())
+        #Loop through variables and plot data
+        for varInd, var in enumerate(residualVars):
             
-            #Load in AddBiomechanics GRF files
-            addBiomechGrf = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'addBiomechanics',runLabel,'ID',f'{runName}_grf.mot'))
-            addBiomechLoads = osim.ExternalLoads(os.path.join('..','..','data','HamnerDelp2013',subject,'addBiomechanics',runLabel,'ID',f'{runName}_external_forces.xml'), True)
-            addBiomechTime = np.array(addBiomechGrf.getIndependentColumn())
+            #Get the appropriate axis
+            varAx = ax[residualAx[var][0],residualAx[var][1]]
             
-            #Create the variable labels for the two data formats
+            #Get the residual recommendation relevant to the variable
+            residualRec = momentResidualRec if isMomentVar[var] else forceResidualRec
+                    
+            #Plot individual cycle curves for all tools as a single collection
+            #The curves are ordered by tool (RRA, RRA3, Moco, AddBiomechanics) then cycle
+            cycleCurves = np.concatenate([toolData[runInd,:,varInd] for toolData in [rraResiduals, rra3Residuals, mocoResiduals, addBiomechResiduals]])
+            varAx.add_collection(LineCollection(np.stack((np.broadcast_to(gaitCyclePoints, cycleCurves.shape), cycleCurves), axis = -1),
+                                                colors = np.repeat([rraCol, rra3Col, mocoCol, addBiomechCol], len(cycleList)),
+                                                **cycleCollectionStyle))
             
-            #Experimental GRF
-            grfForceVars = [x for xx in [[grfLoads.get(ii).get_force_identifier()+ax for ax in ['x','y','z']] for ii in range(grfLoads.getSize())] for x in xx]
-            grfPointVars = [x for xx in [[grfLoads.get(ii).get_point_identifier()+ax for ax in ['x','y','z']] for ii in range(grfLoads.getSize())] for x in xx]
-            grfTorqueVars = [x for xx in [[grfLoads.get(ii).get_torque_identifier()+ax for ax in ['x','y','z']] for ii in range(grfLoads.getSize())] for x in xx]
+            #Make sure the axis limits account for the collection
+            varAx.autoscale_view()
+                
+            #Plot mean curves
             
-            #AddBiomechancs GRF
-            addBiomechForceVars = [x for xx in [[addBiomechLoads.get(ii).get_force_identifier()+ax for ax in ['x','y','z']] for ii in range(grfLoads.getSize())] for x in xx]
-            addBiomechPointVars = [x for xx in [[addBiomechLoads.get(ii).get_point_identifier()+ax for ax in ['x','y','z']] for ii in range(grfLoads.getSize())] for x in xx]
-            addBiomechTorqueVars = [x for xx in [[addBiomechLoads.get(ii).get_torque_identifier()+ax for ax in ['x','y','z']] for ii in range(grfLoads.getSize())] for x in xx]
+            #Plot RRA mean
+            varAx.plot(gaitCyclePoints, rraMeanResiduals[runInd,varInd], **meanLineStyles['rra'])
             
-            #Create dictionaries to store data from experimental and AddBiomechanics
+            #Plot RRA3 mean
+            varAx.plot(gaitCyclePoints, rra3MeanResiduals[runInd,varInd], **meanLineStyles['rra3'])
             
-            #Individual cycle data
-            expGRFs = {run: {cyc: {var: np.zeros(101) for var in grfForceVars+grfPointVars+grfTorqueVars} for cyc in cycleList} for run in runList}
-            addBiomechGRFs = {run: {cyc: {var: np.zeros(101) for var in addBiomechForceVars+addBiomechPointVars+addBiomechTorqueVars} for cyc in cycleList} for run in runList}
+            #Plot Moco mean
+            varAx.plot(gaitCyclePoints, mocoMeanResiduals[runInd,varInd], **meanLineStyles['moco'])
             
-            #Mean data
-            expMeanGRFs = {run: {var: np.zeros(101) for var in grfForceVars+grfPointVars+grfTorqueVars} for run in runList}
-            addBiomechMeanGRFs = {run: {var: np.zeros(101) for var in addBiomechForceVars+addBiomechPointVars+addBiomechTorqueVars} for run in runList}
+            #Plot AddBiomechanics mean
+            varAx.plot(gaitCyclePoints, addBiomechMeanResiduals[runInd,varInd], **meanLineStyles['addBiomech'])
 
-            #Loop through cycles, load and normalise gait cycle to 101 points
-            for cycle in cycleList:
-                
-                #Associate start and stop indices to gait timings for this cycle
-                
-                #Get times
-                initialTime = gaitTimings[runLabel][cycle]['initialTime']
-                finalTime = gaitTimings[runLabel][cycle]['finalTime']
-                
-                #Get experimental GRF indices
-                initialInd = np.argmax(grfTime > initialTime)
-                finalInd = np.argmax(grfTime > finalTime) - 1
-                
-                #Get AddBiomechanics indices
-                addBiomechStart = np.argmax(addBiomechTime > initialTime)
-                addBiomechStop = np.argmax(addBiomechTime > finalTime) - 1
-                
-                #Loop through GRF variables to extract
+            #Clean up axis properties
+            
+            #Set x-limits
+            varAx.set_xlim([0,100])
+            
+            #Set y-limits to 10% either side of residuals recommendation 
+            #Expand if not there already
+            #Check if axis limits are inside residual limits
+            if varAx.get_ylim()[1] < (residualRec * 1.10):
+                varAx.set_ylim(varAx.get_ylim()[0], residualRec * 1.10)
+            if varAx.get_ylim()[0] > (residualRec * 1.10 * -1) and isAxisVar[var]:
+                varAx.set_ylim(residualRec * 1.10 * -1, varAx.get_ylim()[1])
+            
+            #Add dashed line at residual recommendation limits
+            if isAxisVar[var]:
+                varAx.axhline(y = residualRec, color = 'black', linewidth = 1, ls = '--', zorder = 1)
+                varAx.axhline(y = residualRec * -1, color = 'black', linewidth = 1, ls = '--', zorder = 1)
+            
+            #Add labels
+            
+            #X-axis (if bottom row)
+            if isMomentVar[var]:
+                varAx.set_xlabel('0-100% Gait Cycle', fontsize = 8, fontweight = 'bold')
+                varAx.set_ylabel('Residual Moment (Nm)', fontsize = 8, fontweight = 'bold')
+            else:
+                varAx.set_ylabel('Residual Force (N)', fontsize = 8, fontweight = 'bold')
+    
+            #Set title
+            if isAxisVar[var]:
+                varAx.set_title(var, pad = 3, fontsize = 12, fontweight = 'bold')
+            else:
+                varAx.set_title('Total '+var, pad = 3, fontsize = 12, fontweight = 'bold')
                 
-                #Experimental data
-                for var in grfForceVars+grfPointVars+grfTorqueVars:
-                    
-                    #Extract GRF variable data over time frame
-                    grfDataVar = grfData.getDependentColumn(var).to_numpy()[initialInd:finalInd+1]
-
-                    #Create interpolation function
-                    grfInterpFunc = interp1d(grfTime[initialInd:finalInd+1], grfDataVar)
-                    
-                    #Interpolate data and store in relevant dictionary
-                    expGRFs[runLabel][cycle][var] = grfInterpFunc(np.linspace(grfTime[initialInd], grfTime[finalInd], 101))
-                    
-                #AddBiomechanics GRF data
-                for var in addBiomechForceVars+addBiomechPointVars+addBiomechTorqueVars:
-                    
-                    #Extract GRF variable data over time frame
-                    addBiomechDataVar = addBiomechGrf.getDependentColumn(var).to_numpy()[addBiomechStart:addBiomechStop+1]
-
-                    #Create interpolation function
-                    addBiomechInterpFunc = interp1d(addBiomechTime[addBiomechStart:addBiomechStop+1], addBiomechDataVar)
-                    
-                    #Interpolate data and store in relevant dictionary
-                    addBiomechGRFs[runLabel][cycle][var] = addBiomechInterpFunc(np.linspace(addBiomechTime[addBiomechStart], addBiomechTime[addBiomechStop], 101))
+            #Add zero-dash line if necessary
+            if varAx.get_ylim()[0] < 0 < varAx.get_ylim()[-1]:
+                varAx.axhline(y = 0, color = 'dimgrey', linewidth = 0.5, ls = ':', zorder = 1)
                     
-            #Create a plot of the GRFs
+            #Turn off top-right spines
+            varAx.spines['top'].set_visible(False)
+            varAx.spines['right'].set_visible(False)
+            
+            #Set axis ticks in
+            varAx.tick_params('both', direction = 'in', length = 3)
+            
+            #Set x-ticks at 0, 50 and 100
+            varAx.set_xticks([0,50,100])
+            #Remove labels if not on bottom row
+            if not isMomentVar[var]:
+                varAx.set_xticklabels([])
+        
+        #Add figure title
+        fig.suptitle(f'{subject} Residuals Comparison (RRA = Purple-Circles, RRA3 = Pink-Hexagons, Moco = Blue-Squares, AddBiomechanics = Gold-Diamonds)',
+                     fontsize = 10, fontweight = 'bold', y = 0.99)
+        
+        #Save figure
+        fig.savefig(os.path.join(figuresDir,f'{subject}_{runLabel}_residualsComparison.png'),
+                    format = 'png', dpi = checkFigureDpi, pil_kwargs = {'compress_level': 1})
+        
+        #Save the residual arrays together in a single compressed numpy file
+        #The tool, run, cycle and variable labels for each axis are stored alongside these
+        np.savez_compressed(os.path.join(outputsDir,f'{subject}_residuals.npz'),
+                            tools = np.array(['rra', 'rra3', 'moco', 'addBiomech']),
+                            runs = np.array(runList), cycles = np.array(cycleList),
+                            variables = np.array(residualVars),
+                            residuals = np.stack((rraResiduals, rra3Residuals, mocoResiduals, addBiomechResiduals)),
+                            meanResiduals = np.stack((rraMeanResiduals, rra3MeanResiduals, mocoMeanResiduals, addBiomechMeanResiduals)))
             
-            #Note that force data is plotted on the first row, point data on the
-            #second row, and torque data on the bottom row
+    # %% Read in and compare ground reactions
+    
+    """
+    
+    Note that the AddBiomechanics tool is the only approach that alters ground
+    reaction forces, hence the experimental ground reaction forces and associated
+    data are only compare to this tool here.
+    
+    """
     
-            #Create the figure
-            fig, ax = plt.subplots(nrows = 3, ncols = 3, figsize = (10,6))
+    #Check whether to evaluate ground reactions
+    if compileGroundReactions:
+        
+        #Load in experimental GRF files
+        grfTime, grfCols, grfData = helper.getTableData(os.path.join(subjectDir,'addBiomechanics',runLabel,'ID',f'{runName}_grf_raw.mot'))
+        grfLoads = osim.ExternalLoads(os.path.join(subjectDir,'addBiomechanics',runLabel,'ID',f'{runName}_external_forces_raw.xml'), True)
+        
+        #Load in AddBiomechanics GRF files
+        addBiomechTime, addBiomechCols, addBiomechGrf = helper.getTableData(os.path.join(subjectDir,'addBiomechanics',runLabel,'ID',f'{runName}_grf.mot'))
+        addBiomechLoads = osim.ExternalLoads(os.path.join(subjectDir,'addBiomechanics',runLabel,'ID',f'{runName}_external_forces.xml'), True)
+        
+        #Create the variable labels for the two data formats
+        
+        #Experimental GRF
+        grfForceVars = [x for xx in [[grfLoads.get(ii).get_force_identifier()+ax for ax in ['x','y','z']] for ii in range(grfLoads.getSize())] for x in xx]
+        grfPointVars = [x for xx in [[grfLoads.get(ii).get_point_identifier()+ax for ax in ['x','y','z']] for ii in range(grfLoads.getSize())] for x in xx]
+        grfTorqueVars = [x for xx in [[grfLoads.get(ii).get_torque_identifier()+ax for ax in ['x','y','z']] for ii in range(grfLoads.getSize())] for x in xx]
+        
+        #AddBiomechancs GRF
+        addBiomechForceVars = [x for xx in [[addBiomechLoads.get(ii).get_force_identifier()+ax for ax in ['x','y','z']] for ii in range(grfLoads.getSize())] for x in xx]
+        addBiomechPointVars = [x for xx in [[addBiomechLoads.get(ii).get_point_identifier()+ax for ax in ['x','y','z']] for ii in range(grfLoads.getSize())] for x in xx]
+        addBiomechTorqueVars = [x for xx in [[addBiomechLoads.get(ii).get_torque_identifier()+ax for ax in ['x','y','z']] for ii in range(grfLoads.getSize())] for x in xx]
+        
+        #Create dictionaries to store data from experimental and AddBiomechanics
+        
+        #Individual cycle data
+        expGRFs = {run: {cyc: {var: np.zeros(101) for var in grfForceVars+grfPointVars+grfTorqueVars} for cyc in cycleList} for run in runList}
+        addBiomechGRFs = {run: {cyc: {var: np.zeros(101) for var in addBiomechForceVars+addBiomechPointVars+addBiomechTorqueVars} for cyc in cycleList} for run in runList}
+        
+        #Mean data
+        expMeanGRFs = {run: {var: np.zeros(101) for var in grfForceVars+grfPointVars+grfTorqueVars} for run in runList}
+        addBiomechMeanGRFs = {run: {var: np.zeros(101) for var in addBiomechForceVars+addBiomechPointVars+addBiomechTorqueVars} for run in runList}
+
+        #Loop through cycles, load and normalise gait cycle to 101 points
+        for cycle in cycleList:
             
-            #Adjust subplots
-            plt.subplots_adjust(left = 0.075, right = 0.95, bottom = 0.06, top = 0.93,
-                                hspace = 0.3, wspace = 0.4)
-            
-            #Loop through variables and plot data
-            #Note that each of the GRF variable lists is split across left/right sides
-            #Taking the the current variable Plus 3 in the list equates to the matching
-            #axis data on the other side. The loop is run 3 times for the x, y, z data
-            for ii in range(3):
-                
-                #Set the appropriate axis
-                
-                #Set the GRF variable labels
-                
-                #Experimental data
-                forceLabel1 = grfForceVars[ii]
-                forceLabel2 = grfForceVars[ii+3]
-                pointLabel1 = grfPointVars[ii]
-                pointLabel2 = grfPointVars[ii+3]
-                torqueLabel1 = grfTorqueVars[ii]
-                torqueLabel2 = grfTorqueVars[ii+3]
-                
-                #AddBiomechanics data
-                addBiomechForceLabel1 = addBiomechForceVars[ii]
-                addBiomechForceLabel2 = addBiomechForceVars[ii+3]
-                addBiomechPointLabel1 = addBiomechPointVars[ii]
-                addBiomechPointLabel2 = addBiomechPointVars[ii+3]
-                addBiomechTorqueLabel1 = addBiomechTorqueVars[ii]
-                addBiomechTorqueLabel2 = addBiomechTorqueVars[ii+3]
-                        
-                #Loop through cycles to plot individual curves
-                for cycle in cycleList:
-                    
-                    #Plot force data
-                    plt.sca(ax[0,ii])
-                    #Experimental
-                    plt.plot(np.linspace(0,100,101), expGRFs[runLabel][cycle][forceLabel1] + expGRFs[runLabel][cycle][forceLabel2],
-                             linestyle = '-', lw = 0.5, c = ikCol, alpha = 0.4, zorder = 2)
-                    #AddBiomechanics data
-                    plt.plot(np.linspace(0,100,101), addBiomechGRFs[runLabel][cycle][addBiomechForceLabel1] + addBiomechGRFs[runLabel][cycle][addBiomechForceLabel2],
-                             ls = '-', lw = 0.5, c = addBiomechCol, alpha = 0.4, zorder = 2)
-                    
-                    #Plot point data
-                    plt.sca(ax[1,ii])
-                    #Experimental
-                    plt.plot(np.linspace(0,100,101), expGRFs[runLabel][cycle][pointLabel1] + expGRFs[runLabel][cycle][pointLabel2],
-                             linestyle = '-', lw = 0.5, c = ikCol, alpha = 0.4, zorder = 2)
-                    #AddBiomechanics data
-                    plt.plot(np.linspace(0,100,101), addBiomechGRFs[runLabel][cycle][addBiomechPointLabel1] + addBiomechGRFs[runLabel][cycle][addBiomechPointLabel2],
-                             ls = '-', lw = 0.5, c = addBiomechCol, alpha = 0.4, zorder = 2)
-                    
-                    #Plot torque data
-                    plt.sca(ax[2,ii])
-                    #Experimental
-                    plt.plot(np.linspace(0,100,101), expGRFs[runLabel][cycle][torqueLabel1] + expGRFs[runLabel][cycle][torqueLabel1],
-                             linestyle = '-', lw = 0.5, c = ikCol, alpha = 0.4, zorder = 2)
-                    #AddBiomechanics data
-                    plt.plot(np.linspace(0,100,101), addBiomechGRFs[runLabel][cycle][addBiomechTorqueLabel1] + addBiomechGRFs[runLabel][cycle][addBiomechTorqueLabel2],
-                             ls = '-', lw = 0.5, c = addBiomechCol, alpha = 0.4, zorder = 2)
-                    
-                #Plot mean curves
-                
-                #Calculate mean for current GRF variables
-                
-                #Force data
-                
-                #Experimental data
-                expMeanGRFs[runLabel][forceLabel1] = np.mean(np.vstack((expGRFs[runLabel]['cycle1'][forceLabel1],
-                                                                        expGRFs[runLabel]['cycle1'][forceLabel1],
-                                                                        expGRFs[runLabel]['cycle1'][forceLabel1])),
-                                                             axis = 0)
-                expMeanGRFs[runLabel][forceLabel2] = np.mean(np.vstack((expGRFs[runLabel]['cycle1'][forceLabel2],
-                                                                        expGRFs[runLabel]['cycle1'][forceLabel2],
-                                                                        expGRFs[runLabel]['cycle1'][forceLabel2])),
-                                                             axis = 0)
-                
-                #AddBiomechanics data
-                addBiomechMeanGRFs[runLabel][addBiomechForceLabel1] = np.mean(np.vstack((addBiomechGRFs[runLabel]['cycle1'][addBiomechForceLabel1],
-                                                                                         addBiomechGRFs[runLabel]['cycle2'][addBiomechForceLabel1],
-                                                                                         addBiomechGRFs[runLabel]['cycle3'][addBiomechForceLabel1])),
-                                                                              axis = 0)
-                addBiomechMeanGRFs[runLabel][addBiomechForceLabel2] = np.mean(np.vstack((addBiomechGRFs[runLabel]['cycle1'][addBiomechForceLabel2],
-                                                                                         addBiomechGRFs[runLabel]['cycle2'][addBiomechForceLabel2],
-                                                                                         addBiomechGRFs[runLabel]['cycle3'][addBiomechForceLabel2])),
-                                                                              axis = 0)
-                
-                #Point data
-                
-                #Experimental data
-                expMeanGRFs[runLabel][pointLabel1] = np.mean(np.vstack((expGRFs[runLabel]['cycle1'][pointLabel1],
-                                                                        expGRFs[runLabel]['cycle1'][pointLabel1],
-                                                                        expGRFs[runLabel]['cycle1'][pointLabel1])),
-                                                             axis = 0)
-                expMeanGRFs[runLabel][pointLabel2] = np.mean(np.vstack((expGRFs[runLabel]['cycle1'][pointLabel2],
-                                                                        expGRFs[runLabel]['cycle1'][pointLabel2],
-                                                                        expGRFs[runLabel]['cycle1'][pointLabel2])),
-                                                             axis = 0)
-                
-                #AddBiomechanics data
-                addBiomechMeanGRFs[runLabel][addBiomechPointLabel1] = np.mean(np.vstack((addBiomechGRFs[runLabel]['cycle1'][addBiomechPointLabel1],
-                                                                                         addBiomechGRFs[runLabel]['cycle2'][addBiomechPointLabel1],
-                                                                                         addBiomechGRFs[runLabel]['cycle3'][addBiomechPointLabel1])),
-                                                                              axis = 0)
-                addBiomechMeanGRFs[runLabel][addBiomechPointLabel2] = np.mean(np.vstack((addBiomechGRFs[runLabel]['cycle1'][addBiomechPointLabel2],
-                                                                                         addBiomechGRFs[runLabel]['cycle2'][addBiomechPointLabel2],
-                                                                                         addBiomechGRFs[runLabel]['cycle3'][addBiomechPointLabel2])),
-                                                                              axis = 0)
-                
-                #Torque data
-                
-                #Experimental data
-                expMeanGRFs[runLabel][torqueLabel1] = np.mean(np.vstack((expGRFs[runLabel]['cycle1'][torqueLabel1],
-                                                                        expGRFs[runLabel]['cycle1'][torqueLabel1],
-                                                                        expGRFs[runLabel]['cycle1'][torqueLabel1])),
-                                                             axis = 0)
-                expMeanGRFs[runLabel][torqueLabel2] = np.mean(np.vstack((expGRFs[runLabel]['cycle1'][torqueLabel2],
-                                                                         expGRFs[runLabel]['cycle1'][torqueLabel2],
-                                                                         expGRFs[runLabel]['cycle1'][torqueLabel2])),
-                                                              axis = 0)
-                
-                #AddBiomechanics data
-                addBiomechMeanGRFs[runLabel][addBiomechTorqueLabel1] = np.mean(np.vstack((addBiomechGRFs[runLabel]['cycle1'][addBiomechTorqueLabel1],
-                                                                                          addBiomechGRFs[runLabel]['cycle2'][addBiomechTorqueLabel1],
-                                                                                          addBiomechGRFs[runLabel]['cycle3'][addBiomechTorqueLabel1])),
-                                                                              axis = 0)
-                addBiomechMeanGRFs[runLabel][addBiomechTorqueLabel2] = np.mean(np.vstack((addBiomechGRFs[runLabel]['cycle1'][addBiomechTorqueLabel2],
-                                                                                         addBiomechGRFs[runLabel]['cycle2'][addBiomechTorqueLabel2],
-                                                                                         addBiomechGRFs[runLabel]['cycle3'][addBiomechTorqueLabel2])),
-                                                                              axis = 0)
-                
-                #Plot means
-                
-                #Plot force data
-                plt.sca(ax[0,ii])
-                #Experimental means
-                plt.plot(np.linspace(0,100,101), expMeanGRFs[runLabel][forceLabel1] + expMeanGRFs[runLabel][forceLabel2],
-                         linestyle = '-', lw = 1, c = ikCol, zorder = 3)
-                #AddBiomechanics data
-                plt.plot(np.linspace(0,100,101), addBiomechMeanGRFs[runLabel][addBiomechForceLabel1] + addBiomechMeanGRFs[runLabel][addBiomechForceLabel2],
-                         ls = '--', lw = 1, c = addBiomechCol,
-                         marker = markerDict['addBiomech'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
-                
-                #Plot point data
-                plt.sca(ax[1,ii])
-                #Experimental means
-                plt.plot(np.linspace(0,100,101), expMeanGRFs[runLabel][pointLabel1] + expMeanGRFs[runLabel][pointLabel2],
-                         linestyle = '-', lw = 1, c = ikCol, zorder = 3)
-                #AddBiomechanics data
-                plt.plot(np.linspace(0,100,101), addBiomechMeanGRFs[runLabel][addBiomechPointLabel1] + addBiomechMeanGRFs[runLabel][addBiomechPointLabel2],
-                         ls = '--', lw = 1, c = addBiomechCol,
-                         marker = markerDict['addBiomech'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
-                
-                #Plot torque data
-                plt.sca(ax[2,ii])
-                #Experimental means
-                plt.plot(np.linspace(0,100,101), expMeanGRFs[runLabel][torqueLabel1] + expMeanGRFs[runLabel][torqueLabel2],
-                         linestyle = '-', lw = 1, c = ikCol, zorder = 3)
-                #AddBiomechanics data
-                plt.plot(np.linspace(0,100,101), addBiomechMeanGRFs[runLabel][addBiomechTorqueLabel1] + addBiomechMeanGRFs[runLabel][addBiomechTorqueLabel2],
-                         ls = '--', lw = 1, c = addBiomechCol,
-                         marker = markerDict['addBiomech'], markevery = 5, markersize = 3,
-                         alpha = 1.0, zorder = 3)
-                
-            #Clean up generic axis properties
-            for axInd in range(len(ax.flatten())):
-                
-                #Set current axis
-                plt.sca(ax.flatten()[axInd])
+            #Associate start and stop indices to gait timings for this cycle
+            
+            #Get times
+            initialTime = gaitTimings[runLabel][cycle]['initialTime']
+            finalTime = gaitTimings[runLabel][cycle]['finalTime']
+            
+            #Get experimental GRF indices
+            #The time arrays are sorted so these can be found with a binary search
+            initialInd = np.searchsorted(grfTime, initialTime, side = 'right')
+            finalInd = np.searchsorted(grfTime, finalTime, side = 'right') - 1
+            
+            #Get AddBiomechanics indices
+            #The time arrays are sorted so these can be found with a binary search
+            addBiomechStart = np.searchsorted(addBiomechTime, initialTime, side = 'right')
+            addBiomechStop = np.searchsorted(addBiomechTime, finalTime, side = 'right') - 1
+            
+            #Extract the GRF variables over the time frame as time x variable arrays
             
-                #Set x-limits
-                plt.gca().set_xlim([0,100])
+            #Experimental data
+            grfCycleData = grfData[initialInd:finalInd+1,[grfCols[var] for var in grfForceVars+grfPointVars+grfTorqueVars]]
+
+            #Interpolate data and store in relevant dictionary
+            expGRFs[runLabel][cycle] = dict(zip(grfForceVars+grfPointVars+grfTorqueVars, helper.resampleData(grfTime[initialInd:finalInd+1], grfCycleData).T))
                 
-                #Turn off top-right spines
-                plt.gca().spines['top'].set_visible(False)
-                plt.gca().spines['right'].set_visible(False)
+            #AddBiomechanics GRF data
+            addBiomechCycleData = addBiomechGrf[addBiomechStart:addBiomechStop+1,[addBiomechCols[var] for var in addBiomechForceVars+addBiomechPointVars+addBiomechTorqueVars]]
+
+            #Interpolate data and store in relevant dictionary
+            addBiomechGRFs[runLabel][cycle] = dict(zip(addBiomechForceVars+addBiomechPointVars+addBiomechTorqueVars, helper.resampleData(addBiomechTime[addBiomechStart:addBiomechStop+1], addBiomechCycleData).T))
                 
-                #Add zero-dash line if necessary
-                if plt.gca().get_ylim()[0] < 0 < plt.gca().get_ylim()[-1]:
-                    plt.gca().axhline(y = 0, color = 'dimgrey', linewidth = 0.5, ls = ':', zorder = 1)
+        #Create a plot of the GRFs
+        
+        #Note that force data is plotted on the first row, point data on the
+        #second row, and torque data on the bottom row
+
+        #Create the figure
+        fig, ax = plt.subplots(nrows = 3, ncols = 3, figsize = (10,6))
+        
+        #Adjust subplots
+        plt.subplots_adjust(left = 0.075, right = 0.95, bottom = 0.06, top = 0.93,
+                            hspace = 0.3, wspace = 0.4)
+        
+        #Loop through variables and plot data
+        #Note that each of the GRF variable lists is split across left/right sides
+        #Taking the the current variable Plus 3 in the list equates to the matching
+        #axis data on the other side. The loop is run 3 times for the x, y, z data
+        for ii in range(3):
+            
+            #Set the appropriate axis
+            
+            #Set the GRF variable labels
+            
+            #Experimental data
+            forceLabel1 = grfForceVars[ii]
+            forceLabel2 = grfForceVars[ii+3]
+            pointLabel1 = grfPointVars[ii]
+            pointLabel2 = grfPointVars[ii+3]
+            torqueLabel1 = grfTorqueVars[ii]
+            torqueLabel2 = grfTorqueVars[ii+3]
+            
+            #AddBiomechanics data
+            addBiomechForceLabel1 = addBiomechForceVars[ii]
+            addBiomechForceLabel2 = addBiomechForceVars[ii+3]
+            addBiomechPointLabel1 = addBiomechPointVars[ii]
+            addBiomechPointLabel2 = addBiomechPointVars[ii+3]
+            addBiomechTorqueLabel1 = addBiomechTorqueVars[ii]
+            addBiomechTorqueLabel2 = addBiomechTorqueVars[ii+3]
                     
-                #Set axis ticks in
-                plt.gca().tick_params('both', direction = 'in', length = 3)
-                
-                #Set x-ticks at 0, 50 and 100
-                plt.gca().set_xticks([0,50,100])
-                #Remove labels if not on bottom row
-                if axInd < 6:
-                    plt.gca().set_xticklabels([])
+            #Get the individual cycle curves for the force, point and torque axes
+            #The curves on each axis are ordered by source (experimental, AddBiomechanics) then cycle
+            cycleCurves = [np.array([expGRFs[runLabel][cycle][forceLabel1] + expGRFs[runLabel][cycle][forceLabel2] for cycle in cycleList] +
+                                    [addBiomechGRFs[runLabel][cycle][addBiomechForceLabel1] + addBiomechGRFs[runLabel][cycle][addBiomechForceLabel2] for cycle in cycleList]),
+                           np.array([expGRFs[runLabel][cycle][pointLabel1] + expGRFs[runLabel][cycle][pointLabel2] for cycle in cycleList] +
+                                    [addBiomechGRFs[runLabel][cycle][addBiomechPointLabel1] + addBiomechGRFs[runLabel][cycle][addBiomechPointLabel2] for cycle in cycleList]),
+                           np.array([expGRFs[runLabel][cycle][torqueLabel1] + expGRFs[runLabel][cycle][torqueLabel1] for cycle in cycleList] +
+                                    [addBiomechGRFs[runLabel][cycle][addBiomechTorqueLabel1] + addBiomechGRFs[runLabel][cycle][addBiomechTorqueLabel2] for cycle in cycleList])]
             
-                #Add labels
+            #Plot individual cycle curves on each axis as a single collection
+            for axInd, axCurves in enumerate(cycleCurves):
+                ax[axInd,ii].add_collection(LineCollection(np.stack((np.broadcast_to(gaitCyclePoints, axCurves.shape), axCurves), axis = -1),
+                                                           colors = np.repeat([ikCol, addBiomechCol], len(cycleList)),
+                                                           **cycleCollectionStyle))
                 
-                #X-axis (if bottom row)
-                if axInd >= 6:
-                    plt.gca().set_xlabel('0-100% Gait Cycle', fontsize = 8, fontweight = 'bold')
+                #Make sure the axis limits account for the collection
+                ax[axInd,ii].autoscale_view()
                 
-                #Y-axis (dependent on GRF variable)
-                if axInd <= 2:
-                    plt.gca().set_ylabel('Force (N)', fontsize = 8, fontweight = 'bold')
-                elif 2 < axInd < 6:
-                    plt.gca().set_ylabel('COP Location (m)', fontsize = 8, fontweight = 'bold')
-                elif axInd >= 6:
-                    plt.gca().set_ylabel('Torque (Nm)', fontsize = 8, fontweight = 'bold')
-    
-                #Set title
-                plt.gca().set_title(grfVarsTitle[axInd], pad = 3, fontsize = 10, fontweight = 'bold')
-                
-            #Turn off un-used axes (i.e. vertical COP is useless)
-            ax[1,1].remove()
-            
-            #Add figure title
-            fig.suptitle(f'{subject} GRF Comparison (Experimental = Black, AddBiomechanics = Gold)',
-                         fontsize = 10, fontweight = 'bold', y = 0.99)
-    
-            #Save figure
-            fig.savefig(os.path.join('..','..','data','HamnerDelp2013',subject,'results','figures',f'{subject}_{runLabel}_grfComparison.png'),
-                        format = 'png', dpi = 300)
-            
-            #Close figure
-            plt.close('all')
-            
-            #Save GRF data dictionaries
-            #Experimental
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_experimentalGRFs.pkl'), 'wb') as writeFile:
-                pickle.dump(expGRFs, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_experimentalMeanGRFs.pkl'), 'wb') as writeFile:
-                pickle.dump(expMeanGRFs, writeFile)
+            #Plot mean curves
+            
+            #Calculate mean for current GRF variables
+            
+            #Force data
+            
+            #Experimental data
+            expMeanGRFs[runLabel][forceLabel1] = np.mean([expGRFs[runLabel][cycle][forceLabel1] for cycle in cycleList], axis = 0)
+            expMeanGRFs[runLabel][forceLabel2] = np.mean([expGRFs[runLabel][cycle][forceLabel2] for cycle in cycleList], axis = 0)
+            
+            #AddBiomechanics data
+            addBiomechMeanGRFs[runLabel][addBiomechForceLabel1] = np.mean([addBiomechGRFs[runLabel][cycle][addBiomechForceLabel1] for cycle in cycleList], axis = 0)
+            addBiomechMeanGRFs[runLabel][addBiomechForceLabel2] = np.mean([addBiomechGRFs[runLabel][cycle][addBiomechForceLabel2] for cycle in cycleList], axis = 0)
+            
+            #Point data
+            
+            #Experimental data
+            expMeanGRFs[runLabel][pointLabel1] = np.mean([expGRFs[runLabel][cycle][pointLabel1] for cycle in cycleList], axis = 0)
+            expMeanGRFs[runLabel][pointLabel2] = np.mean([expGRFs[runLabel][cycle][pointLabel2] for cycle in cycleList], axis = 0)
+            
+            #AddBiomechanics data
+            addBiomechMeanGRFs[runLabel][addBiomechPointLabel1] = np.mean([addBiomechGRFs[runLabel][cycle][addBiomechPointLabel1] for cycle in cycleList], axis = 0)
+            addBiomechMeanGRFs[runLabel][addBiomechPointLabel2] = np.mean([addBiomechGRFs[runLabel][cycle][addBiomechPointLabel2] for cycle in cycleList], axis = 0)
+            
+            #Torque data
+            
+            #Experimental data
+            expMeanGRFs[runLabel][torqueLabel1] = np.mean([expGRFs[runLabel][cycle][torqueLabel1] for cycle in cycleList], axis = 0)
+            expMeanGRFs[runLabel][torqueLabel2] = np.mean([expGRFs[runLabel][cycle][torqueLabel2] for cycle in cycleList], axis = 0)
+            
+            #AddBiomechanics data
+            addBiomechMeanGRFs[runLabel][addBiomechTorqueLabel1] = np.mean([addBiomechGRFs[runLabel][cycle][addBiomechTorqueLabel1] for cycle in cycleList], axis = 0)
+            addBiomechMeanGRFs[runLabel][addBiomechTorqueLabel2] = np.mean([addBiomechGRFs[runLabel][cycle][addBiomechTorqueLabel2] for cycle in cycleList], axis = 0)
+            
+            #Plot means
+            
+            #Plot force data
+            #Experimental means
+            ax[0,ii].plot(gaitCyclePoints, expMeanGRFs[runLabel][forceLabel1] + expMeanGRFs[runLabel][forceLabel2], **meanLineStyles['ik'])
+            #AddBiomechanics data
+            ax[0,ii].plot(gaitCyclePoints, addBiomechMeanGRFs[runLabel][addBiomechForceLabel1] + addBiomechMeanGRFs[runLabel][addBiomechForceLabel2], **meanLineStyles['addBiomech'])
+            
+            #Plot point data
+            #Experimental means
+            ax[1,ii].plot(gaitCyclePoints, expMeanGRFs[runLabel][pointLabel1] + expMeanGRFs[runLabel][pointLabel2], **meanLineStyles['ik'])
+            #AddBiomechanics data
+            ax[1,ii].plot(gaitCyclePoints, addBiomechMeanGRFs[runLabel][addBiomechPointLabel1] + addBiomechMeanGRFs[runLabel][addBiomechPointLabel2], **meanLineStyles['addBiomech'])
+            
+            #Plot torque data
+            #Experimental means
+            ax[2,ii].plot(gaitCyclePoints, expMeanGRFs[runLabel][torqueLabel1] + expMeanGRFs[runLabel][torqueLabel2], **meanLineStyles['ik'])
             #AddBiomechanics data
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechGRFs.pkl'), 'wb') as writeFile:
-                pickle.dump(addBiomechGRFs, writeFile)
-            with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechMeanGRFs.pkl'), 'wb') as writeFile:
-                pickle.dump(addBiomechMeanGRFs, writeFile)
+            ax[2,ii].plot(gaitCyclePoints, addBiomechMeanGRFs[runLabel][addBiomechTorqueLabel1] + addBiomechMeanGRFs[runLabel][addBiomechTorqueLabel2], **meanLineStyles['addBiomech'])
+            
+        #Clean up generic axis properties
+        for axInd, varAx in enumerate(ax.flat):
+        
+            #Set x-limits
+            varAx.set_xlim([0,100])
+            
+            #Turn off top-right spines
+            varAx.spines['top'].set_visible(False)
+            varAx.spines['right'].set_visible(False)
+            
+            #Add zero-dash line if necessary
+            if varAx.get_ylim()[0] < 0 < varAx.get_ylim()[-1]:
+                varAx.axhline(y = 0, color = 'dimgrey', linewidth = 0.5, ls = ':', zorder = 1)
+                
+            #Set axis ticks in
+            varAx.tick_params('both', direction = 'in', length = 3)
+            
+            #Set x-ticks at 0, 50 and 100
+            varAx.set_xticks([0,50,100])
+            #Remove labels if not on bottom row
+            if axInd < 6:
+                varAx.set_xticklabels([])
+        
+            #Add labels
+            
+            #X-axis (if bottom row)
+            if axInd >= 6:
+                varAx.set_xlabel('0-100% Gait Cycle', fontsize = 8, fontweight = 'bold')
+            
+            #Y-axis (dependent on GRF variable)
+            if axInd <= 2:
+                varAx.set_ylabel('Force (N)', fontsize = 8, fontweight = 'bold')
+            elif 2 < axInd < 6:
+                varAx.set_ylabel('COP Location (m)', fontsize = 8, fontweight = 'bold')
+            elif axInd >= 6:
+                varAx.set_ylabel('Torque (Nm)', fontsize = 8, fontweight = 'bold')
+
+            #Set title
+            varAx.set_title(grfVarsTitle[axInd], pad = 3, fontsize = 10, fontweight = 'bold')
+            
+        #Turn off un-used axes (i.e. vertical COP is useless)
+        ax[1,1].remove()
+        
+        #Add figure title
+        fig.suptitle(f'{subject} GRF Comparison (Experimental = Black, AddBiomechanics = Gold)',
+                     fontsize = 10, fontweight = 'bold', y = 0.99)
+
+        #Save figure
+        fig.savefig(os.path.join(figuresDir,f'{subject}_{runLabel}_grfComparison.png'),
+                    format = 'png', dpi = checkFigureDpi, pil_kwargs = {'compress_level': 1})
+        
+        #Close figure
+        plt.close(fig)
+        
+        #Save the experimental and AddBiomechanics GRF arrays together in a single compressed numpy file
+        #The cycle data is indexed by run, cycle, variable and time, and the mean data by run,
+        #variable and time. The run, cycle and variable labels are stored alongside these.
+        grfVars = grfForceVars+grfPointVars+grfTorqueVars
+        addBiomechGrfVars = addBiomechForceVars+addBiomechPointVars+addBiomechTorqueVars
+        np.savez_compressed(os.path.join(outputsDir,f'{subject}_grfs.npz'),
+                            runs = np.array(runList), cycles = np.array(cycleList),
+                            expVariables = np.array(grfVars),
+                            addBiomechVariables = np.array(addBiomechGrfVars),
+                            expGRFs = np.array([[[expGRFs[run][cyc][var] for var in grfVars] for cyc in cycleList] for run in runList]),
+                            addBiomechGRFs = np.array([[[addBiomechGRFs[run][cyc][var] for var in addBiomechGrfVars] for cyc in cycleList] for run in runList]),
+                            expMeanGRFs = np.array([[expMeanGRFs[run][var] for var in grfVars] for run in runList]),
+                            addBiomechMeanGRFs = np.array([[addBiomechMeanGRFs[run][var] for var in addBiomechGrfVars] for run in runList]))
+
+#Check for whether to compile data
+if compileData:
+    
+    # %% Loop through subject list
+    
+    #The subjects are independent of one another so they can be compiled across
+    #worker processes, otherwise they are compiled one after the other
+    if nSubjectWorkers > 1:
+        with ProcessPoolExecutor(max_workers = nSubjectWorkers,
+                                 initializer = partial(importPackages, dataPackages = True, plotPackages = True)) as executor:
+            list(executor.map(compileSubjectData, subList))
+    else:
+        for subject in subList:
+            compileSubjectData(subject)
+        
+        #Close the reused figures now that all subjects are done
+        for fig, ax in compileFigures.values():
+            plt.close(fig)
     
 # %% Analyse data from simulations
 
@@ -2661,25 +2215,22 @@ if analyseData:
     for subject in subList:
         
         #Load in the subjects gait timing data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'expData','gaitTimes.pkl'), 'rb') as openFile:
+        with open(os.path.join(dataDir,subject,'expData','gaitTimes.pkl'), 'rb') as openFile:
             gaitTimings = pickle.load(openFile)
         
         #Load RRA solution time data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'rra',runLabel,f'{subject}_rraRunTimeData.pkl'), 'rb') as openFile:
-            rraRunTime = pickle.load(openFile)
+        rraRunTime = helper.loadRunTimeData(os.path.join(dataDir,subject,'rra',runLabel,f'{subject}_rraRunTimeData.pkl'))
             
         #Load RRA3 solution time data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'rra3',runLabel,f'{subject}_rra3RunTimeData.pkl'), 'rb') as openFile:
-            rra3RunTime = pickle.load(openFile)
+        rra3RunTime = helper.loadRunTimeData(os.path.join(dataDir,subject,'rra3',runLabel,f'{subject}_rra3RunTimeData.pkl'))
             
         #Load Moco solution time data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'moco',runLabel,f'{subject}_mocoRunTimeData.pkl'), 'rb') as openFile:
-            mocoRunTime = pickle.load(openFile)
+        mocoRunTime = helper.loadRunTimeData(os.path.join(dataDir,subject,'moco',runLabel,f'{subject}_mocoRunTimeData.pkl'))
             
         #Extract AddBiomechanics processing time from logs
         
         #Read in the log file
-        fid = open(os.path.join('..','..','data','HamnerDelp2013',subject,'addBiomechanics',runLabel,'processingLogs.txt'), 'r')
+        fid = open(os.path.join(dataDir,subject,'addBiomechanics',runLabel,'processingLogs.txt'), 'r')
         logText = fid.readlines()
         fid.close()
         
@@ -2693,7 +2244,7 @@ if analyseData:
         #Get the average duration across cycles
         avgCycleDuration = np.array([gaitTimings[runLabel][cycle]['finalTime'] - gaitTimings[runLabel][cycle]['initialTime'] for cycle in cycleList]).mean()
         #Get duration of AddBiomechanics entire trial
-        addBiomechTime = osim.TimeSeriesTableVec3(os.path.join('..','..','data','HamnerDelp2013',subject,'addBiomechanics',runLabel,f'{runName}.trc')).getIndependentColumn()
+        addBiomechTime = osim.TimeSeriesTableVec3(os.path.join(dataDir,subject,'addBiomechanics',runLabel,f'{runName}.trc')).getIndependentColumn()
         addBiomechDuration = addBiomechTime[-1] - addBiomechTime[0]
         #Determine the proportion of the entire AddBiomechanics trial that the avergae cycle would cover
         #Multiply the total AddBiomechanics timeby this to scale
@@ -2801,18 +2352,18 @@ if analyseData:
     plt.tight_layout()
     
     #Save figure
-    fig.savefig(os.path.join('..','..','results','HamnerDelpDataset','figures','averageSolutionTimes.png'),
+    fig.savefig(os.path.join(resultsDir,'figures','averageSolutionTimes.png'),
                 format = 'png', dpi = 300)
     
     #Close figure
-    plt.close()
+    plt.close(fig)
     
     #Export solution times dictionary to file
-    with open(os.path.join('..','..','results','HamnerDelpDataset','outputs','solutionTimes.pkl'), 'wb') as writeFile:
-        pickle.dump(solutionTimes, writeFile)
+    with open(os.path.join(resultsDir,'outputs','solutionTimes.pkl'), 'wb') as writeFile:
+        pickle.dump(solutionTimes, writeFile, protocol = pickle.HIGHEST_PROTOCOL)
         
     #Export summary data to csv file
-    solutionTimes_df.to_csv(os.path.join('..','..','results','HamnerDelpDataset','outputs','solutionTimes_summary.csv'),
+    solutionTimes_df.to_csv(os.path.join(resultsDir,'outputs','solutionTimes_summary.csv'),
                             index = False)
     
     # %% Extract average and peak residual forces/moments
@@ -2838,25 +2389,26 @@ if analyseData:
         #Moment residual recommendations are 1% of COM height * maximum external force
         
         #Read in external GRF and get peak force residual recommendation
-        expGRF = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'expData',f'{runName}_grf.mot'))
-        peakVGRF = np.array((expGRF.getDependentColumn('R_ground_force_vy').to_numpy().max(),
-                             expGRF.getDependentColumn('L_ground_force_vy').to_numpy().max())).max()
+        expGRFTime, expGRFCols, expGRFData = helper.getTableData(os.path.join(dataDir,subject,'expData',f'{runName}_grf.mot'))
+        peakVGRF = expGRFData[:,[expGRFCols['R_ground_force_vy'], expGRFCols['L_ground_force_vy']]].max()
         forceResidualRec = peakVGRF * 0.05
         
         #Extract centre of mass from static output
         #Load in scaled model
-        scaledModel = osim.Model(os.path.join('..','..','data','HamnerDelp2013',subject,'model',f'{subject}_adjusted_scaled.osim'))
+        scaledModel = osim.Model(os.path.join(dataDir,subject,'model',f'{subject}_adjusted_scaled.osim'))
         modelState = scaledModel.initSystem()
         #Read in static motion output
-        staticMotion = osim.TimeSeriesTable(os.path.join('..','..','data','HamnerDelp2013',subject,'model',f'{subject}_static_output.mot'))
+        staticTime, staticCols, staticData = helper.getTableData(os.path.join(dataDir,subject,'model',f'{subject}_static_output.mot'))
         #Set model to joint coordinates from static output
+        coordSet = scaledModel.updCoordinateSet()
         for coord in kinematicVars:
-            #Get absolute path to joint coordinate value in static output
-            jointPath = scaledModel.updCoordinateSet().get(coord).getAbsolutePathString()+'/value'
+            #Get the coordinate and absolute path to its value in static output
+            modelCoord = coordSet.get(coord)
+            jointPath = modelCoord.getAbsolutePathString()+'/value'
             #Get value from static output
-            staticCoordVal = staticMotion.getDependentColumn(jointPath).to_numpy()[0]
+            staticCoordVal = staticData[0,staticCols[jointPath]]
             #Set value in model
-            scaledModel.updCoordinateSet().get(coord).setValue(modelState, staticCoordVal)
+            modelCoord.setValue(modelState, staticCoordVal)
         #Realise model to position
         scaledModel.realizePosition(modelState)
         #Get model centre of mass
@@ -2868,36 +2420,24 @@ if analyseData:
         residualThresholds['F'][subList.index(subject)] = forceResidualRec
         residualThresholds['M'][subList.index(subject)] = momentResidualRec
         
-        #Load RRA residuals data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rraResiduals.pkl'), 'rb') as openFile:
-            rraResiduals = pickle.load(openFile)
-            
-        #Load RRA3 residuals data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rra3Residuals.pkl'), 'rb') as openFile:
-            rra3Residuals = pickle.load(openFile)
-            
-        #Load Moco residuals data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_mocoResiduals.pkl'), 'rb') as openFile:
-            mocoResiduals = pickle.load(openFile)
-            
-        #Load AddBiomechanics residuals data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechResiduals.pkl'), 'rb') as openFile:
-            addBiomechResiduals = pickle.load(openFile)
-    
-        #Loop through and extract peak residuals and average
-        for var in residualVars:
-            
-            #Extract the average from each cycle and average into the dictionaries
-            avgResiduals['rra'][var][subList.index(subject)] = np.array([np.abs(rraResiduals[runLabel][cycle][var]).mean() for cycle in cycleList]).mean()
-            avgResiduals['rra3'][var][subList.index(subject)] = np.array([np.abs(rra3Residuals[runLabel][cycle][var]).mean() for cycle in cycleList]).mean()
-            avgResiduals['moco'][var][subList.index(subject)] = np.array([np.abs(mocoResiduals[runLabel][cycle][var]).mean() for cycle in cycleList]).mean()
-            avgResiduals['addBiomech'][var][subList.index(subject)] = np.array([np.abs(addBiomechResiduals[runLabel][cycle][var]).mean() for cycle in cycleList]).mean()
-            
-            #Extract the peak from each cycle and average into the dictionaries
-            peakResiduals['rra'][var][subList.index(subject)] = np.array([np.abs(rraResiduals[runLabel][cycle][var]).max() for cycle in cycleList]).mean()
-            peakResiduals['rra3'][var][subList.index(subject)] = np.array([np.abs(rra3Residuals[runLabel][cycle][var]).max() for cycle in cycleList]).mean()
-            peakResiduals['moco'][var][subList.index(subject)] = np.array([np.abs(mocoResiduals[runLabel][cycle][var]).max() for cycle in cycleList]).mean()
-            peakResiduals['addBiomech'][var][subList.index(subject)] = np.array([np.abs(addBiomechResiduals[runLabel][cycle][var]).max() for cycle in cycleList]).mean()
+        #Load residuals data for all tools from the compressed numpy file
+        #This is indexed by tool, cycle, variable and time for the current run
+        with np.load(os.path.join(dataDir,subject,'results','outputs',f'{subject}_residuals.npz')) as residualsFile:
+            toolInds = {tool: toolInd for toolInd, tool in enumerate(residualsFile['tools'])}
+            varInds = {var: varInd for varInd, var in enumerate(residualsFile['variables'])}
+            subjectResiduals = np.abs(residualsFile['residuals'][:,list(residualsFile['runs']).index(runLabel)])
+        
+        #Calculate the average and peak from each cycle and average these across cycles
+        #These are indexed by tool and variable
+        subjectAvgResiduals = subjectResiduals.mean(axis = -1).mean(axis = 1)
+        subjectPeakResiduals = subjectResiduals.max(axis = -1).mean(axis = 1)
+    
+        #Loop through and place peak residuals and average into the dictionaries
+        subInd = subList.index(subject)
+        for tool in avgResiduals.keys():
+            for var in residualVars:
+                avgResiduals[tool][var][subInd] = subjectAvgResiduals[toolInds[tool],varInds[var]]
+                peakResiduals[tool][var][subInd] = subjectPeakResiduals[toolInds[tool],varInds[var]]
     
     #Average and display results for average residual variables
     for var in residualVars:
@@ -3166,11 +2706,11 @@ if analyseData:
     plt.tight_layout()
     
     #Save figure
-    fig.savefig(os.path.join('..','..','results','HamnerDelpDataset','figures','residualForces.png'),
+    fig.savefig(os.path.join(resultsDir,'figures','residualForces.png'),
                 format = 'png', dpi = 300)
     
     #Close figure
-    plt.close()
+    plt.close(fig)
     
     #Create figure for residual moments
     fig, ax = plt.subplots(nrows = 1, ncols = 2, figsize = (12,5))
@@ -3356,17 +2896,17 @@ if analyseData:
     plt.tight_layout()
     
     #Save figure
-    fig.savefig(os.path.join('..','..','results','HamnerDelpDataset','figures','residualMoments.png'),
+    fig.savefig(os.path.join(resultsDir,'figures','residualMoments.png'),
                 format = 'png', dpi = 300)
     
     #Close figure
-    plt.close()
+    plt.close(fig)
     
     #Export residual summary dataframes to file
-    avgResidualForces_df.to_csv(os.path.join('..','..','results','HamnerDelpDataset','outputs','avgResidualForces.csv'), index = False)
-    avgResidualMoments_df.to_csv(os.path.join('..','..','results','HamnerDelpDataset','outputs','avgResidualMoments.csv'), index = False)
-    peakResidualForces_df.to_csv(os.path.join('..','..','results','HamnerDelpDataset','outputs','peakResidualForces.csv'), index = False)
-    peakResidualMoments_df.to_csv(os.path.join('..','..','results','HamnerDelpDataset','outputs','peakResidualMoments.csv'), index = False)
+    avgResidualForces_df.to_csv(os.path.join(resultsDir,'outputs','avgResidualForces.csv'), index = False)
+    avgResidualMoments_df.to_csv(os.path.join(resultsDir,'outputs','avgResidualMoments.csv'), index = False)
+    peakResidualForces_df.to_csv(os.path.join(resultsDir,'outputs','peakResidualForces.csv'), index = False)
+    peakResidualMoments_df.to_csv(os.path.join(resultsDir,'outputs','peakResidualMoments.csv'), index = False)
        
     # %% Extract root mean square deviations of kinematic data
          
@@ -3379,47 +2919,27 @@ if analyseData:
     #Loop through subject list
     for subject in subList:
         
-        #Define dictionary to store subject data
-        rmseData = {}
-        
-        #Load IK RMSD data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_ikKinematicsRMSE.pkl'), 'rb') as openFile:
-            rmseData['IK'] = pickle.load(openFile)
-        
-        #Load RRA RMSD data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rraKinematicsRMSE.pkl'), 'rb') as openFile:
-            rmseData['RRA'] = pickle.load(openFile)
-            
-        #Load RRA3 RMSD data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rra3KinematicsRMSE.pkl'), 'rb') as openFile:
-            rmseData['RRA3'] = pickle.load(openFile)
-        
-        #Load Moco RMSD data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_mocoKinematicsRMSE.pkl'), 'rb') as openFile:
-            rmseData['Moco'] = pickle.load(openFile)
-            
-        #Load AddBiomechanics RMSD data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechKinematicsRMSE.pkl'), 'rb') as openFile:
-            rmseData['AddBiomechanics'] = pickle.load(openFile)
+        #Read in the mean RMSE across cycles from the compressed numpy file
+        #This is indexed by tool, tool and variable, with the tools in the same order as the approach list
+        with np.load(os.path.join(dataDir,subject,'results','outputs',f'{subject}_kinematics.npz')) as kinematicsFile:
+            rmseData = kinematicsFile['kinematicsRMSE'][:,:,-1,:]
+            rmseVars = list(kinematicsFile['variables'])
     
         #Loop through and extract mean for generic kinematic variables
         for var in kinematicVarsGen:
             
             #Check for pelvis/lumbar variable
             if 'pelvis' in var or 'lumbar' in var:
-                #Loop through approaches
-                for outerApproach in approachList:
-                    for innerApproach in approachList:
-                        #Extract the mean and place in dictionary 
-                        kinematicsRMSD[outerApproach][innerApproach][var][subList.index(subject)] = \
-                            rmseData[outerApproach][innerApproach][runLabel]['mean'][var]
+                #Extract the mean for the variable
+                varRMSE = rmseData[:,:,rmseVars.index(var)]
             else:
-                #Loop through approaches
-                for outerApproach in approachList:
-                    for innerApproach in approachList:
-                        #Extract the mean for combined left and right sidess and place in dictionary 
-                        kinematicsRMSD[outerApproach][innerApproach][var][subList.index(subject)] = \
-                            np.array((rmseData[outerApproach][innerApproach][runLabel]['mean'][f'{var}_r'], rmseData[outerApproach][innerApproach][runLabel]['mean'][f'{var}_l'])).mean()
+                #Extract the mean for combined left and right sides
+                varRMSE = rmseData[:,:,[rmseVars.index(f'{var}_r'), rmseVars.index(f'{var}_l')]].mean(axis = -1)
+            
+            #Loop through approaches and place in dictionary
+            for outerInd, outerApproach in enumerate(approachList):
+                for innerInd, innerApproach in enumerate(approachList):
+                    kinematicsRMSD[outerApproach][innerApproach][var][subList.index(subject)] = varRMSE[outerInd,innerInd]
     
     #Average and display results for variables
     #Loop through approaches
@@ -3437,8 +2957,8 @@ if analyseData:
                         print(f'Average {var} RMSD for {innerApproach} vs. {outerApproach}: {np.round(kinematicsRMSD[outerApproach][innerApproach][var].mean(),2)} +/- {np.round(kinematicsRMSD[outerApproach][innerApproach][var].std(),2)}')
     
     #Export RMSD dictionary to file
-    with open(os.path.join('..','..','results','HamnerDelpDataset','outputs','kinematicsRMSD.pkl'), 'wb') as writeFile:
-        pickle.dump(kinematicsRMSD, writeFile)
+    with open(os.path.join(resultsDir,'outputs','kinematicsRMSD.pkl'), 'wb') as writeFile:
+        pickle.dump(kinematicsRMSD, writeFile, protocol = pickle.HIGHEST_PROTOCOL)
         
     # %% Compare average kinematics across approaches
     
@@ -3452,33 +2972,18 @@ if analyseData:
     #Loop through subject list
     for subject in subList:
     
-        #Read in IK kinematic data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_ikMeanKinematics.pkl'), 'rb') as openFile:
-            ikMeanKinematics = pickle.load(openFile)
-            
-        #Read in RRA kinematic data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rraMeanKinematics.pkl'), 'rb') as openFile:
-            rraMeanKinematics = pickle.load(openFile)
-        
-        #Read in RRA3 kinematic data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rra3MeanKinematics.pkl'), 'rb') as openFile:
-            rra3MeanKinematics = pickle.load(openFile)
-            
-        #Read in Moco kinematic data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_mocoMeanKinematics.pkl'), 'rb') as openFile:
-            mocoMeanKinematics = pickle.load(openFile)
-            
-        #Read in AddBiomechanics kinematic data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechMeanKinematics.pkl'), 'rb') as openFile:
-            addBiomechMeanKinematics = pickle.load(openFile)
+        #Read in the mean kinematic data for all tools from the compressed numpy file
+        #This is indexed by tool, run, variable and time
+        with np.load(os.path.join(dataDir,subject,'results','outputs',f'{subject}_kinematics.npz')) as kinematicsFile:
+            toolInds = {tool: toolInd for toolInd, tool in enumerate(kinematicsFile['tools'])}
+            varInds = {var: varInd for varInd, var in enumerate(kinematicsFile['variables'])}
+            subjectMeanKinematics = kinematicsFile['meanKinematics'][:,list(kinematicsFile['runs']).index(runLabel)]
             
         #Loop through and extract kinematic data
-        for var in kinematicVars:
-            meanKinematics['ik'][var][subList.index(subject),:] = ikMeanKinematics[runLabel][var]
-            meanKinematics['rra'][var][subList.index(subject),:] = rraMeanKinematics[runLabel][var]
-            meanKinematics['rra3'][var][subList.index(subject),:] = rra3MeanKinematics[runLabel][var]
-            meanKinematics['moco'][var][subList.index(subject),:] = mocoMeanKinematics[runLabel][var]
-            meanKinematics['addBiomech'][var][subList.index(subject),:] = addBiomechMeanKinematics[runLabel][var]
+        subInd = subList.index(subject)
+        for tool in meanKinematics.keys():
+            for var in kinematicVars:
+                meanKinematics[tool][var][subInd,:] = subjectMeanKinematics[toolInds[tool],varInds[var]]
             
     #Create figure of group kinematics across the different approaches
     #Note that generic kinematic variables are used here and right side values are presented
@@ -3487,14 +2992,14 @@ if analyseData:
     fig, ax = plt.subplots(nrows = 4, ncols = 6, figsize = (14,8))
     
     #Adjust subplots
-    plt.subplots_adjust(left = 0.075, right = 0.95, bottom = 0.05, top = 0.95,
+    fig.subplots_adjust(left = 0.075, right = 0.95, bottom = 0.05, top = 0.95,
                         hspace = 0.4, wspace = 0.5)
     
     #Loop through variables and plot data
     for var in kinematicVarsPlot.keys():
         
         #Set the appropriate axis
-        plt.sca(ax[kinematicVarsPlot[var][0],kinematicVarsPlot[var][1]])
+        varAx = ax[kinematicVarsPlot[var][0],kinematicVarsPlot[var][1]]
         
         #Set the plotting variable based on whether it is a general or side variable
         if var in ['pelvis_tx', 'pelvis_ty', 'pelvis_tz', 'pelvis_tilt', 'pelvis_list', 'pelvis_rotation',
@@ -3506,54 +3011,54 @@ if analyseData:
         #Plot mean and SD curves
         
         #IK mean
-        plt.plot(np.linspace(0,100,101), meanKinematics['ik'][plotVar].mean(axis = 0),
-                 ls = '-', lw = 1, c = ikCol, alpha = 1.0, zorder = 3)
+        varAx.plot(gaitCyclePoints, meanKinematics['ik'][plotVar].mean(axis = 0),
+                   ls = '-', lw = 1, c = ikCol, alpha = 1.0, zorder = 3)
         # #IK sd
-        # plt.fill_between(np.linspace(0,100,101),
+        # plt.fill_between(gaitCyclePoints,
         #                  meanKinematics['ik'][plotVar].mean(axis = 0) + meanKinematics['ik'][plotVar].std(axis = 0),
         #                  meanKinematics['ik'][plotVar].mean(axis = 0) - meanKinematics['ik'][plotVar].std(axis = 0),
         #                  color = ikCol, alpha = 0.1, zorder = 2, lw = 0)
         
         #RRA mean
-        plt.plot(np.linspace(0,100,101), meanKinematics['rra'][plotVar].mean(axis = 0),
-                 ls = '-', lw = 1, c = rraCol,
-                 marker = markerDict['rra'], markevery = 5, markersize = 3,
-                 alpha = 1.0, zorder = 3)
+        varAx.plot(gaitCyclePoints, meanKinematics['rra'][plotVar].mean(axis = 0),
+                   ls = '-', lw = 1, c = rraCol,
+                   marker = markerDict['rra'], markevery = 5, markersize = 3,
+                   alpha = 1.0, zorder = 3)
         # #RRA sd
-        # plt.fill_between(np.linspace(0,100,101),
+        # plt.fill_between(gaitCyclePoints,
         #                  meanKinematics['rra'][plotVar].mean(axis = 0) + meanKinematics['rra'][plotVar].std(axis = 0),
         #                  meanKinematics['rra'][plotVar].mean(axis = 0) - meanKinematics['rra'][plotVar].std(axis = 0),
         #                  color = rraCol, alpha = 0.1, zorder = 2, lw = 0)
         
         #RRA3 mean
-        plt.plot(np.linspace(0,100,101), meanKinematics['rra3'][plotVar].mean(axis = 0),
-                 ls = ':', lw = 1, c = rra3Col, 
-                 marker = markerDict['rra3'], markevery = 5, markersize = 3,
-                 alpha = 1.0, zorder = 3)
+        varAx.plot(gaitCyclePoints, meanKinematics['rra3'][plotVar].mean(axis = 0),
+                   ls = ':', lw = 1, c = rra3Col, 
+                   marker = markerDict['rra3'], markevery = 5, markersize = 3,
+                   alpha = 1.0, zorder = 3)
         # #RRA3 sd
-        # plt.fill_between(np.linspace(0,100,101),
+        # plt.fill_between(gaitCyclePoints,
         #                  meanKinematics['rra3'][plotVar].mean(axis = 0) + meanKinematics['rra3'][plotVar].std(axis = 0),
         #                  meanKinematics['rra3'][plotVar].mean(axis = 0) - meanKinematics['rra3'][plotVar].std(axis = 0),
         #                  color = rra3Col, alpha = 0.1, zorder = 2, lw = 0)
         
         #Moco mean
-        plt.plot(np.linspace(0,100,101), meanKinematics['moco'][plotVar].mean(axis = 0),
-                 ls = '--', lw = 1, c = mocoCol,
-                 marker = markerDict['moco'], markevery = 5, markersize = 3,
-                 alpha = 1.0, zorder = 3)
+        varAx.plot(gaitCyclePoints, meanKinematics['moco'][plotVar].mean(axis = 0),
+                   ls = '--', lw = 1, c = mocoCol,
+                   marker = markerDict['moco'], markevery = 5, markersize = 3,
+                   alpha = 1.0, zorder = 3)
         # #Moco sd
-        # plt.fill_between(np.linspace(0,100,101),
+        # plt.fill_between(gaitCyclePoints,
         #                  meanKinematics['moco'][plotVar].mean(axis = 0) + meanKinematics['moco'][plotVar].std(axis = 0),
         #                  meanKinematics['moco'][plotVar].mean(axis = 0) - meanKinematics['moco'][plotVar].std(axis = 0),
         #                  color = mocoCol, alpha = 0.1, zorder = 2, lw = 0)
         
         #AddBiomechanics mean
-        plt.plot(np.linspace(0,100,101), meanKinematics['addBiomech'][plotVar].mean(axis = 0),
-                 ls = '--', lw = 1, c = addBiomechCol,
-                 marker = markerDict['addBiomech'], markevery = 5, markersize = 3,
-                 alpha = 1.0, zorder = 3)
+        varAx.plot(gaitCyclePoints, meanKinematics['addBiomech'][plotVar].mean(axis = 0),
+                   ls = '--', lw = 1, c = addBiomechCol,
+                   marker = markerDict['addBiomech'], markevery = 5, markersize = 3,
+                   alpha = 1.0, zorder = 3)
         # #AddBiomechanics sd
-        # plt.fill_between(np.linspace(0,100,101),
+        # plt.fill_between(gaitCyclePoints,
         #                  meanKinematics['addBiomech'][plotVar].mean(axis = 0) + meanKinematics['addBiomech'][plotVar].std(axis = 0),
         #                  meanKinematics['addBiomech'][plotVar].mean(axis = 0) - meanKinematics['addBiomech'][plotVar].std(axis = 0),
         #                  color = addBiomechCol, alpha = 0.1, zorder = 2, lw = 0)
@@ -3561,41 +3066,41 @@ if analyseData:
         #Clean up axis properties
         
         #Set x-limits
-        plt.gca().set_xlim([0,100])
+        varAx.set_xlim([0,100])
         
         #Add labels
         
         #X-axis (if bottom row)
         if kinematicVarsPlot[var][0] == 3:
-            plt.gca().set_xlabel('0-100% Gait Cycle', fontsize = 10, fontweight = 'bold')
+            varAx.set_xlabel('0-100% Gait Cycle', fontsize = 10, fontweight = 'bold')
             
         #Y-axis
         if var in ['pelvis_tx', 'pelvis_ty', 'pelvis_tz']:
-            plt.gca().set_ylabel('Position (m)', fontsize = 10, fontweight = 'bold')
+            varAx.set_ylabel('Position (m)', fontsize = 10, fontweight = 'bold')
         else:
-            plt.gca().set_ylabel('Joint Angle (\u00b0)', fontsize = 10, fontweight = 'bold')
+            varAx.set_ylabel('Joint Angle (\u00b0)', fontsize = 10, fontweight = 'bold')
     
         #Set title
-        plt.gca().set_title(kinematicVarsTitle[list(kinematicVarsPlot.keys()).index(var)],
-                            pad = 5, fontsize = 10, fontweight = 'bold')
+        varAx.set_title(kinematicVarsTitle[list(kinematicVarsPlot.keys()).index(var)],
+                        pad = 5, fontsize = 10, fontweight = 'bold')
             
         #Add zero-dash line if necessary
-        if plt.gca().get_ylim()[0] < 0 < plt.gca().get_ylim()[-1]:
-            plt.gca().axhline(y = 0, color = 'dimgrey', linewidth = 0.5, ls = ':', zorder = 1)
+        if varAx.get_ylim()[0] < 0 < varAx.get_ylim()[-1]:
+            varAx.axhline(y = 0, color = 'dimgrey', linewidth = 0.5, ls = ':', zorder = 1)
                 
         #Turn off top-right spines
-        plt.gca().spines['top'].set_visible(False)
-        plt.gca().spines['right'].set_visible(False)
+        varAx.spines['top'].set_visible(False)
+        varAx.spines['right'].set_visible(False)
         
         #Set axis ticks in
-        plt.gca().tick_params('both', direction = 'in', length = 3)
+        varAx.tick_params('both', direction = 'in', length = 3)
         
         #Set x-ticks at 0, 50 and 100
-        plt.gca().set_xticks([0,50,100])
+        varAx.set_xticks([0,50,100])
         
         #Remove x-tick labels if not bottom row
         if kinematicVarsPlot[var][0] != 3:
-            plt.gca().set_xticklabels([])
+            varAx.set_xticklabels([])
         
     #Turn off un-used axes
     ax[1,5].axis('off')
@@ -3604,61 +3109,61 @@ if analyseData:
     ax[2,5].axis('off')
     
     #Create legend on dummy axis in bottom right
-    plt.sca(ax[3,5])
+    legendAx = ax[3,5]
     
     #Plot dummy data
     #IK
-    plt.plot(np.linspace(0,100,101), np.arange(0,1,1/101), label = 'IK',
-             ls = '-', lw = 1, c = ikCol, alpha = 1.0, zorder = 3)
+    legendAx.plot(gaitCyclePoints, np.arange(0,1,1/101), label = 'IK',
+                  ls = '-', lw = 1, c = ikCol, alpha = 1.0, zorder = 3)
     #RRA
-    plt.plot(np.linspace(0,100,101), np.arange(0,1,1/101), label = 'RRA',
-             ls = '-', lw = 1, c = rraCol,
-             marker = markerDict['rra'], markevery = 5, markersize = 3,
-             alpha = 1.0, zorder = 3)
+    legendAx.plot(gaitCyclePoints, np.arange(0,1,1/101), label = 'RRA',
+                  ls = '-', lw = 1, c = rraCol,
+                  marker = markerDict['rra'], markevery = 5, markersize = 3,
+                  alpha = 1.0, zorder = 3)
     #RRA3
-    plt.plot(np.linspace(0,100,101), np.arange(0,1,1/101), label = 'RRA3',
-             ls = ':', lw = 1, c = rra3Col, 
-             marker = markerDict['rra3'], markevery = 5, markersize = 3,
-             alpha = 1.0, zorder = 3)
+    legendAx.plot(gaitCyclePoints, np.arange(0,1,1/101), label = 'RRA3',
+                  ls = ':', lw = 1, c = rra3Col, 
+                  marker = markerDict['rra3'], markevery = 5, markersize = 3,
+                  alpha = 1.0, zorder = 3)
     #Moco
-    plt.plot(np.linspace(0,100,101), np.arange(0,1,1/101), label = 'Moco',
-             ls = '--', lw = 1, c = mocoCol,
-             marker = markerDict['moco'], markevery = 5, markersize = 3,
-             alpha = 1.0, zorder = 3)
+    legendAx.plot(gaitCyclePoints, np.arange(0,1,1/101), label = 'Moco',
+                  ls = '--', lw = 1, c = mocoCol,
+                  marker = markerDict['moco'], markevery = 5, markersize = 3,
+                  alpha = 1.0, zorder = 3)
     #AddBiomechanics
-    plt.plot(np.linspace(0,100,101), np.arange(0,1,1/101), label = 'AddBiomechanics',
-             ls = '--', lw = 1, c = addBiomechCol,
-             marker = markerDict['addBiomech'], markevery = 5, markersize = 3,
-             alpha = 1.0, zorder = 3)
+    legendAx.plot(gaitCyclePoints, np.arange(0,1,1/101), label = 'AddBiomechanics',
+                  ls = '--', lw = 1, c = addBiomechCol,
+                  marker = markerDict['addBiomech'], markevery = 5, markersize = 3,
+                  alpha = 1.0, zorder = 3)
     
     #Add legend
-    plt.legend()
+    legendAx.legend()
     
     #Remove all axis properties
     #Spines
-    plt.gca().spines['top'].set_visible(False)
-    plt.gca().spines['right'].set_visible(False)
-    plt.gca().spines['bottom'].set_visible(False)
-    plt.gca().spines['left'].set_visible(False)
+    legendAx.spines['top'].set_visible(False)
+    legendAx.spines['right'].set_visible(False)
+    legendAx.spines['bottom'].set_visible(False)
+    legendAx.spines['left'].set_visible(False)
     #Ticks
-    plt.gca().set_xticks([])
-    plt.gca().set_yticks([])
+    legendAx.set_xticks([])
+    legendAx.set_yticks([])
     #Axis limits to avoid data
-    plt.gca().set_ylim([50,100])
+    legendAx.set_ylim([50,100])
     
     #Set tight layout
-    plt.tight_layout()
+    fig.tight_layout()
     
     #Save figure
-    fig.savefig(os.path.join('..','..','results','HamnerDelpDataset','figures','meanKinematics.png'),
+    fig.savefig(os.path.join(resultsDir,'figures','meanKinematics.png'),
                 format = 'png', dpi = 300)
     
     #Close figure
-    plt.close('all')
+    plt.close(fig)
     
     #Export mean kinematics dictionary to file
-    with open(os.path.join('..','..','results','HamnerDelpDataset','outputs','meanKinematics.pkl'), 'wb') as writeFile:
-        pickle.dump(meanKinematics, writeFile)
+    with open(os.path.join(resultsDir,'outputs','meanKinematics.pkl'), 'wb') as writeFile:
+        pickle.dump(meanKinematics, writeFile, protocol = pickle.HIGHEST_PROTOCOL)
         
     # %% Compare average kinetics across approaches
     
@@ -3671,28 +3176,18 @@ if analyseData:
     #Loop through subject list
     for subject in subList:
             
-        #Read in RRA kinetic data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rraMeanKinetics.pkl'), 'rb') as openFile:
-            rraMeanKinetics = pickle.load(openFile)
-        
-        #Read in RRA3 kinetic data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rra3MeanKinetics.pkl'), 'rb') as openFile:
-            rra3MeanKinetics = pickle.load(openFile)
-            
-        #Read in Moco kinetic data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_mocoMeanKinetics.pkl'), 'rb') as openFile:
-            mocoMeanKinetics = pickle.load(openFile)
+        #Read in the mean kinetic data for all tools from the compressed numpy file
+        #This is indexed by tool, variable and time for the current run
+        with np.load(os.path.join(dataDir,subject,'results','outputs',f'{subject}_kinetics.npz')) as kineticsFile:
+            toolInds = {tool: toolInd for toolInd, tool in enumerate(kineticsFile['tools'])}
+            varInds = {var: varInd for varInd, var in enumerate(kineticsFile['variables'])}
+            subjectMeanKinetics = kineticsFile['meanKinetics'][:,list(kineticsFile['runs']).index(runLabel)]
             
-        #Read in AddBiomechanics kinetic data
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechMeanKinetics.pkl'), 'rb') as openFile:
-            addBiomechMeanKinetics = pickle.load(openFile)
-            
-        #Loop through and extract kinematic data
-        for var in kineticVars:
-            meanKinetics['rra'][var][subList.index(subject),:] = rraMeanKinetics[runLabel][var]
-            meanKinetics['rra3'][var][subList.index(subject),:] = rra3MeanKinetics[runLabel][var]
-            meanKinetics['moco'][var][subList.index(subject),:] = mocoMeanKinetics[runLabel][var]
-            meanKinetics['addBiomech'][var][subList.index(subject),:] = addBiomechMeanKinetics[runLabel][var]
+        #Loop through and extract kinetic data
+        subInd = subList.index(subject)
+        for tool in meanKinetics.keys():
+            for var in kineticVars:
+                meanKinetics[tool][var][subInd,:] = subjectMeanKinetics[toolInds[tool],varInds[var]]
             
     #Create figure of group kinetics across the different approaches
     #Note that generic kinetic variablea are used here and right side values are presented
@@ -3701,14 +3196,14 @@ if analyseData:
     fig, ax = plt.subplots(nrows = 5, ncols = 3, figsize = (8,10))
     
     #Adjust subplots
-    plt.subplots_adjust(left = 0.075, right = 0.95, bottom = 0.05, top = 0.95,
+    fig.subplots_adjust(left = 0.075, right = 0.95, bottom = 0.05, top = 0.95,
                         hspace = 0.4, wspace = 0.5)
     
     #Loop through variables and plot data
     for var in kineticVarsPlot.keys():
         
         #Set the appropriate axis
-        plt.sca(ax[kineticVarsPlot[var][0],kineticVarsPlot[var][1]])
+        varAx = ax[kineticVarsPlot[var][0],kineticVarsPlot[var][1]]
         
         #Set the plotting variable based on whether it is a general or side variable
         if 'pelvis' in var or 'lumbar' in var:
@@ -3719,45 +3214,45 @@ if analyseData:
         #Plot mean and SD curves
         
         #RRA mean
-        plt.plot(np.linspace(0,100,101), meanKinetics['rra'][plotVar].mean(axis = 0),
-                 ls = '-', lw = 1, c = rraCol,
-                 marker = markerDict['rra'], markevery = 5, markersize = 3,
-                 alpha = 1.0, zorder = 3)
+        varAx.plot(gaitCyclePoints, meanKinetics['rra'][plotVar].mean(axis = 0),
+                   ls = '-', lw = 1, c = rraCol,
+                   marker = markerDict['rra'], markevery = 5, markersize = 3,
+                   alpha = 1.0, zorder = 3)
         # #RRA sd
-        # plt.fill_between(np.linspace(0,100,101),
+        # plt.fill_between(gaitCyclePoints,
         #                  meanKinetics['rra'][plotVar].mean(axis = 0) + meanKinetics['rra'][plotVar].std(axis = 0),
         #                  meanKinetics['rra'][plotVar].mean(axis = 0) - meanKinetics['rra'][plotVar].std(axis = 0),
         #                  color = rraCol, alpha = 0.1, zorder = 2, lw = 0)
         
         #RRA3 mean
-        plt.plot(np.linspace(0,100,101), meanKinetics['rra3'][plotVar].mean(axis = 0),
-                 ls = ':', lw = 1, c = rra3Col,
-                 marker = markerDict['rra3'], markevery = 5, markersize = 3,
-                 alpha = 1.0, zorder = 3)
+        varAx.plot(gaitCyclePoints, meanKinetics['rra3'][plotVar].mean(axis = 0),
+                   ls = ':', lw = 1, c = rra3Col,
+                   marker = markerDict['rra3'], markevery = 5, markersize = 3,
+                   alpha = 1.0, zorder = 3)
         # #RRA3 sd
-        # plt.fill_between(np.linspace(0,100,101),
+        # plt.fill_between(gaitCyclePoints,
         #                  meanKinetics['rra3'][plotVar].mean(axis = 0) + meanKinetics['rra3'][plotVar].std(axis = 0),
         #                  meanKinetics['rra3'][plotVar].mean(axis = 0) - meanKinetics['rra3'][plotVar].std(axis = 0),
         #                  color = rra3Col, alpha = 0.1, zorder = 2, lw = 0)
         
         #Moco mean
-        plt.plot(np.linspace(0,100,101), meanKinetics['moco'][plotVar].mean(axis = 0),
-                 ls = '--', lw = 1, c = mocoCol,
-                 marker = markerDict['moco'], markevery = 2, markersize = 3, ### different mark every used due to noisyness
-                 alpha = 1.0, zorder = 3)
+        varAx.plot(gaitCyclePoints, meanKinetics['moco'][plotVar].mean(axis = 0),
+                   ls = '--', lw = 1, c = mocoCol,
+                   marker = markerDict['moco'], markevery = 2, markersize = 3, ### different mark every used due to noisyness
+                   alpha = 1.0, zorder = 3)
         # #Moco sd
-        # plt.fill_between(np.linspace(0,100,101),
+        # plt.fill_between(gaitCyclePoints,
         #                  meanKinetics['moco'][plotVar].mean(axis = 0) + meanKinetics['moco'][plotVar].std(axis = 0),
         #                  meanKinetics['moco'][plotVar].mean(axis = 0) - meanKinetics['moco'][plotVar].std(axis = 0),
         #                  color = mocoCol, alpha = 0.1, zorder = 2, lw = 0)
         
         #AddBiomechanics mean
-        plt.plot(np.linspace(0,100,101), meanKinetics['addBiomech'][plotVar].mean(axis = 0),
-                 ls = '--', lw = 1.5, c = addBiomechCol,
-                 marker = markerDict['addBiomech'], markevery = 5, markersize = 3,
-                 alpha = 1.0, zorder = 3)
+        varAx.plot(gaitCyclePoints, meanKinetics['addBiomech'][plotVar].mean(axis = 0),
+                   ls = '--', lw = 1.5, c = addBiomechCol,
+                   marker = markerDict['addBiomech'], markevery = 5, markersize = 3,
+                   alpha = 1.0, zorder = 3)
         # #AddBiomechanics sd
-        # plt.fill_between(np.linspace(0,100,101),
+        # plt.fill_between(gaitCyclePoints,
         #                  meanKinetics['addBiomech'][plotVar].mean(axis = 0) + meanKinetics['addBiomech'][plotVar].std(axis = 0),
         #                  meanKinetics['addBiomech'][plotVar].mean(axis = 0) - meanKinetics['addBiomech'][plotVar].std(axis = 0),
         #                  color = addBiomechCol, alpha = 0.1, zorder = 2, lw = 0)
@@ -3765,92 +3260,92 @@ if analyseData:
         #Clean up axis properties
         
         #Set x-limits
-        plt.gca().set_xlim([0,100])
+        varAx.set_xlim([0,100])
         
         #Add labels
         
         #X-axis (if bottom row)
         if kineticVarsPlot[var][0] == 4:
-            plt.gca().set_xlabel('0-100% Gait Cycle', fontsize = 10, fontweight = 'bold')
+            varAx.set_xlabel('0-100% Gait Cycle', fontsize = 10, fontweight = 'bold')
             
         #Y-axis
-        plt.gca().set_ylabel('Joint Moment (Nm)', fontsize = 10, fontweight = 'bold')
+        varAx.set_ylabel('Joint Moment (Nm)', fontsize = 10, fontweight = 'bold')
     
         #Set title
-        plt.gca().set_title(kineticVarsTitle[list(kineticVarsPlot.keys()).index(var)],
-                            pad = 5, fontsize = 10, fontweight = 'bold')
+        varAx.set_title(kineticVarsTitle[list(kineticVarsPlot.keys()).index(var)],
+                        pad = 5, fontsize = 10, fontweight = 'bold')
             
         #Add zero-dash line if necessary
-        if plt.gca().get_ylim()[0] < 0 < plt.gca().get_ylim()[-1]:
-            plt.gca().axhline(y = 0, color = 'dimgrey', linewidth = 0.5, ls = ':', zorder = 1)
+        if varAx.get_ylim()[0] < 0 < varAx.get_ylim()[-1]:
+            varAx.axhline(y = 0, color = 'dimgrey', linewidth = 0.5, ls = ':', zorder = 1)
                 
         #Turn off top-right spines
-        plt.gca().spines['top'].set_visible(False)
-        plt.gca().spines['right'].set_visible(False)
+        varAx.spines['top'].set_visible(False)
+        varAx.spines['right'].set_visible(False)
         
         #Set axis ticks in
-        plt.gca().tick_params('both', direction = 'in', length = 3)
+        varAx.tick_params('both', direction = 'in', length = 3)
         
         #Set x-ticks at 0, 50 and 100
-        plt.gca().set_xticks([0,50,100])
+        varAx.set_xticks([0,50,100])
         
         #Remove x-tick labels if not bottom row
         if kineticVarsPlot[var][0] != 4:
-            plt.gca().set_xticklabels([])
+            varAx.set_xticklabels([])
         
     #Turn off un-used axes
     ax[1,2].axis('off')
     
     #Create legend on dummy axis in bottom right
-    plt.sca(ax[4,2])
+    legendAx = ax[4,2]
     
     #Plot dummy data
     #RRA
-    plt.plot(np.linspace(0,100,101), np.arange(0,1,1/101), label = 'RRA',
-             ls = '-', lw = 1, c = rraCol,
-             marker = markerDict['rra'], markevery = 5, markersize = 3,
-             alpha = 1.0, zorder = 3)
+    legendAx.plot(gaitCyclePoints, np.arange(0,1,1/101), label = 'RRA',
+                  ls = '-', lw = 1, c = rraCol,
+                  marker = markerDict['rra'], markevery = 5, markersize = 3,
+                  alpha = 1.0, zorder = 3)
     #RRA3
-    plt.plot(np.linspace(0,100,101), np.arange(0,1,1/101), label = 'RRA3',
-             ls = ':', lw = 1, c = rra3Col, 
-             marker = markerDict['rra3'], markevery = 5, markersize = 3,
-             alpha = 1.0, zorder = 3)
+    legendAx.plot(gaitCyclePoints, np.arange(0,1,1/101), label = 'RRA3',
+                  ls = ':', lw = 1, c = rra3Col, 
+                  marker = markerDict['rra3'], markevery = 5, markersize = 3,
+                  alpha = 1.0, zorder = 3)
     #Moco
-    plt.plot(np.linspace(0,100,101), np.arange(0,1,1/101), label = 'Moco',
-             ls = '--', lw = 1, c = mocoCol,
-             marker = markerDict['moco'], markevery = 5, markersize = 3,
-             alpha = 1.0, zorder = 3)
+    legendAx.plot(gaitCyclePoints, np.arange(0,1,1/101), label = 'Moco',
+                  ls = '--', lw = 1, c = mocoCol,
+                  marker = markerDict['moco'], markevery = 5, markersize = 3,
+                  alpha = 1.0, zorder = 3)
     #AddBiomechanics
-    plt.plot(np.linspace(0,100,101), np.arange(0,1,1/101), label = 'AddBiomechanics',
-             ls = '--', lw = 1, c = addBiomechCol,
-             marker = markerDict['addBiomech'], markevery = 5, markersize = 3,
-             alpha = 1.0, zorder = 3)
+    legendAx.plot(gaitCyclePoints, np.arange(0,1,1/101), label = 'AddBiomechanics',
+                  ls = '--', lw = 1, c = addBiomechCol,
+                  marker = markerDict['addBiomech'], markevery = 5, markersize = 3,
+                  alpha = 1.0, zorder = 3)
     
     #Add legend
-    plt.legend()
+    legendAx.legend()
     
     #Remove all axis properties
     #Spines
-    plt.gca().spines['top'].set_visible(False)
-    plt.gca().spines['right'].set_visible(False)
-    plt.gca().spines['bottom'].set_visible(False)
-    plt.gca().spines['left'].set_visible(False)
+    legendAx.spines['top'].set_visible(False)
+    legendAx.spines['right'].set_visible(False)
+    legendAx.spines['bottom'].set_visible(False)
+    legendAx.spines['left'].set_visible(False)
     #Ticks
-    plt.gca().set_xticks([])
-    plt.gca().set_yticks([])
+    legendAx.set_xticks([])
+    legendAx.set_yticks([])
     #Axis limits to avoid data
-    plt.gca().set_ylim([50,100])
+    legendAx.set_ylim([50,100])
         
     #Save figure
-    fig.savefig(os.path.join('..','..','results','HamnerDelpDataset','figures','meanKinetics.png'),
+    fig.savefig(os.path.join(resultsDir,'figures','meanKinetics.png'),
                 format = 'png', dpi = 300)
     
     #Close figure
-    plt.close('all')
+    plt.close(fig)
     
     #Export mean kinematics dictionary to file
-    with open(os.path.join('..','..','results','HamnerDelpDataset','outputs','meanKinetics.pkl'), 'wb') as writeFile:
-        pickle.dump(meanKinetics, writeFile)
+    with open(os.path.join(resultsDir,'outputs','meanKinetics.pkl'), 'wb') as writeFile:
+        pickle.dump(meanKinetics, writeFile, protocol = pickle.HIGHEST_PROTOCOL)
     
     # %% Create coloured models and average kinematic datafiles for each participant
     
@@ -3871,26 +3366,20 @@ if analyseData:
     for subject in subList:
         
         #Read in gait timings
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'expData','gaitTimes.pkl'), 'rb') as openFile:
+        with open(os.path.join(dataDir,subject,'expData','gaitTimes.pkl'), 'rb') as openFile:
             gaitTimings = pickle.load(openFile)
         
-        #Read in the kinematic data
-        
-        #IK
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_ikMeanKinematics.pkl'), 'rb') as openFile:
-            ikKinematics = pickle.load(openFile)
-        #RRA
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rraMeanKinematics.pkl'), 'rb') as openFile:
-            rraKinematics = pickle.load(openFile)
-        #RRA3
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rra3MeanKinematics.pkl'), 'rb') as openFile:
-            rra3Kinematics = pickle.load(openFile)
-        #Moco
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_mocoMeanKinematics.pkl'), 'rb') as openFile:
-            mocoKinematics = pickle.load(openFile)
-        #AddBiomechanics
-        with open(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechMeanKinematics.pkl'), 'rb') as openFile:
-            addBiomechKinematics = pickle.load(openFile)
+        #Read in the mean kinematic data for all tools from the compressed numpy file
+        #This is indexed by tool, run, variable and time
+        with np.load(os.path.join(dataDir,subject,'results','outputs',f'{subject}_kinematics.npz')) as kinematicsFile:
+            toolInds = {tool: toolInd for toolInd, tool in enumerate(kinematicsFile['tools'])}
+            varInds = {var: varInd for varInd, var in enumerate(kinematicsFile['variables'])}
+            subjectMeanKinematics = kinematicsFile['meanKinematics'][:,list(kinematicsFile['runs']).index(runLabel)]
+        ikKinematics = {runLabel: {var: subjectMeanKinematics[toolInds['ik'],varInds[var]] for var in kinematicVars}}
+        rraKinematics = {runLabel: {var: subjectMeanKinematics[toolInds['rra'],varInds[var]] for var in kinematicVars}}
+        rra3Kinematics = {runLabel: {var: subjectMeanKinematics[toolInds['rra3'],varInds[var]] for var in kinematicVars}}
+        mocoKinematics = {runLabel: {var: subjectMeanKinematics[toolInds['moco'],varInds[var]] for var in kinematicVars}}
+        addBiomechKinematics = {runLabel: {var: subjectMeanKinematics[toolInds['addBiomech'],varInds[var]] for var in kinematicVars}}
             
         #Build a time series table with the mean kinematics from each category
         
@@ -3941,11 +3430,11 @@ if analyseData:
             addBiomechTable.setIndependentValueAtIndex(iRow, avgTime[iRow])
             
         #Write to mot file format
-        osim.STOFileAdapter().write(ikTable, os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_ikMeanKinematics.sto'))
-        osim.STOFileAdapter().write(rraTable, os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rraMeanKinematics.sto'))
-        osim.STOFileAdapter().write(rra3Table, os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rra3MeanKinematics.sto'))
-        osim.STOFileAdapter().write(mocoTable, os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_mocoMeanKinematics.sto'))
-        osim.STOFileAdapter().write(addBiomechTable, os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechMeanKinematics.sto'))
+        osim.STOFileAdapter().write(ikTable, os.path.join(dataDir,subject,'results','outputs',f'{subject}_ikMeanKinematics.sto'))
+        osim.STOFileAdapter().write(rraTable, os.path.join(dataDir,subject,'results','outputs',f'{subject}_rraMeanKinematics.sto'))
+        osim.STOFileAdapter().write(rra3Table, os.path.join(dataDir,subject,'results','outputs',f'{subject}_rra3MeanKinematics.sto'))
+        osim.STOFileAdapter().write(mocoTable, os.path.join(dataDir,subject,'results','outputs',f'{subject}_mocoMeanKinematics.sto'))
+        osim.STOFileAdapter().write(addBiomechTable, os.path.join(dataDir,subject,'results','outputs',f'{subject}_addBiomechMeanKinematics.sto'))
         
         #Append participants kinematics to the broader group dictionary
         for var in kinematicVars:
@@ -3961,11 +3450,11 @@ if analyseData:
         #Create colured versions of models for the categories
         
         #Read in multiple versions of the subject model
-        ikModel = osim.Model(os.path.join('..','..','data','HamnerDelp2013',subject,'model',f'{subject}_adjusted_scaled.osim'))
-        rraModel = osim.Model(os.path.join('..','..','data','HamnerDelp2013',subject,'model',f'{subject}_adjusted_scaled.osim'))
-        rra3Model = osim.Model(os.path.join('..','..','data','HamnerDelp2013',subject,'model',f'{subject}_adjusted_scaled.osim'))
-        mocoModel = osim.Model(os.path.join('..','..','data','HamnerDelp2013',subject,'model',f'{subject}_adjusted_scaled.osim'))
-        addBiomechModel = osim.Model(os.path.join('..','..','data','HamnerDelp2013',subject,'model',f'{subject}_adjusted_scaled.osim'))
+        ikModel = osim.Model(os.path.join(dataDir,subject,'model',f'{subject}_adjusted_scaled.osim'))
+        rraModel = osim.Model(os.path.join(dataDir,subject,'model',f'{subject}_adjusted_scaled.osim'))
+        rra3Model = osim.Model(os.path.join(dataDir,subject,'model',f'{subject}_adjusted_scaled.osim'))
+        mocoModel = osim.Model(os.path.join(dataDir,subject,'model',f'{subject}_adjusted_scaled.osim'))
+        addBiomechModel = osim.Model(os.path.join(dataDir,subject,'model',f'{subject}_adjusted_scaled.osim'))
         
         #Delete the forceset in each model to get rid of muscles
         ikModel.updForceSet().clearAndDestroy()
@@ -3981,26 +3470,27 @@ if analyseData:
         mocoModel.updMarkerSet().clearAndDestroy()
         addBiomechModel.updMarkerSet().clearAndDestroy()
     
-        #Loop through the bodies and set the colouring
+        #Loop through the models and bodies and set the colouring
         #Also adjust the opacity here
-        for bodyInd in range(ikModel.updBodySet().getSize()):
+        for colourModel, colourRGB in zip([ikModel, rraModel, rra3Model, mocoModel, addBiomechModel],
+                                          [ikColRGB, rraColRGB, rra3ColRGB, mocoColRGB, addBiomechColRGB]):
             
-            #Loop through the attached geomtries on body
-            for gInd in range(ikModel.updBodySet().get(bodyInd).getPropertyByName('attached_geometry').size()):
+            #Get the body set once for the current model
+            bodySet = colourModel.updBodySet()
+            
+            #Loop through the bodies
+            for bodyInd in range(bodySet.getSize()):
                 
-                    #Set the colours for the current body and geometry
-                    ikModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setColor(ikColRGB) 
-                    rraModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setColor(rraColRGB)
-                    rra3Model.updBodySet().get(bodyInd).get_attached_geometry(gInd).setColor(rra3ColRGB)
-                    mocoModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setColor(mocoColRGB)
-                    addBiomechModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setColor(addBiomechColRGB)
+                #Get the current body
+                body = bodySet.get(bodyInd)
+                
+                #Loop through the attached geomtries on body
+                for gInd in range(body.getPropertyByName('attached_geometry').size()):
                     
-                    #Opacity
-                    ikModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setOpacity(0.4) 
-                    rraModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setOpacity(0.4)
-                    rra3Model.updBodySet().get(bodyInd).get_attached_geometry(gInd).setOpacity(0.4)
-                    mocoModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setOpacity(0.4)
-                    addBiomechModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setOpacity(0.4)
+                    #Set the colour and opacity for the current geometry
+                    geometry = body.get_attached_geometry(gInd)
+                    geometry.setColor(colourRGB)
+                    geometry.setOpacity(0.4)
                     
         #Set names
         ikModel.setName(f'{subject}_IK')
@@ -4017,22 +3507,22 @@ if analyseData:
         addBiomechModel.finalizeConnections()
         
         #Print to file
-        ikModel.printToXML(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_ikModel.osim'))
-        rraModel.printToXML(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rraModel.osim'))
-        rra3Model.printToXML(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_rra3Model.osim'))
-        mocoModel.printToXML(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_mocoModel.osim'))
-        addBiomechModel.printToXML(os.path.join('..','..','data','HamnerDelp2013',subject,'results','outputs',f'{subject}_addBiomechModel.osim'))
+        ikModel.printToXML(os.path.join(dataDir,subject,'results','outputs',f'{subject}_ikModel.osim'))
+        rraModel.printToXML(os.path.join(dataDir,subject,'results','outputs',f'{subject}_rraModel.osim'))
+        rra3Model.printToXML(os.path.join(dataDir,subject,'results','outputs',f'{subject}_rra3Model.osim'))
+        mocoModel.printToXML(os.path.join(dataDir,subject,'results','outputs',f'{subject}_mocoModel.osim'))
+        addBiomechModel.printToXML(os.path.join(dataDir,subject,'results','outputs',f'{subject}_addBiomechModel.osim'))
     
     # %% Create mean models and kinematic files
     
     #Create coloured mean models based on generic model
     
     #Read in multiple versions of generic model
-    ikMeanModel = osim.Model(os.path.join('..','..','data','HamnerDelp2013','subject01','model','genericModel.osim'))
-    rraMeanModel = osim.Model(os.path.join('..','..','data','HamnerDelp2013','subject01','model','genericModel.osim'))
-    rra3MeanModel = osim.Model(os.path.join('..','..','data','HamnerDelp2013','subject01','model','genericModel.osim'))
-    mocoMeanModel = osim.Model(os.path.join('..','..','data','HamnerDelp2013','subject01','model','genericModel.osim'))
-    addBiomechMeanModel = osim.Model(os.path.join('..','..','data','HamnerDelp2013','subject01','model','genericModel.osim'))
+    ikMeanModel = osim.Model(os.path.join(dataDir,'subject01','model','genericModel.osim'))
+    rraMeanModel = osim.Model(os.path.join(dataDir,'subject01','model','genericModel.osim'))
+    rra3MeanModel = osim.Model(os.path.join(dataDir,'subject01','model','genericModel.osim'))
+    mocoMeanModel = osim.Model(os.path.join(dataDir,'subject01','model','genericModel.osim'))
+    addBiomechMeanModel = osim.Model(os.path.join(dataDir,'subject01','model','genericModel.osim'))
     
     #Delete the forceset in each model to get rid of muscles
     ikMeanModel.updForceSet().clearAndDestroy()
@@ -4048,27 +3538,28 @@ if analyseData:
     mocoMeanModel.updMarkerSet().clearAndDestroy()
     addBiomechMeanModel.updMarkerSet().clearAndDestroy()
     
-    #Loop through the bodies and set the colouring
+    #Loop through the models and bodies and set the colouring
     #Also adjust the opacity here
-    for bodyInd in range(ikMeanModel.updBodySet().getSize()):
+    for colourModel, colourRGB in zip([ikMeanModel, rraMeanModel, rra3MeanModel, mocoMeanModel, addBiomechMeanModel],
+                                      [ikColRGB, rraColRGB, rra3ColRGB, mocoColRGB, addBiomechColRGB]):
         
-        #Loop through the attached geomtries on body
-        for gInd in range(ikMeanModel.updBodySet().get(bodyInd).getPropertyByName('attached_geometry').size()):
+        #Get the body set once for the current model
+        bodySet = colourModel.updBodySet()
         
-            #Set the colours for the current body and geometry
-            ikMeanModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setColor(ikColRGB) 
-            rraMeanModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setColor(rraColRGB)
-            rra3MeanModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setColor(rra3ColRGB)
-            mocoMeanModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setColor(mocoColRGB)
-            addBiomechMeanModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setColor(addBiomechColRGB)
+        #Loop through the bodies
+        for bodyInd in range(bodySet.getSize()):
             
-            #Opacity
-            ikMeanModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setOpacity(0.4) 
-            rraMeanModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setOpacity(0.4)
-            rra3MeanModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setOpacity(0.4)
-            mocoMeanModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setOpacity(0.4)
-            addBiomechMeanModel.updBodySet().get(bodyInd).get_attached_geometry(gInd).setOpacity(0.4)
+            #Get the current body
+            body = bodySet.get(bodyInd)
             
+            #Loop through the attached geomtries on body
+            for gInd in range(body.getPropertyByName('attached_geometry').size()):
+                
+                #Set the colour and opacity for the current geometry
+                geometry = body.get_attached_geometry(gInd)
+                geometry.setColor(colourRGB)
+                geometry.setOpacity(0.4)
+                
     #Set names
     ikMeanModel.setName('generic_IK')
     rraMeanModel.setName('generic_RRA')
@@ -4084,11 +3575,11 @@ if analyseData:
     addBiomechMeanModel.finalizeConnections()
     
     #Print to file
-    ikMeanModel.printToXML(os.path.join('..','..','results','HamnerDelpDataset','outputs','generic_ikModel.osim'))
-    rraMeanModel.printToXML(os.path.join('..','..','results','HamnerDelpDataset','outputs','generic_rraModel.osim'))
-    rra3MeanModel.printToXML(os.path.join('..','..','results','HamnerDelpDataset','outputs','generic_rra3Model.osim'))
-    mocoMeanModel.printToXML(os.path.join('..','..','results','HamnerDelpDataset','outputs','generic_mocoModel.osim'))
-    addBiomechMeanModel.printToXML(os.path.join('..','..','results','HamnerDelpDataset','outputs','generic_addBiomechModel.osim'))
+    ikMeanModel.printToXML(os.path.join(resultsDir,'outputs','generic_ikModel.osim'))
+    rraMeanModel.printToXML(os.path.join(resultsDir,'outputs','generic_rraModel.osim'))
+    rra3MeanModel.printToXML(os.path.join(resultsDir,'outputs','generic_rra3Model.osim'))
+    mocoMeanModel.printToXML(os.path.join(resultsDir,'outputs','generic_mocoModel.osim'))
+    addBiomechMeanModel.printToXML(os.path.join(resultsDir,'outputs','generic_addBiomechModel.osim'))
     
     #Build a mean time series table with the kinematics from each category
     
@@ -4138,10 +3629,10 @@ if analyseData:
         addBiomechMeanTable.setIndependentValueAtIndex(iRow, avgMeanTime[iRow])
         
     #Write to mot file format
-    osim.STOFileAdapter().write(ikMeanTable, os.path.join('..','..','results','HamnerDelpDataset','outputs','group_ikMeanKinematics.sto'))
-    osim.STOFileAdapter().write(rraMeanTable, os.path.join('..','..','results','HamnerDelpDataset','outputs','group_rraMeanKinematics.sto'))
-    osim.STOFileAdapter().write(rra3MeanTable, os.path.join('..','..','results','HamnerDelpDataset','outputs','group_rra3MeanKinematics.sto'))
-    osim.STOFileAdapter().write(mocoMeanTable, os.path.join('..','..','results','HamnerDelpDataset','outputs','group_mocoMeanKinematics.sto'))
-    osim.STOFileAdapter().write(addBiomechMeanTable, os.path.join('..','..','results','HamnerDelpDataset','outputs','group_addBiomechMeanKinematics.sto'))
+    osim.STOFileAdapter().write(ikMeanTable, os.path.join(resultsDir,'outputs','group_ikMeanKinematics.sto'))
+    osim.STOFileAdapter().write(rraMeanTable, os.path.join(resultsDir,'outputs','group_rraMeanKinematics.sto'))
+    osim.STOFileAdapter().write(rra3MeanTable, os.path.join(resultsDir,'outputs','group_rra3MeanKinematics.sto'))
+    osim.STOFileAdapter().write(mocoMeanTable, os.path.join(resultsDir,'outputs','group_mocoMeanKinematics.sto'))
+    osim.STOFileAdapter().write(addBiomechMeanTable, os.path.join(resultsDir,'outputs','group_addBiomechMeanKinematics.sto'))
 
 # %% ----- end of runSimulations.py ----- %% #